@@ -4,15 +4,30 @@ Script principal do bot de WhatsApp
 """
 
 import sys
+import time
+import asyncio
 import logging
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Adicionar o diretório do projeto ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from whatsapp_bot import config, BrowserManager, WhatsAppBot
+from whatsapp_bot.autoreply import AutoReplyEngine
+from whatsapp_bot.campaign import CampaignRunner
+from whatsapp_bot.config import EXPORTS_DIR, JOBS_DIR, SNAPSHOTS_DIR, PROFILES_DIR, LOGS_DIR
+from whatsapp_bot.export import ChatExporter
+from whatsapp_bot.incoming import IncomingMessageStream
+from whatsapp_bot.jobqueue import SQLiteJobQueue, QueueWorker, parse_slot
+from whatsapp_bot.orchestrator import Orchestrator, Session
+from whatsapp_bot.prewarm import COMMIT_GUARD_SECONDS, PrewarmedSend, deadline_for, prewarm_start, sleep_until
+from whatsapp_bot.pacing import get_pacer
+from whatsapp_bot.scheduler import JobScheduler, JobSpool, RetryBackoff, daily_message_steps
+from whatsapp_bot.profile import compact_profile, format_size
+from whatsapp_bot.snapshots import DomRecorder, ReplayHarness
+from whatsapp_bot.soak import SoakTest
 
 # Configurar logging
 log_file = Path(__file__).parent / "logs" / f"bot_{datetime.now().strftime('%Y-%m-%d')}.log"
@@ -30,6 +45,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def create_pacer(profile_path=None):
+    """Cria o controlador de ritmo de envio da conta (padrão: a configurada)"""
+    profile_path = profile_path or config.get_profile_path()
+    return get_pacer(
+        profile_path,
+        min_per_minute=config.get("pacing_min_per_minute", 2),
+        max_per_minute=config.get("pacing_max_per_minute", 20),
+        state_path=f"{profile_path}_pacing.json"
+    )
+
+
+def create_recorder():
+    """Cria o gravador de snapshots se estiver ativado na configuração"""
+    if config.get("record_snapshots"):
+        return DomRecorder(SNAPSHOTS_DIR)
+    return None
+
+
 def setup():
     """Executa o assistente de configuração inicial"""
     print("\n" + "="*60)
@@ -74,7 +107,7 @@ def first_run():
         print("Iniciando navegador...")
         driver = browser_manager.start()
 
-        bot = WhatsAppBot(driver)
+        bot = WhatsAppBot(driver, recorder=create_recorder())
         bot.open_whatsapp()
 
         print("\n" + "="*60)
@@ -106,6 +139,62 @@ def first_run():
         browser_manager.stop()
 
 
+def prewarm_deadline():
+    """
+    Horário de envio de hoje, se o pré-aquecimento está ativo e ainda não passou
+
+    Returns:
+        datetime ou None
+    """
+    if config.get("prewarm_lead_seconds", 0) <= 0:
+        return None
+    deadline = deadline_for(config.get("send_time", "09:00"))
+    return deadline if datetime.now() < deadline else None
+
+
+def daily_targets():
+    """
+    Conversas da mensagem diária que ainda não a receberam hoje
+
+    Returns:
+        list: prewarm_targets (com pré-aquecimento) ou o group_name, sem as
+            conversas que já receberam
+    """
+    targets = config.get("prewarm_targets") if config.get("prewarm_lead_seconds", 0) > 0 else []
+    sent = config.sent_targets_today()
+    return [target for target in targets or [config.get("group_name")] if target not in sent]
+
+
+def create_prewarmed_send(bot, deadline, messages_dir):
+    """
+    Cria o envio pré-aquecido da mensagem diária
+
+    Returns:
+        PrewarmedSend ou None se não há mensagem para hoje
+    """
+    message_data = bot.get_message_for_today(messages_dir)
+    if not message_data:
+        logger.error("Nenhuma mensagem configurada para hoje")
+        return None
+
+    return PrewarmedSend(bot, daily_targets(), message_data, deadline,
+                         skew_log=LOGS_DIR / "send_skew.jsonl",
+                         on_sent=config.add_sent_target)
+
+
+def report_daily_targets():
+    """
+    Informa as conversas que ainda não receberam a mensagem diária
+
+    Returns:
+        bool: True se todas receberam
+    """
+    missing = daily_targets()
+    if missing:
+        logger.error(f"Mensagem diária ainda não enviada para: {', '.join(missing)}")
+    return not missing
+
+
 def send_message():
     """Envia a mensagem diária"""
     logger.info("="*60)
@@ -134,19 +223,44 @@ def send_message():
         browser_type=browser_type,
         profile_path=profile_path,
         minimize=minimize,
-        headless=headless
+        headless=headless,
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
     )
 
+    # Pré-aquecimento: abrir tudo antes e enviar exatamente no horário
+    deadline = prewarm_deadline()
+    if deadline:
+        start_at = prewarm_start(deadline, config.get("prewarm_lead_seconds"))
+        if datetime.now() < start_at:
+            logger.info(f"Aguardando {start_at:%H:%M:%S} para preparar o envio das {deadline:%H:%M}")
+            sleep_until(start_at)
+
     try:
         logger.info(f"Iniciando navegador {browser_type}...")
         driver = browser_manager.start()
 
         # Criar bot e enviar mensagem
-        bot = WhatsAppBot(driver)
+        bot = WhatsAppBot(driver, recorder=create_recorder())
         messages_dir = Path(__file__).parent / "messages"
 
-        success = bot.send_daily_message(group_name, messages_dir)
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        if deadline:
+            sender = create_prewarmed_send(bot, deadline, messages_dir)
+            if sender:
+                sender.run()
+        else:
+            # Depois de um envio parcial, só as conversas que faltam
+            for _ in daily_message_steps(bot, daily_targets(), messages_dir,
+                                         on_sent=config.add_sent_target):
+                pass
 
+        # Só conta como enviado quando todas as conversas receberam
+        success = report_daily_targets()
         if success:
             # Atualizar data do último envio
             config.update_last_send_date()
@@ -193,7 +307,7 @@ def test_message():
         logger.info(f"Iniciando navegador {browser_type}...")
         driver = browser_manager.start()
 
-        bot = WhatsAppBot(driver)
+        bot = WhatsAppBot(driver, recorder=create_recorder())
         messages_dir = Path(__file__).parent / "messages"
 
         success = bot.send_daily_message(group_name, messages_dir)
@@ -219,6 +333,497 @@ def test_message():
         logger.info("="*60)
 
 
+def run_campaign(csv_path, template_path, phone_column):
+    """Envia mensagens personalizadas para os contatos de um CSV"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - CAMPANHA")
+    logger.info("="*60)
+
+    try:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            template = f.read().strip()
+    except Exception as e:
+        logger.error(f"Erro ao ler template: {e}")
+        return False
+
+    browser_type = config.get("browser", "chrome")
+    browser_manager = BrowserManager(
+        browser_type=browser_type,
+        profile_path=config.get_profile_path(),
+        minimize=config.get("minimize_window", True),
+        headless=config.get("headless", False),
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
+    )
+
+    try:
+        logger.info(f"Iniciando navegador {browser_type}...")
+        driver = browser_manager.start()
+
+        bot = WhatsAppBot(driver, pacer=create_pacer(), recorder=create_recorder())
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        runner = CampaignRunner(bot, csv_path, template, phone_column=phone_column)
+        stats = runner.run()
+
+        print(f"✓ Campanha concluída: {stats['sent']} enviados, {stats['errors']} erros, "
+              f"{stats['skipped']} pulados")
+        if stats['skipped']:
+            print(f"  Contatos pulados e motivos: {runner.skipped_path}")
+        if stats['failed']:
+            lines = ", ".join(str(failed['line']) for failed in stats['failed'])
+            print(f"  Linhas com falha (tentadas de novo na próxima execução): {lines}")
+        return stats['errors'] == 0
+
+    except Exception as e:
+        logger.error(f"Erro na campanha: {e}", exc_info=True)
+        print(f"✗ Erro: {e}")
+        print("Execute o mesmo comando novamente para continuar de onde parou.")
+        return False
+
+    finally:
+        browser_manager.stop()
+        logger.info("="*60)
+
+
+def listen(output_path, interval, rules_path=None):
+    """Escuta mensagens recebidas, grava em JSONL e responde pelas regras"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - ESCUTANDO MENSAGENS")
+    logger.info("="*60)
+
+    if not output_path:
+        output_path = Path(__file__).parent / "logs" / f"incoming_{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+
+    browser_type = config.get("browser", "chrome")
+    browser_manager = BrowserManager(
+        browser_type=browser_type,
+        profile_path=config.get_profile_path(),
+        minimize=config.get("minimize_window", True),
+        headless=config.get("headless", False),
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
+    )
+
+    try:
+        logger.info(f"Iniciando navegador {browser_type}...")
+        driver = browser_manager.start()
+
+        bot = WhatsAppBot(driver, pacer=create_pacer() if rules_path else None, recorder=create_recorder())
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        callback = None
+        if rules_path:
+            callback = AutoReplyEngine(bot, rules_path).handle
+            print(f"Respostas automáticas: {rules_path}")
+
+        print(f"Gravando mensagens recebidas em: {output_path}")
+        print("Pressione Ctrl+C para parar\n")
+        stream = IncomingMessageStream(bot, output_path=output_path, callback=callback,
+                                       interval=interval)
+        try:
+            stream.run()
+        except KeyboardInterrupt:
+            stream.poll()
+            print(f"\n✓ {stream.total} mensagem(ns) gravada(s)")
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro ao escutar mensagens: {e}", exc_info=True)
+        print(f"✗ Erro: {e}")
+        return False
+
+    finally:
+        browser_manager.stop()
+        logger.info("="*60)
+
+
+def export_chat(chat_name, max_messages=None):
+    """Exporta o histórico de uma conversa para JSONL"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - EXPORTAÇÃO")
+    logger.info("="*60)
+
+    browser_type = config.get("browser", "chrome")
+    browser_manager = BrowserManager(
+        browser_type=browser_type,
+        profile_path=config.get_profile_path(),
+        minimize=config.get("minimize_window", True),
+        headless=config.get("headless", False),
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
+    )
+
+    try:
+        logger.info(f"Iniciando navegador {browser_type}...")
+        driver = browser_manager.start()
+
+        bot = WhatsAppBot(driver, recorder=create_recorder())
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        exporter = ChatExporter(bot, chat_name, EXPORTS_DIR, max_messages=max_messages)
+        exported = exporter.run()
+        if exported is None:
+            print("✗ Falha na exportação")
+            return False
+
+        if exporter.complete:
+            print(f"✓ {exported} mensagem(ns) exportada(s) para {exporter.output_path}")
+        else:
+            print(f"✓ {exported} mensagem(ns) lida(s); execute novamente para continuar a exportação")
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro na exportação: {e}", exc_info=True)
+        print(f"✗ Erro: {e}")
+        return False
+
+    finally:
+        browser_manager.stop()
+        logger.info("="*60)
+
+
+def is_send_time():
+    """Verifica se já passou do horário de envio configurado"""
+    send_time = config.get("send_time", "09:00")
+    return datetime.now().strftime("%H:%M") >= send_time
+
+
+def serve():
+    """Sessão persistente: mensagem diária + jobs da pasta jobs/ por prioridade"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - SESSÃO PERSISTENTE")
+    logger.info("="*60)
+
+    group_name = config.get("group_name")
+    browser_type = config.get("browser", "chrome")
+    browser_manager = BrowserManager(
+        browser_type=browser_type,
+        profile_path=config.get_profile_path(),
+        minimize=config.get("minimize_window", True),
+        headless=config.get("headless", False),
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
+    )
+
+    scheduler = JobScheduler(config.get("slo_seconds"))
+    spool = JobSpool(JOBS_DIR)
+    messages_dir = Path(__file__).parent / "messages"
+    daily_job = None
+    daily_retry = RetryBackoff("mensagem diária",
+                               base_delay=config.get("daily_retry_seconds", 60),
+                               max_attempts=config.get("daily_max_attempts", 5))
+    daily_retry_day = None
+    prewarmed_for = None
+    prewarm = None  # Envio pré-aquecido aguardando o horário
+    prewarm_steps = None  # Preparação em andamento (um passo por volta)
+    last_report = time.monotonic()
+
+    try:
+        logger.info(f"Iniciando navegador {browser_type}...")
+        driver = browser_manager.start()
+
+        bot = WhatsAppBot(driver, pacer=create_pacer(), recorder=create_recorder())
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        print(f"Sessão ativa. Coloque jobs (.json) em: {JOBS_DIR}")
+        print("Pressione Ctrl+C para parar\n")
+
+        while True:
+            spool.poll(scheduler, bot)
+
+            # Pré-aquecimento: preparar antes do horário, intercalado com os
+            # jobs, e enviar exatamente nele
+            deadline = prewarm_deadline()
+            if (prewarm is None and group_name and deadline and deadline != prewarmed_for
+                    and config.should_send_today()
+                    and datetime.now() >= prewarm_start(deadline, config.get("prewarm_lead_seconds"))):
+                prewarmed_for = deadline
+                prewarm = create_prewarmed_send(bot, deadline, messages_dir)
+                prewarm_steps = prewarm.prepare_steps() if prewarm else None
+
+            if prewarm is not None:
+                if prewarm_steps is not None:
+                    try:
+                        if next(prewarm_steps, None) is None:
+                            prewarm_steps = None
+                    except Exception as e:
+                        # As conversas não preparadas ficam para o job normal
+                        logger.error(f"Erro na preparação do envio: {e}")
+                        prewarm_steps = None
+                        prewarm.interrupted = True
+                elif datetime.now() >= prewarm.deadline - timedelta(seconds=COMMIT_GUARD_SECONDS):
+                    # Nenhum job começa nos últimos segundos; as conversas que
+                    # falharem ficam para o job normal do horário
+                    prewarm.commit()
+                    prewarm = None
+                    if report_daily_targets():
+                        config.update_last_send_date()
+
+            # Job diário terminou sem registrar o envio: nova tentativa com espera
+            if daily_job is not None and daily_job.finished_at is not None:
+                if config.should_send_today():
+                    daily_retry.failed()
+                daily_job = None
+
+            # Mensagem diária entra como job normal no horário configurado
+            # (só para as conversas que ainda não receberam)
+            if group_name and prewarm is None and is_send_time() and config.should_send_today():
+                if daily_retry_day != datetime.now().date():
+                    daily_retry_day = datetime.now().date()
+                    daily_retry.reset()
+                if daily_job is None and daily_retry.ready():
+                    daily_job = scheduler.submit(
+                        "mensagem diária",
+                        daily_message_steps(bot, daily_targets(), messages_dir,
+                                            on_sent=config.add_sent_target,
+                                            on_success=config.update_last_send_date),
+                        priority="normal"
+                    )
+
+            if scheduler.step():
+                if prewarm is not None:
+                    prewarm.interrupted = True
+            elif prewarm_steps is None:
+                time.sleep(1)
+
+            if time.monotonic() - last_report >= 3600:
+                scheduler.slo.log_report()
+                last_report = time.monotonic()
+
+    except KeyboardInterrupt:
+        print("\n✓ Sessão encerrada")
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro na sessão persistente: {e}", exc_info=True)
+        print(f"✗ Erro: {e}")
+        return False
+
+    finally:
+        scheduler.slo.log_report()
+        browser_manager.stop()
+        logger.info("="*60)
+
+
+def enqueue(chat_name, text, slot=None, account=None, queue_path=None):
+    """Adiciona um envio na fila compartilhada"""
+    try:
+        account = account or config.get_account(required=True)
+    except ValueError as e:
+        print(f"✗ {e} (ou informe --account)")
+        return False
+
+    queue = SQLiteJobQueue(queue_path or config.get_queue_path())
+    job_id = queue.enqueue(account, chat_name, {'text': text}, slot=parse_slot(slot))
+    print(f"✓ Job {job_id} na fila para a conta '{account}' → '{chat_name}'")
+    return True
+
+
+def worker(queue_path=None):
+    """Processa jobs da fila compartilhada para a conta deste perfil"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - WORKER DA FILA")
+    logger.info("="*60)
+
+    try:
+        account = config.get_account(required=True)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return False
+
+    queue = SQLiteJobQueue(queue_path or config.get_queue_path())
+    browser_type = config.get("browser", "chrome")
+    browser_manager = BrowserManager(
+        browser_type=browser_type,
+        profile_path=config.get_profile_path(),
+        minimize=config.get("minimize_window", True),
+        headless=config.get("headless", False),
+        startup_budget=config.get("startup_budget_seconds"),
+        auto_compact=config.get("auto_compact_profile", False)
+    )
+
+    try:
+        logger.info(f"Iniciando navegador {browser_type}...")
+        driver = browser_manager.start()
+
+        bot = WhatsAppBot(driver, pacer=create_pacer(), recorder=create_recorder())
+        bot.open_whatsapp()
+        if not bot.wait_for_login():
+            logger.error("Falha no login do WhatsApp")
+            return False
+
+        print(f"Worker ativo para a conta '{account}'")
+        print("Pressione Ctrl+C para parar\n")
+        QueueWorker(queue, bot, [account]).run()
+        return True
+
+    except KeyboardInterrupt:
+        print(f"\n✓ Worker encerrado. Fila: {queue.stats()}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Erro no worker: {e}", exc_info=True)
+        print(f"✗ Erro: {e}")
+        return False
+
+    finally:
+        browser_manager.stop()
+        logger.info("="*60)
+
+
+def create_sessions():
+    """Cria as sessões do orquestrador a partir de "sessions" no config.json"""
+    specs = config.get("sessions") or [{
+        "account": config.get_account(required=True),
+        "profile": config.get_profile_path(),
+        "group_name": config.get("group_name"),
+        "send_time": config.get("send_time", "09:00"),
+    }]
+
+    sessions = []
+    for spec in specs:
+        account = spec["account"]
+        profile_path = spec.get("profile") or str(PROFILES_DIR / f"{account}_profile")
+        browser_manager = BrowserManager(
+            browser_type=spec.get("browser", config.get("browser", "chrome")),
+            profile_path=profile_path,
+            minimize=config.get("minimize_window", True),
+            headless=spec.get("headless", config.get("headless", False)),
+            startup_budget=config.get("startup_budget_seconds"),
+            auto_compact=config.get("auto_compact_profile", False)
+        )
+        sessions.append(Session(
+            account,
+            browser_manager,
+            group_name=spec.get("group_name"),
+            send_time=spec.get("send_time", config.get("send_time", "09:00")),
+            pacer=create_pacer(profile_path),
+            recorder=create_recorder()
+        ))
+    return sessions
+
+
+def orchestrate(queue_path=None):
+    """Várias contas em um processo: mensagem diária, fila compartilhada e métricas"""
+    logger.info("="*60)
+    logger.info("BOT DE WHATSAPP - ORQUESTRADOR")
+    logger.info("="*60)
+
+    try:
+        sessions = create_sessions()
+    except ValueError as e:
+        print(f"✗ {e}")
+        return False
+
+    orchestrator = Orchestrator(
+        sessions,
+        queue=SQLiteJobQueue(queue_path or config.get_queue_path()),
+        config=config,
+        messages_dir=Path(__file__).parent / "messages",
+        max_concurrency=config.get("max_concurrent_sessions", 2),
+        metrics_port=config.get("metrics_port", 8765),
+        health_interval=config.get("health_interval_seconds", 60)
+    )
+
+    print(f"Orquestrando {len(orchestrator.sessions)} conta(s)")
+    print("Pressione Ctrl+C (ou envie SIGTERM) para parar\n")
+    asyncio.run(orchestrator.run())
+    print("\n✓ Orquestrador encerrado")
+    logger.info("="*60)
+    return True
+
+
+def compact():
+    """Limpa caches do perfil do navegador preservando a sessão"""
+    browser_type = config.get("browser", "chrome")
+    profile_path = config.get_profile_path()
+
+    print(f"\nManutenção do perfil: {profile_path}")
+    stats = compact_profile(profile_path, browser_type)
+
+    if not stats:
+        print("✗ Manutenção não executada (perfil inexistente ou navegador aberto)")
+        return False
+
+    before, after = stats['before'], stats['after']
+    print(f"Antes:  {format_size(before['size'])} em {before['files']} arquivos")
+    print(f"Depois: {format_size(after['size'])} em {after['files']} arquivos")
+    print(f"✓ {len(stats['removed'])} diretórios de cache removidos")
+    return True
+
+
+def replay_snapshots(snapshot_dir):
+    """Valida os seletores contra os snapshots gravados (sem WhatsApp)"""
+    logger.info("="*60)
+    logger.info(f"REPLAY DE SNAPSHOTS: {snapshot_dir}")
+    logger.info("="*60)
+
+    harness = ReplayHarness(snapshot_dir, browser_type=config.get("browser", "chrome"))
+    report = harness.run()
+    harness.log_report(report)
+    report_path = harness.save_report(report)
+
+    checks = len(report['results'])
+    failed = sum(1 for result in report['results'] if not result['ok'])
+    if report['ok']:
+        print(f"\n✓ {checks} verificação(ões) em {report['snapshots']} snapshot(s) - relatório: {report_path}")
+    else:
+        print(f"\n✗ {failed} de {checks} verificação(ões) falharam - relatório: {report_path}")
+    return report['ok']
+
+
+def soak(sends=None, hours=None):
+    """Teste de longa duração contra a página simulada (sem WhatsApp)"""
+    if not sends and not hours:
+        sends = config.get("soak_sends", 500)
+
+    logger.info("="*60)
+    limits = [f"{sends} envios" if sends else None, f"máximo {hours}h" if hours else None]
+    logger.info(f"TESTE DE SOAK: {', '.join(l for l in limits if l)}")
+    logger.info("="*60)
+
+    test = SoakTest(
+        browser_type=config.get("browser", "chrome"),
+        sends=sends,
+        hours=hours,
+        delay_ms=config.get("soak_delay_ms", 400),
+        failure_rate=config.get("soak_failure_rate", 0.05),
+        sample_seconds=config.get("soak_sample_seconds", 30),
+        report_dir=LOGS_DIR
+    )
+    report = test.run()
+    report_path = test.save_report(report)
+
+    summary = report['summary']
+    latency = report['latency']
+    print(f"\n{summary['sent']} de {summary['sends']} envio(s) em {summary['duration_s']:.0f}s, "
+          f"latência p50 {summary['latency_p50_s']}s / p95 {summary['latency_p95_s']}s")
+    if latency:
+        print(f"p95 no começo {latency['start_p95_s']}s, no fim {latency['end_p95_s']}s")
+    for metric, data in report['leaks'].items():
+        print(f"  {metric}: {data['first']} → {data['last']} ({data['per_hour']}/h)"
+              + ("  ← vazamento" if data['leak'] else ""))
+
+    if report['ok']:
+        print(f"\n✓ Nenhum vazamento ou regressão - relatório: {report_path}")
+    else:
+        print(f"\n✗ {'; '.join(report['flags'])} - relatório: {report_path}")
+    return report['ok']
+
+
 def main():
     """Função principal"""
     parser = argparse.ArgumentParser(
@@ -230,6 +835,25 @@ Exemplos de uso:
   python main.py --first-run      Primeira execução (login no WhatsApp)
   python main.py                  Enviar mensagem diária
   python main.py --test           Testar envio sem atualizar data
+  python main.py --compact-profile  Limpar caches do perfil do navegador
+  python main.py --campaign contatos.csv --template campanha.txt
+                                  Enviar mensagem personalizada a cada contato
+  python main.py --listen         Gravar mensagens recebidas em JSONL
+  python main.py --listen --auto-reply regras.json
+                                  Responder automaticamente pelas regras
+  python main.py --export "Meu Grupo"
+                                  Exportar histórico do grupo em JSONL
+  python main.py --serve          Sessão persistente com fila de jobs
+  python main.py --enqueue "Meu Grupo" --text "Olá" --slot "2026-10-18 09:00"
+                                  Colocar envio na fila compartilhada
+  python main.py --worker         Processar a fila compartilhada
+  python main.py --orchestrate    Várias contas em um processo, com /metrics
+  python main.py --record-snapshots
+                                  Enviar gravando snapshots das telas
+  python main.py --replay-snapshots
+                                  Validar os seletores nos snapshots gravados
+  python main.py --soak --hours 12
+                                  Teste de longa duração contra página simulada
         """
     )
 
@@ -239,9 +863,55 @@ Exemplos de uso:
                         help='Primeira execução - Login no WhatsApp Web')
     parser.add_argument('--test', action='store_true',
                         help='Modo de teste - Envia mensagem sem atualizar data')
+    parser.add_argument('--compact-profile', action='store_true',
+                        help='Limpar caches do perfil (com o navegador fechado)')
+    parser.add_argument('--campaign', metavar='CSV',
+                        help='Enviar campanha para os contatos do arquivo CSV')
+    parser.add_argument('--template', metavar='ARQUIVO',
+                        help='Template da campanha com placeholders {coluna}')
+    parser.add_argument('--phone-column', default='telefone',
+                        help='Coluna do CSV com o telefone (padrão: telefone)')
+    parser.add_argument('--listen', action='store_true',
+                        help='Escutar mensagens recebidas e gravar em JSONL')
+    parser.add_argument('--output', metavar='ARQUIVO',
+                        help='Arquivo JSONL de saída do --listen')
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help='Intervalo de leitura do --listen em segundos (padrão: 2)')
+    parser.add_argument('--auto-reply', metavar='REGRAS',
+                        help='Arquivo JSON de regras de resposta automática (com --listen)')
+    parser.add_argument('--export', metavar='CONVERSA',
+                        help='Exportar histórico da conversa para exports/ em JSONL')
+    parser.add_argument('--max-messages', type=int,
+                        help='Limite de mensagens exportadas nesta execução')
+    parser.add_argument('--serve', action='store_true',
+                        help='Manter a sessão aberta e processar jobs da pasta jobs/')
+    parser.add_argument('--enqueue', metavar='CONVERSA',
+                        help='Colocar um envio na fila compartilhada')
+    parser.add_argument('--text', help='Texto do envio (com --enqueue)')
+    parser.add_argument('--slot', help='Horário mínimo do envio, ex: "2026-10-18 09:00"')
+    parser.add_argument('--account', help='Conta que deve enviar (padrão: a deste perfil)')
+    parser.add_argument('--worker', action='store_true',
+                        help='Processar jobs da fila compartilhada para esta conta')
+    parser.add_argument('--queue', metavar='ARQUIVO',
+                        help='Arquivo SQLite da fila compartilhada')
+    parser.add_argument('--orchestrate', action='store_true',
+                        help='Executar as contas de "sessions" em um único processo')
+    parser.add_argument('--record-snapshots', action='store_true',
+                        help='Gravar snapshots sanitizados das telas nesta execução')
+    parser.add_argument('--replay-snapshots', metavar='DIR', nargs='?', const=str(SNAPSHOTS_DIR),
+                        help='Validar os seletores nos snapshots (padrão: snapshots/)')
+    parser.add_argument('--soak', action='store_true',
+                        help='Teste de longa duração contra uma página local que imita o WhatsApp')
+    parser.add_argument('--sends', type=int,
+                        help='Quantidade de envios do --soak (padrão: soak_sends)')
+    parser.add_argument('--hours', type=float,
+                        help='Duração máxima do --soak em horas')
 
     args = parser.parse_args()
 
+    if args.record_snapshots:
+        config.config["record_snapshots"] = True
+
     try:
         if args.setup:
             setup()
@@ -249,6 +919,33 @@ Exemplos de uso:
             first_run()
         elif args.test:
             test_message()
+        elif args.compact_profile:
+            compact()
+        elif args.campaign:
+            if not args.template:
+                parser.error("--campaign requer --template")
+            if not run_campaign(args.campaign, args.template, args.phone_column):
+                sys.exit(1)
+        elif args.listen:
+            listen(args.output, args.interval, args.auto_reply)
+        elif args.export:
+            export_chat(args.export, args.max_messages)
+        elif args.serve:
+            serve()
+        elif args.enqueue:
+            if not args.text:
+                parser.error("--enqueue requer --text")
+            enqueue(args.enqueue, args.text, args.slot, args.account, args.queue)
+        elif args.worker:
+            worker(args.queue)
+        elif args.orchestrate:
+            orchestrate(args.queue)
+        elif args.replay_snapshots:
+            if not replay_snapshots(args.replay_snapshots):
+                sys.exit(1)
+        elif args.soak:
+            if not soak(args.sends, args.hours):
+                sys.exit(1)
         else:
             # Execução normal - enviar mensagem
             send_message()
@@ -0,0 +1,34 @@
+"""
+Configuração dos testes
+
+Os testes rodam a partir da raiz do projeto (como o main.py); o diretório é
+incluído no path para `pytest` funcionar também fora dela.
+
+O fixture `driver` abre um navegador headless. Sem navegador os testes que o
+usam são pulados; com a variável CI definida, a falta do navegador é um
+erro. WPP_TEST_BROWSER escolhe o navegador (padrão: chrome).
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture(scope="module")
+def driver():
+    from whatsapp_bot.browser import BrowserManager
+
+    browser = BrowserManager(os.environ.get("WPP_TEST_BROWSER", "chrome"), minimize=False,
+                             headless=True, cache_drivers=False)
+    try:
+        driver = browser.start()
+    except Exception as e:
+        if os.environ.get("CI"):
+            raise
+        pytest.skip(f"navegador indisponível: {e}")
+    yield driver
+    browser.stop()
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from whatsapp_bot.errors import UnconfirmedSendError
+from whatsapp_bot.jobqueue import QueueWorker, SQLiteJobQueue
+from whatsapp_bot.pacing import PacingController
+from whatsapp_bot.whatsapp import WhatsAppBot
+
+
+class FakeDriver:
+    """Bolha nova aparece após render_delay e recebe o ack após ack_delay"""
+
+    def __init__(self, render_delay, ack_delay):
+        self.sent_at = time.monotonic()
+        self.render_delay = render_delay
+        self.ack_delay = ack_delay
+
+    def execute_script(self, script, *args):
+        if script == WhatsAppBot.LAST_OUTGOING_SCRIPT:
+            elapsed = time.monotonic() - self.sent_at
+            if elapsed < self.render_delay:
+                # Ainda é a mensagem anterior, já confirmada
+                return {'id': 'true_anterior', 'status': 'msg-dblcheck'}
+            status = 'msg-dblcheck' if elapsed >= self.ack_delay else 'msg-time'
+            return {'id': 'true_nova', 'status': status}
+        return False
+
+
+def test_ack_of_previous_message_is_not_measured():
+    bot = WhatsAppBot(FakeDriver(render_delay=0.5, ack_delay=1.0))
+    latency = bot.wait_for_ack('true_anterior', timeout=5)
+    assert latency >= 0.9
+
+
+def test_ack_timeout_slows_pacer():
+    pacer = PacingController("teste", min_per_minute=2, max_per_minute=20, fast_ack=0.2, slow_ack=0.9)
+    bot = WhatsAppBot(FakeDriver(render_delay=60, ack_delay=60), pacer=pacer)
+    bot.ACK_TIMEOUT = 1
+    pacer.rate = pacer.max_rate
+    with pytest.raises(UnconfirmedSendError):
+        bot._settle(0, 'true_anterior')
+
+    assert pacer.errors == 1
+    assert pacer.rate == pacer.max_rate * 0.5
+    # O timeout entra na média: um ack rápido em seguida não volta a acelerar
+    pacer.record_ack(0.1)
+    assert pacer.rate <= pacer.max_rate * 0.5
+
+
+class DeliveredBot(WhatsAppBot):
+    """A mensagem aparece na conversa, mas o ack nunca chega"""
+
+    def __init__(self):
+        pacer = PacingController("teste", min_per_minute=2, max_per_minute=20)
+        super().__init__(FakeDriver(render_delay=0, ack_delay=60), pacer=pacer)
+        self.ACK_TIMEOUT = 0.5
+        self.sends = 0
+
+    def search_group(self, group_name):
+        return True
+
+    def send_message_data(self, message_data):
+        # Enter já foi apertado quando _settle espera o ack
+        self.sends += 1
+        return self._settle(0, 'true_anterior')
+
+
+def test_unconfirmed_send_is_not_retried(tmp_path):
+    queue = SQLiteJobQueue(tmp_path / "fila.db")
+    queue.enqueue("conta", "Grupo", {'text': "oi"})
+    bot = DeliveredBot()
+    worker = QueueWorker(queue, bot, ["conta"], worker_id="w1", idle_sleep=0)
+
+    assert worker.run_once()
+    # Sem nova tentativa: reenviar duplicaria a mensagem
+    assert not worker.run_once()
+    assert bot.sends == 1
+    assert queue.stats().get('failed') == 1
@@ -0,0 +1,179 @@
+"""
+Testes do matcher de respostas automáticas (RuleSet)
+
+O matcher compilado precisa devolver sempre a mesma regra que o laço simples
+"primeira regra do arquivo que casa", e continuar rápido com milhares de
+regras.
+"""
+
+import re
+import random
+import time
+
+from whatsapp_bot.autoreply import RuleSet
+
+
+def naive_match(rules, text, chat):
+    """Referência: testa as regras uma a uma, na ordem do arquivo"""
+    if not text:
+        return None
+    folded = text.casefold()
+    for index, rule in enumerate(rules):
+        if not rule.get('reply'):
+            continue
+        if rule.get('chats') and chat not in rule['chats']:
+            continue
+        for keyword in rule.get('keywords', []):
+            keyword = keyword.casefold().strip()
+            if keyword and re.search(r"(?<!\w)" + re.escape(keyword) + r"(?!\w)", folded):
+                return rule.get('id', str(index))
+        if rule.get('regex') and re.search(rule['regex'], text, re.IGNORECASE):
+            return rule.get('id', str(index))
+    return None
+
+
+def matched_id(ruleset, text, chat):
+    found = ruleset.match(text, chat)
+    return found[0]['id'] if found else None
+
+
+def test_earlier_rule_wins_over_leftmost_match():
+    rules = [
+        {'id': 'a', 'regex': r'\w\d', 'reply': 'a'},
+        {'id': 'b', 'regex': r'\s\w', 'reply': 'b'},
+    ]
+    assert matched_id(RuleSet(rules), " a1", None) == 'a'
+
+
+def test_chat_filter_does_not_hide_other_rules():
+    rules = [
+        {'id': 'x', 'regex': r'\d+', 'chats': ['X'], 'reply': 'x'},
+        {'id': 'y', 'regex': r'\d{3}-\d{4}', 'reply': 'y'},
+    ]
+    ruleset = RuleSet(rules)
+    assert matched_id(ruleset, "555-1234", "Y") == 'y'
+    assert matched_id(ruleset, "555-1234", "X") == 'x'
+
+
+def test_keywords_phrases_and_triggers():
+    rules = [
+        {'id': 'preco', 'keywords': ['preço', 'valor'], 'reply': 'r'},
+        {'id': 'bomdia', 'keywords': ['bom dia'], 'reply': 'r'},
+        {'id': 'pedido', 'regex': r'pedido\s*#?(\d+)', 'reply': 'Pedido {1}'},
+    ]
+    ruleset = RuleSet(rules)
+    assert matched_id(ruleset, "Qual o PREÇO?", None) == 'preco'
+    assert matched_id(ruleset, "bom dia, pessoal", None) == 'bomdia'
+    assert matched_id(ruleset, "bom diazinho", None) is None
+    rule, found = ruleset.match("status do pedido #123", None)
+    assert rule['id'] == 'pedido' and found.group(1) == '123'
+
+
+class CountingRegex:
+    """Regex que conta as chamadas de search"""
+
+    def __init__(self, regex):
+        self.regex = regex
+        self.pattern = regex.pattern
+        self.calls = 0
+
+    def search(self, text):
+        self.calls += 1
+        return self.regex.search(text)
+
+
+def test_combined_regex_searches_only_the_winning_rule():
+    # Sem literal obrigatório: todas vão para a regex combinada
+    rules = [{'id': f"r{i}", 'regex': rf"[xy]{{{i}}}\d", 'reply': 'r'} for i in range(1, 201)]
+    ruleset = RuleSet(rules)
+    for rule in ruleset.rules:
+        rule['regex'] = CountingRegex(rule['regex'])
+
+    rule, found = ruleset.match("abc yxyxx7", None)
+    assert rule['id'] == 'r1' and found.group(0) == "x7"
+    assert sum(r['regex'].calls for r in ruleset.rules) == 1
+
+
+REGEXES = [
+    r'\w\d', r'\s\w', r'\d+', r'\d{3}-\d{4}', r'a+b', r'(ab|ba)', r'x?y', r'[a-c]{2}',
+    r'\bok\b', r'foo', r'bar\d', r'(\w)\1', r'^a', r'b$', r'o{2,}', r'[^\w\s]', r'k.y',
+    r'(?P<n>\d)-', r'ab?c', r'y\s+o',
+]
+WORDS = ['ok', 'foo', 'bar', 'ab', 'bom dia', 'xy', 'k']
+ALPHABET = "ab1 23-xyokfr!c"
+
+
+def random_rules(rng):
+    rules = []
+    for index in range(rng.randint(1, 8)):
+        rule = {'id': str(index), 'reply': 'r'}
+        if rng.random() < 0.5:
+            rule['keywords'] = rng.sample(WORDS, rng.randint(1, 2))
+        if 'keywords' not in rule or rng.random() < 0.4:
+            rule['regex'] = rng.choice(REGEXES)
+        if rng.random() < 0.3:
+            rule['chats'] = [rng.choice(['X', 'Y'])]
+        rules.append(rule)
+    return rules
+
+
+def test_matches_naive_loop_on_random_rule_sets():
+    rng = random.Random(30)
+    for _ in range(3000):
+        rules = random_rules(rng)
+        ruleset = RuleSet(rules)
+        for _ in range(5):
+            text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 12)))
+            chat = rng.choice(['X', 'Y', None])
+            assert matched_id(ruleset, text, chat) == naive_match(rules, text, chat), (rules, text, chat)
+
+
+def large_ruleset(rng):
+    """3000 palavras-chave e 300 regex com literal, como nas regras do suporte"""
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+                  for _ in range(3300)]
+    rules = [{'id': f"k{i}", 'keywords': [vocabulary[i]], 'reply': 'r'} for i in range(3000)]
+    rules += [{'id': f"r{i}", 'regex': vocabulary[3000 + i] + r"\s*#?(\d+)", 'reply': 'r'} for i in range(300)]
+    return RuleSet(rules), vocabulary, rules
+
+
+def compiled_loop(rules):
+    """Laço regra a regra com as regex já compiladas (implementação anterior)"""
+    compiled = []
+    for rule in rules:
+        patterns = [re.compile(r"(?<!\w)" + re.escape(k.casefold()) + r"(?!\w)") for k in rule.get('keywords', [])]
+        regex = re.compile(rule['regex'], re.IGNORECASE) if rule.get('regex') else None
+        compiled.append((rule['id'], patterns, regex))
+
+    def match(text):
+        folded = text.casefold()
+        for rule_id, patterns, regex in compiled:
+            if any(p.search(folded) for p in patterns) or (regex and regex.search(text)):
+                return rule_id
+        return None
+    return match
+
+
+def best_time(match, messages, rounds=3):
+    """Menor tempo médio por mensagem em algumas rodadas"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for message in messages:
+            match(message)
+        elapsed = (time.perf_counter() - started) / len(messages)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_match_speed():
+    rng = random.Random(5)
+    ruleset, vocabulary, rules = large_ruleset(rng)
+    messages = [" ".join(rng.choice(vocabulary[2950:3000] + vocabulary[3290:3300] + ["olá", "bom", "dia", "123"])
+                         for _ in range(rng.randint(3, 15)))
+                for _ in range(500)]
+
+    fast = best_time(lambda message: ruleset.match(message, "Suporte"), messages)
+    loop = best_time(compiled_loop(rules), messages[:100])
+    # Relativo ao laço regra a regra, para não depender da velocidade da máquina
+    assert fast * 20 < loop, (fast, loop)
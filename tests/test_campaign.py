@@ -0,0 +1,71 @@
+import csv
+
+from whatsapp_bot.campaign import CampaignRunner
+from whatsapp_bot.errors import UnconfirmedSendError
+
+
+class FakeBot:
+    """Falha nos telefones de fail_phones até que sejam liberados"""
+
+    def __init__(self, fail_phones=(), unconfirmed_phones=()):
+        self.fail_phones = set(fail_phones)
+        self.unconfirmed_phones = set(unconfirmed_phones)
+        self.phone = None
+        self.received = []
+
+    def open_chat_by_phone(self, phone):
+        self.phone = phone
+        return True
+
+    def send_text_message(self, text):
+        if self.phone in self.fail_phones:
+            return False
+        self.received.append((self.phone, text))
+        if self.phone in self.unconfirmed_phones:
+            raise UnconfirmedSendError("sem ack")
+        return True
+
+
+def write_csv(tmp_path):
+    path = tmp_path / "contatos.csv"
+    path.write_text("telefone,nome\n5511000000001,Ana\n5511000000002,Bia\n5511000000003,Caio\n",
+                    encoding='utf-8')
+    return path
+
+
+def test_failed_rows_are_retried_on_resume(tmp_path):
+    csv_path = write_csv(tmp_path)
+    bot = FakeBot(fail_phones={"5511000000002"})
+    stats = CampaignRunner(bot, csv_path, "Olá {nome}").run()
+    assert stats['sent'] == 2 and stats['errors'] == 1
+    assert [(f['line'], f['row']['nome']) for f in stats['failed']] == [(2, "Bia")]
+
+    # Nova execução: só a linha com falha é enviada
+    bot = FakeBot()
+    stats = CampaignRunner(bot, csv_path, "Olá {nome}").run()
+    assert bot.received == [("5511000000002", "Olá Bia")]
+    assert stats['sent'] == 3 and stats['errors'] == 0 and stats['failed'] == []
+
+
+def test_row_failing_again_stays_recorded(tmp_path):
+    csv_path = write_csv(tmp_path)
+    CampaignRunner(FakeBot(fail_phones={"5511000000003"}), csv_path, "Olá {nome}").run()
+
+    stats = CampaignRunner(FakeBot(fail_phones={"5511000000003"}), csv_path, "Olá {nome}").run()
+    assert stats['errors'] == 1
+    assert [f['line'] for f in stats['failed']] == [3]
+
+
+def test_unconfirmed_row_is_not_resent(tmp_path):
+    csv_path = write_csv(tmp_path)
+    bot = FakeBot(unconfirmed_phones={"5511000000002"})
+    stats = CampaignRunner(bot, csv_path, "Olá {nome}").run()
+    assert stats['errors'] == 0 and stats['skipped'] == 1 and stats['failed'] == []
+
+    with open(f"{csv_path}.skipped.csv", encoding='utf-8') as f:
+        assert [row[0] for row in csv.reader(f)][1:] == ["2"]
+
+    # A retomada não reenvia a linha sem confirmação
+    bot = FakeBot()
+    CampaignRunner(bot, csv_path, "Olá {nome}").run()
+    assert bot.received == []
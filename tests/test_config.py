@@ -0,0 +1,50 @@
+import importlib
+from datetime import datetime
+
+import pytest
+
+# whatsapp_bot.config é também o nome da instância exportada pelo pacote
+config_module = importlib.import_module("whatsapp_bot.config")
+Config = config_module.Config
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_module, "CONFIG_FILE", tmp_path / "config.json")
+    config = Config()
+    config.set("account", "vendas")
+    return config
+
+
+def test_single_account_send_counts_for_orchestrator(config):
+    config.update_last_send_date()
+    assert not config.should_send_today("vendas")
+    assert config.should_send_today("suporte")
+
+
+def test_orchestrator_send_counts_for_single_account(config):
+    config.update_last_send_date("vendas")
+    assert not config.should_send_today()
+
+
+def test_old_last_send_date_is_migrated(config):
+    # config.json de antes de "last_send_dates"
+    config.set("last_send_date", datetime.now().strftime("%Y-%m-%d"))
+    config.set("last_send_dates", {})
+    assert not config.should_send_today("vendas")
+    assert config.should_send_today("suporte")
+
+
+def test_account_required_for_queue(config):
+    config.set("account", "")
+    with pytest.raises(ValueError):
+        config.get_account(required=True)
+
+
+def test_sent_targets_are_per_day(config):
+    config.add_sent_target("Grupo A")
+    config.add_sent_target("Grupo A")
+    assert config.sent_targets_today() == ["Grupo A"]
+
+    config.set("sent_targets", {"date": "2000-01-01", "targets": ["Grupo A"]})
+    assert config.sent_targets_today() == []
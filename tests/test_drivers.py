@@ -0,0 +1,54 @@
+import os
+import json
+import threading
+
+import pytest
+
+from whatsapp_bot.drivers import DriverCache, browser_fingerprint, resolve_browser_binary
+
+
+@pytest.fixture
+def installation(tmp_path):
+    """Instalação no estilo Linux: link → script → binário real"""
+    folder = tmp_path / "opt" / "chrome"
+    folder.mkdir(parents=True)
+    binary = folder / "chrome"
+    binary.write_bytes(b"\x7fELF binario")
+    wrapper = folder / "google-chrome"
+    wrapper.write_text('#!/bin/bash\nexec "$(dirname "$0")/chrome" "$@"\n')
+    link = tmp_path / "google-chrome"
+    link.symlink_to(wrapper)
+    return link, wrapper, binary
+
+
+def test_fingerprint_uses_real_binary(installation):
+    link, wrapper, binary = installation
+    assert resolve_browser_binary(str(link)) == str(binary)
+
+    before = browser_fingerprint(str(link))
+    wrapper.write_text('#!/bin/bash\n# atualizado pelo pacote\nexec "$(dirname "$0")/chrome" "$@"\n')
+    os.utime(wrapper, (1, 1))
+    assert browser_fingerprint(str(link)) == before
+
+    binary.write_bytes(b"\x7fELF binario novo")
+    assert browser_fingerprint(str(link)) != before
+
+
+def test_concurrent_saves_keep_valid_json(tmp_path, installation):
+    link, _wrapper, binary = installation
+    path = tmp_path / "drivers.json"
+
+    def record(browser_type):
+        cache = DriverCache(path)
+        for _ in range(20):
+            cache.record(browser_type, str(binary), str(link), {"browserVersion": "1"}, 1.0)
+
+    threads = [threading.Thread(target=record, args=(name,)) for name in ("chrome", "edge", "firefox")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, encoding='utf-8') as f:
+        assert set(json.load(f)) == {"chrome", "edge", "firefox"}
+    assert not list(tmp_path.glob("*.tmp"))
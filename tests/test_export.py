@@ -0,0 +1,195 @@
+import json
+
+import pytest
+
+from whatsapp_bot.export import ChatExporter
+
+
+class FakeChat:
+    """Conversa simulada: cada chamada ao script mostra mais uma página antiga"""
+
+    def __init__(self, total, page=7):
+        self.ids = [f"false_{i}" for i in range(total)]
+        self.page = page
+        self.calls = 0
+        self.fail_at = None
+
+    def open(self):
+        self.start = len(self.ids)
+        self.loaded = max(0, self.start - self.page)
+
+    def execute_script(self, script, cursor, resume_from):
+        self.calls += 1
+        if self.fail_at and self.calls >= self.fail_at:
+            raise KeyboardInterrupt()
+        new = self.ids[self.loaded:self.start]
+        self.start = self.loaded
+        self.loaded = max(0, self.loaded - self.page)
+
+        messages, reached, passed, after = [], False, not resume_from, False
+        for id_ in new:
+            if after:
+                continue
+            if id_ == cursor:
+                reached, messages = True, []
+                continue
+            if id_ == resume_from:
+                passed = after = True
+                continue
+            messages.append({'id': id_, 'text': id_})
+        if not passed:
+            messages = []
+        return {'messages': messages, 'scanned': len(new), 'reached_cursor': reached,
+                'passed_resume': bool(resume_from) and passed, 'at_top': self.start == 0,
+                'older_on_phone': False, 'loading': False, 'scrolled_to_top': self.start == 0}
+
+
+class FakeBot:
+    def __init__(self, chat):
+        self.driver = chat
+
+    def search_group(self, name):
+        self.driver.open()
+        return True
+
+
+def exported_ids(tmp_path):
+    with open(tmp_path / "Grupo.jsonl", encoding='utf-8') as f:
+        return [json.loads(line)['id'] for line in f]
+
+
+def run(tmp_path, chat, **kwargs):
+    exporter = ChatExporter(FakeBot(chat), "Grupo", tmp_path, batch_wait=0, **kwargs)
+    return exporter.run()
+
+
+def test_full_then_incremental_is_chronological(tmp_path):
+    chat = FakeChat(40)
+    assert run(tmp_path, chat) == 40
+    assert exported_ids(tmp_path) == chat.ids
+
+    chat.ids += [f"false_{i}" for i in range(40, 55)]
+    assert run(tmp_path, chat) == 15
+    assert exported_ids(tmp_path) == chat.ids
+    assert not (tmp_path / "Grupo.partial.jsonl").exists()
+
+
+def test_max_messages_continues_without_duplicates(tmp_path):
+    chat = FakeChat(40)
+    run(tmp_path, chat, max_messages=10)
+    assert not (tmp_path / "Grupo.jsonl").exists()
+
+    run(tmp_path, chat, max_messages=10)
+    run(tmp_path, chat)
+    assert exported_ids(tmp_path) == chat.ids
+
+
+def test_killed_run_resumes_without_duplicates(tmp_path):
+    chat = FakeChat(40)
+    chat.fail_at = 4
+    with pytest.raises(KeyboardInterrupt):
+        run(tmp_path, chat)
+
+    chat.fail_at = None
+    run(tmp_path, chat)
+    assert exported_ids(tmp_path) == chat.ids
+
+
+class CrashingExporter(ChatExporter):
+    """Cai logo depois de marcar o início da cópia para o arquivo final"""
+
+    def save_state(self, state):
+        super().save_state(state)
+        if state['walk'] and state['walk'].get('committing') is not None:
+            raise KeyboardInterrupt()
+
+
+def test_interrupted_commit_is_redone(tmp_path):
+    chat = FakeChat(20)
+    run(tmp_path, chat)
+    chat.ids += [f"false_{i}" for i in range(20, 30)]
+
+    with pytest.raises(KeyboardInterrupt):
+        CrashingExporter(FakeBot(chat), "Grupo", tmp_path, batch_wait=0).run()
+    # Cópia pela metade
+    with open(tmp_path / "Grupo.jsonl", 'a', encoding='utf-8') as f:
+        f.write('{"id": "false_2')
+
+    run(tmp_path, chat)
+    assert exported_ids(tmp_path) == chat.ids
+
+
+# Conversa no navegador: com a rolagem no topo carrega a página anterior e
+# mantém a posição, como o WhatsApp
+CHAT_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head><body>
+<div id="main"><div id="scroller" style="height: 400px; overflow-y: auto"><div id="list"></div></div></div>
+<script>
+const TOTAL = __TOTAL__, PAGE = __PAGE__;
+const scroller = document.getElementById('scroller');
+const list = document.getElementById('list');
+let loaded = TOTAL;
+
+function loadOlder() {
+  const start = Math.max(0, loaded - PAGE);
+  const rows = document.createDocumentFragment();
+  if (start === 0) {
+    const notice = document.createElement('div');
+    notice.setAttribute('role', 'row');
+    notice.textContent = 'As mensagens são protegidas com a criptografia de ponta a ponta.';
+    rows.appendChild(notice);
+  }
+  for (let i = start; i < loaded; i++) {
+    const row = document.createElement('div');
+    row.setAttribute('role', 'row');
+    row.style.height = '100px';
+    row.innerHTML = '<div data-id="false_' + i + '"><span class="selectable-text">msg ' + i + '</span></div>';
+    rows.appendChild(row);
+  }
+  loaded = start;
+  const before = list.scrollHeight;
+  list.prepend(rows);
+  scroller.scrollTop += list.scrollHeight - before;
+}
+
+loadOlder();
+setInterval(function () { if (scroller.scrollTop === 0 && loaded > 0) { loadOlder(); } }, 20);
+</script>
+</body></html>
+"""
+
+
+class PageBot:
+    """Abre a conversa simulada e conta as mensagens no DOM a cada lote"""
+
+    def __init__(self, driver, page_path):
+        self.browser = driver
+        self.page_path = page_path
+        self.node_counts = []
+        self.driver = self
+
+    def search_group(self, name):
+        self.browser.get(self.page_path.as_uri())
+        return True
+
+    def execute_script(self, script, *args):
+        result = self.browser.execute_script(script, *args)
+        self.node_counts.append(self.browser.execute_script(
+            "return document.querySelectorAll('#main [data-id]').length"))
+        return result
+
+
+def test_read_nodes_are_released(driver, tmp_path):
+    total, page = 1500, 30
+    page_path = tmp_path / "conversa.html"
+    page_path.write_text(CHAT_PAGE.replace("__TOTAL__", str(total)).replace("__PAGE__", str(page)),
+                         encoding='utf-8')
+    bot = PageBot(driver, page_path)
+
+    exporter = ChatExporter(bot, "Grupo", tmp_path, batch_wait=0.1)
+    assert exporter.run() == total and exporter.complete
+    assert exported_ids(tmp_path) == [f"false_{i}" for i in range(total)]
+
+    # O DOM fica do tamanho de um lote durante toda a rolagem
+    assert len(bot.node_counts) >= total // page
+    assert max(bot.node_counts) <= page * 2
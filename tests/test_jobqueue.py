@@ -0,0 +1,75 @@
+import os
+import time
+import multiprocessing
+
+import pytest
+
+from whatsapp_bot.jobqueue import JobQueueBackend, SQLiteJobQueue
+
+
+def drain(path, worker_id, results):
+    """Processo worker: reserva e conclui jobs até a fila esvaziar"""
+    queue = SQLiteJobQueue(path)
+    claimed = []
+    while True:
+        job = queue.claim(worker_id, ["vendas"], lease_seconds=30)
+        if job is None:
+            break
+        assert queue.complete(job['id'], worker_id)
+        claimed.append(job['id'])
+    results.put(claimed)
+
+
+def claim_and_die(path, worker_id):
+    """Processo worker que morre com o job reservado"""
+    queue = SQLiteJobQueue(path)
+    queue.claim(worker_id, ["vendas"], lease_seconds=1)
+    os._exit(0)
+
+
+def run_processes(target, args_list):
+    processes = [multiprocessing.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueueBackend()
+
+
+def test_each_job_delivered_once_across_processes(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = SQLiteJobQueue(path)
+    ids = [queue.enqueue("vendas", f"Grupo {i}", {'text': 'oi'}) for i in range(120)]
+    queue.enqueue("suporte", "Outro", {'text': 'oi'})
+
+    results = multiprocessing.Queue()
+    processes = run_processes(drain, [(path, f"worker-{n}", results) for n in range(4)])
+    claimed = [job_id for _ in processes for job_id in results.get(timeout=60)]
+    for process in processes:
+        process.join(timeout=10)
+
+    assert sorted(claimed) == ids
+    assert queue.stats() == {'done': 120, 'pending': 1}
+
+
+def test_expired_lease_is_reclaimed_by_another_process(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = SQLiteJobQueue(path)
+    job_id = queue.enqueue("vendas", "Grupo", {'text': 'oi'})
+
+    dead = run_processes(claim_and_die, [(path, "morto")])[0]
+    dead.join(timeout=10)
+    assert queue.claim("vivo", ["vendas"]) is None
+
+    time.sleep(1.2)
+    results = multiprocessing.Queue()
+    worker = run_processes(drain, [(path, "vivo", results)])[0]
+    assert results.get(timeout=30) == [job_id]
+    worker.join(timeout=10)
+
+    # O worker morto perdeu a reserva
+    assert not queue.heartbeat(job_id, "morto")
+    assert queue.stats() == {'done': 1}
@@ -0,0 +1,65 @@
+import time
+import asyncio
+
+from whatsapp_bot.orchestrator import Orchestrator, Session
+
+
+class FakeSession(Session):
+    """Sessão sem navegador: o login demora login_seconds"""
+
+    def __init__(self, account, login_seconds=0):
+        super().__init__(account, browser_manager=None)
+        self.login_seconds = login_seconds
+        self.launches = 0
+
+    def launch(self, restart=False):
+        self.launches += 1
+
+    def wait_for_login(self):
+        time.sleep(self.login_seconds)
+
+    def stop(self):
+        pass
+
+
+async def prepare(orchestrator):
+    orchestrator.loop = asyncio.get_running_loop()
+    orchestrator.stopping = asyncio.Event()
+    orchestrator.slots = asyncio.Semaphore(orchestrator.max_concurrency)
+
+
+def test_login_does_not_hold_a_concurrency_slot():
+    slow, other = FakeSession("lenta", login_seconds=1.5), FakeSession("outra")
+    orchestrator = Orchestrator([slow, other], max_concurrency=1, metrics_port=0)
+
+    async def scenario():
+        await prepare(orchestrator)
+        restart = asyncio.ensure_future(orchestrator._start_session(slow, restart=True))
+        await asyncio.sleep(0.2)
+        started = time.monotonic()
+        await orchestrator.call(other, lambda: None)
+        waited = time.monotonic() - started
+        assert await restart
+        return waited
+
+    assert asyncio.run(scenario()) < 0.5
+    assert slow.state == "ready"
+
+
+def test_restart_runs_in_background_once():
+    session = FakeSession("lenta", login_seconds=0.5)
+    orchestrator = Orchestrator([session], metrics_port=0)
+
+    async def scenario():
+        await prepare(orchestrator)
+        session.state = "down"
+        started = time.monotonic()
+        orchestrator._restart_in_background(session)
+        orchestrator._restart_in_background(session)
+        assert time.monotonic() - started < 0.1
+        await orchestrator.restarting[session.account]
+
+    asyncio.run(scenario())
+    assert session.launches == 1
+    assert session.restarts == 1
+    assert session.state == "ready"
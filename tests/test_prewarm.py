@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+
+from whatsapp_bot.errors import ChatUnavailableError
+from whatsapp_bot.pacing import PacingController
+from whatsapp_bot.prewarm import PrewarmedSend
+from whatsapp_bot.scheduler import daily_message_steps
+from whatsapp_bot.whatsapp import WhatsAppBot
+
+
+class FakeBot:
+    """Conversas com rascunho; envios diretos apagam o rascunho como o bot real"""
+
+    def __init__(self, unavailable=(), acks=None):
+        self.current_chat = None
+        self.drafts = {}
+        self.received = []
+        self.unavailable = set(unavailable)
+        self.acks = acks or {}
+        self.events = []
+
+    def search_group(self, name):
+        if name in self.unavailable:
+            raise ChatUnavailableError(name)
+        self.current_chat = name
+        return True
+
+    def open_chat_fast(self, name):
+        self.current_chat = name
+        return True
+
+    def clear_search(self):
+        return True
+
+    def fill_draft(self, text):
+        self.drafts[self.current_chat] = text
+        return True
+
+    def commit_draft(self, name):
+        text = self.drafts.pop(name, None) if name == self.current_chat else None
+        if text:
+            self.received.append((name, text))
+            self.events.append(("enviado", name))
+        return bool(text)
+
+    def begin_burst(self):
+        self.events.append(("rajada",))
+
+    def collect_acks(self):
+        self.events.append(("acks",))
+        return {name: self.acks.get(name, True) for _kind, name in
+                (event for event in self.events if event[0] == "enviado")}
+
+    def send_message_data(self, message_data):
+        self.drafts.pop(self.current_chat, None)
+        self.received.append((self.current_chat, message_data['text']))
+        self.events.append(("enviado", self.current_chat))
+        return True
+
+    def get_message_for_today(self, messages_dir):
+        return {'text': 'bom dia'}
+
+
+def test_prepare_interleaved_with_other_jobs():
+    bot = FakeBot()
+    sent = []
+    sender = PrewarmedSend(bot, ["A", "B", "C"], {'text': 'bom dia'},
+                           datetime.now() - timedelta(seconds=1), on_sent=sent.append)
+
+    steps = sender.prepare_steps()
+    assert next(steps) and next(steps)
+    # Outro job envia em "A" entre os passos e apaga o rascunho
+    bot.search_group("A")
+    bot.send_message_data({'text': 'urgente'})
+    sender.interrupted = True
+    assert list(steps) == [True]
+
+    sender.commit()
+    assert sorted(sent) == ["A", "B", "C"]
+    assert sorted(bot.received) == [("A", "bom dia"), ("A", "urgente"), ("B", "bom dia"), ("C", "bom dia")]
+
+
+def test_daily_retry_sends_only_to_failed_targets():
+    bot = FakeBot(unavailable={"B"})
+    sent = []
+    done = []
+    steps = daily_message_steps(bot, ["A", "B"], None, on_sent=sent.append,
+                                on_success=lambda: done.append(True))
+    assert list(steps) == [True, False]
+    assert sent == ["A"] and not done
+
+    bot.unavailable.clear()
+    remaining = [target for target in ["A", "B"] if target not in sent]
+    assert list(daily_message_steps(bot, remaining, None, on_sent=sent.append,
+                                    on_success=lambda: done.append(True))) == [True]
+    assert bot.received == [("A", "bom dia"), ("B", "bom dia")]
+    assert done == [True]
+
+
+def test_commit_sends_to_all_before_collecting_acks():
+    bot = FakeBot(acks={"B": False, "C": None})
+    sender = PrewarmedSend(bot, ["A", "B", "C"], {'text': 'bom dia'}, datetime.now() - timedelta(seconds=1))
+    sender.prepare()
+    results = {r['target']: r for r in sender.commit()}
+
+    kinds = [event[0] for event in bot.events]
+    assert kinds == ["rajada", "enviado", "enviado", "enviado", "acks"]
+    assert results["A"]['ok'] and not results["B"]['ok']
+    # Sem ack: pode ter sido entregue, não é repetida
+    assert results["C"]['ok'] and results["C"]['error'] == "enviada sem confirmação"
+
+
+class BlockingPacer(PacingController):
+    """Falha o teste se algum envio esperar a vez"""
+
+    def acquire(self):
+        raise AssertionError("envio da rajada passou pelo controlador de ritmo")
+
+
+class NoDriver:
+    def execute_script(self, script, *args):
+        return None
+
+
+def test_burst_skips_pacer_and_ack_wait():
+    bot = WhatsAppBot(NoDriver(), pacer=BlockingPacer("teste"))
+    bot.current_chat = "A"
+    bot.begin_burst()
+    bot._pace()
+    assert bot._settle(4, 'anterior')
+    assert bot.burst == {"A": 'anterior'}
+
+
+def test_draft_is_only_sent_in_its_own_chat():
+    bot = WhatsAppBot(NoDriver())
+    bot.current_chat = "A"
+    assert not bot.commit_draft("B")
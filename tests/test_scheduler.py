@@ -0,0 +1,55 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from whatsapp_bot.scheduler import JobScheduler, JobSpool, RetryBackoff, local_deadline
+
+
+def test_tz_aware_deadline_becomes_local_naive():
+    utc = datetime.now(timezone.utc).replace(microsecond=0)
+    deadline = local_deadline(utc.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    assert deadline.tzinfo is None
+    assert abs((deadline - datetime.now()).total_seconds()) < 5
+
+
+def test_mixed_deadlines_do_not_crash_scheduler():
+    scheduler = JobScheduler()
+    aware = datetime.now(timezone.utc) - timedelta(minutes=1)
+    scheduler.submit("com fuso", iter([True]), "urgent", aware)
+    scheduler.submit("sem fuso", iter([True]), "urgent", datetime.now() + timedelta(hours=1))
+    scheduler.run_until_idle()
+    assert scheduler.slo.report()["urgent"]["deadline_misses"] == 1
+
+
+def test_spool_skips_temp_and_half_written_files(tmp_path):
+    spool = JobSpool(tmp_path)
+    (tmp_path / ".novo.json.tmp").write_text('{"chat": "A"', encoding='utf-8')
+    (tmp_path / "gravando.json").write_text('{"chat": "A", "te', encoding='utf-8')
+    JobSpool.write(tmp_path, "pronto", {"chat": "A", "text": "oi", "deadline": "2026-10-18T09:00:00+00:00"})
+
+    scheduler = JobScheduler()
+    assert spool.poll(scheduler, bot=None) == 1
+    assert (tmp_path / "gravando.json").exists()
+    assert (tmp_path / "accepted" / "pronto.json").exists()
+
+    # Passado o prazo de gravação, o arquivo quebrado é descartado
+    old = time.time() - JobSpool.WRITE_GRACE_SECONDS - 1
+    os.utime(tmp_path / "gravando.json", (old, old))
+    assert spool.poll(scheduler, bot=None) == 0
+    assert (tmp_path / "gravando.invalid").exists()
+    assert (tmp_path / ".novo.json.tmp").exists()
+
+
+def test_retry_backoff():
+    retry = RetryBackoff("teste", base_delay=60, max_attempts=3)
+    assert retry.ready()
+    retry.failed()
+    assert not retry.ready()
+    retry.next_at = 0
+    assert retry.ready()
+    retry.failed()
+    retry.failed()
+    retry.next_at = 0
+    assert retry.exhausted and not retry.ready()
+    retry.reset()
+    assert retry.ready()
@@ -0,0 +1,59 @@
+"""
+Replay dos seletores contra snapshots (precisa de um navegador headless,
+ver o fixture driver em conftest.py)
+"""
+
+from pathlib import Path
+
+import pytest
+
+from whatsapp_bot import xpaths
+from whatsapp_bot.config import SNAPSHOTS_DIR
+from whatsapp_bot.snapshots import ReplayHarness, SANITIZE_SCRIPT
+
+FIXTURES = Path(__file__).parent / "snapshots"
+
+
+def failures(report):
+    return [f"{r['snapshot']} {r['check']}" for r in report['results'] if not r['ok']]
+
+
+def test_fixture_snapshots(driver):
+    report = ReplayHarness(FIXTURES, runs=2).run(driver)
+    assert report['ok'], failures(report)
+
+    checked = {result['check'] for result in report['results']}
+    assert xpaths.CLICKED_CHECKS <= checked
+
+
+def test_hidden_element_is_not_clickable(driver, tmp_path):
+    html = (FIXTURES / "media_preview_20261018-090000.html").read_text(encoding='utf-8')
+    html = html.replace("</style>", '[aria-label="Enviar"] { display: none; }\n</style>')
+    (tmp_path / "media_preview_20261018-090000.html").write_text(html, encoding='utf-8')
+
+    report = ReplayHarness(tmp_path, runs=2).run(driver)
+    assert failures(report) == ["media_preview_20261018-090000.html send_button"]
+
+
+def test_sanitized_snapshot_keeps_styles(driver, tmp_path):
+    (tmp_path / "style.css").write_text("#oculto { display: none; }", encoding='utf-8')
+    (tmp_path / "pagina.html").write_text(
+        '<!DOCTYPE html><html><head><link rel="stylesheet" href="style.css">'
+        '<style>#visivel { width: 30px; height: 30px; }</style></head><body>'
+        '<div id="visivel" role="button"></div><div id="oculto" role="button">enviar</div>'
+        '</body></html>', encoding='utf-8')
+    driver.get((tmp_path / "pagina.html").as_uri())
+
+    snapshot = tmp_path / "snapshot" / "media_preview_20261018-090000.html"
+    snapshot.parent.mkdir()
+    snapshot.write_text(driver.execute_script(SANITIZE_SCRIPT, "media_preview"), encoding='utf-8')
+    driver.get(snapshot.as_uri())
+
+    assert driver.find_element("id", "visivel").is_displayed()
+    assert not driver.find_element("id", "oculto").is_displayed()
+
+
+@pytest.mark.skipif(not any(SNAPSHOTS_DIR.glob("*.html")), reason="nenhum snapshot gravado em snapshots/")
+def test_recorded_snapshots(driver):
+    report = ReplayHarness(SNAPSHOTS_DIR, runs=2).run(driver)
+    assert report['ok'], failures(report)
@@ -0,0 +1,74 @@
+import json
+import random
+
+from whatsapp_bot.errors import ComposerBlockedError
+from whatsapp_bot.soak import LAST_SENT_SCRIPT, SoakTest
+
+
+class FakeDriver:
+    def __init__(self):
+        self.last_sent = None
+
+    def execute_script(self, script, *args):
+        assert script == LAST_SENT_SCRIPT
+        return self.last_sent
+
+
+class LaggingBot:
+    """Bot com o bug do painel atrasado: envia na conversa aberta antes"""
+
+    def __init__(self):
+        self.driver = FakeDriver()
+        self.previous = "Grupo 1"
+        self.target = None
+        self.sends = 0
+
+    def search_group(self, name):
+        if name == "Grupo Admins":
+            # Painel anterior ainda na tela: a caixa dele é usada
+            self.target = self.previous
+            return True
+        self.target = name
+        return True
+
+    def send_text_message(self, text):
+        self.sends += 1
+        self.driver.last_sent = {'id': self.sends, 'chat': self.target, 'text': text}
+        self.previous = self.target
+        return True
+
+
+def test_send_to_wrong_chat_is_counted_as_failure(tmp_path):
+    test = SoakTest(sends=2, failure_rate=0.05, report_dir=tmp_path)
+    bot = LaggingBot()
+    picks = iter([("Grupo 2", False), ("Grupo Admins", True)])
+    test._pick_target = lambda: next(picks)
+
+    with open(test.sends_path, 'a', encoding='utf-8') as test.sends_file:
+        test._send(bot, 1)
+        test._send(bot, 2)
+
+    report = test.report()
+    assert report['summary']['sent'] == 1
+    assert report['summary']['wrong_chat'] == 1
+    assert report['flags'] == ["1 mensagem(ns) na conversa errada"]
+
+    sends = [json.loads(line) for line in open(test.sends_path, encoding='utf-8')]
+    assert [s['delivered_to'] for s in sends] == ["Grupo 2", "Grupo 2"]
+
+
+def test_results_are_streamed_not_kept(tmp_path):
+    test = SoakTest(sends=300, report_dir=tmp_path)
+    random.seed(1)
+    with open(test.sends_path, 'a', encoding='utf-8') as test.sends_file:
+        for number in range(1, 301):
+            target, injected = test._pick_target()
+            test._record({'number': number, 'target': target, 'delivered_to': None,
+                          'wrong_chat': False, 'ok': not injected, 'latency_s': 0.5,
+                          'error': ComposerBlockedError.reason if injected else None,
+                          'injected': injected})
+
+    assert not hasattr(test, "results")
+    assert test.count == 300 and len(test.latencies) == test.normal
+    assert sum(1 for _ in open(test.sends_path, encoding='utf-8')) == 300
+    assert test.report()['ok']
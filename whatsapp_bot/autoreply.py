@@ -0,0 +1,499 @@
+"""
+Módulo de respostas automáticas baseadas em regras
+"""
+
+import re
+import json
+import time
+import logging
+from collections import deque
+from pathlib import Path
+
+from .errors import ChatUnavailableError, UnconfirmedSendError
+
+logger = logging.getLogger(__name__)
+
+
+def _trie_pattern(words):
+    """
+    Monta um padrão regex em forma de árvore (trie) para uma lista de palavras
+
+    Prefixos comuns são fatorados ("pedido|pedir|prazo" vira
+    "p(?:edi(?:do|r)|razo)"), então o motor de regex percorre o texto como
+    um autômato em vez de testar cada palavra separadamente.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        end = "" in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        pattern = "(?:" + "|".join(branches) + ")"
+        # Ramos mais longos primeiro; o fim da palavra vira opcional
+        return pattern + "?" if end else pattern
+
+    return build(trie)
+
+
+# Palavra do texto (palavras-chave simples são comparadas por conjunto)
+_WORD = re.compile(r"\w+")
+
+# Regex com referência a grupos não podem perder os grupos de captura
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+def _uncaptured(pattern):
+    """Converte os grupos de captura de uma regex em grupos sem captura"""
+    result = []
+    i = 0
+    in_class = False
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            result.append(pattern[i:i + 2])
+            i += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            # "]" logo no início da classe é literal
+            if pattern[i + 1:i + 2] == "^":
+                result.append("[^")
+                i += 2
+            else:
+                result.append("[")
+                i += 1
+            if pattern[i:i + 1] == "]":
+                result.append("]")
+                i += 1
+            continue
+        elif char == "(":
+            if pattern.startswith("(?P<", i):
+                i = pattern.index(">", i) + 1
+                result.append("(?:")
+                continue
+            if not pattern.startswith("(?", i):
+                result.append("(?:")
+                i += 1
+                continue
+        result.append(char)
+        i += 1
+    return "".join(result)
+
+
+def _required_literal(pattern):
+    """
+    Extrai o maior trecho literal que toda ocorrência da regex precisa conter
+
+    Usado como gatilho: a regex só é testada se o trecho aparecer no texto.
+    Análise conservadora - grupos, classes e alternativas interrompem o
+    trecho; padrões com "|" fora de grupos não têm literal obrigatório.
+
+    Returns:
+        str: Literal em minúsculas ou None
+    """
+    if "(?x" in pattern:
+        return None
+
+    best = ""
+    run = ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        token = None
+
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                token = escaped
+            i += 2
+        elif char == "[":
+            # Pular classe de caracteres inteira
+            i += 1
+            if pattern[i:i + 1] == "^":
+                i += 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif char == "(":
+            depth += 1
+            i += 1
+        elif char == ")":
+            depth -= 1
+            i += 1
+        elif char == "|":
+            if depth == 0:
+                return None
+            i += 1
+        elif char in ".^$":
+            i += 1
+        elif char in "*?+{":
+            # Quantificador: o último caractere pode não aparecer (exceto com "+")
+            if char != "+" and not pattern.startswith("{1", i):
+                run = run[:-1]
+            if char == "{":
+                end = pattern.find("}", i)
+                i = end + 1 if end != -1 else i + 1
+            else:
+                i += 1
+            if pattern[i:i + 1] in ("?", "+"):
+                i += 1
+            best = max(best, run, key=len)
+            run = ""
+            continue
+        else:
+            token = char
+            i += 1
+
+        if token is not None and depth == 0:
+            run += token
+        else:
+            best = max(best, run, key=len)
+            run = ""
+
+    best = max(best, run, key=len)
+    return best.lower() if len(best) >= 2 else None
+
+
+class RuleSet:
+    """Conjunto de regras compilado em um único matcher"""
+
+    def __init__(self, rules):
+        """
+        Compila as regras
+
+        Args:
+            rules: Lista de dicionários com 'keywords' e/ou 'regex', 'reply',
+                   'chats' (opcional) e 'cooldown' (opcional, segundos)
+        """
+        self.rules = []
+        keyword_rules = {}
+        trigger_rules = {}
+        regex_parts = []
+
+        for index, rule in enumerate(rules):
+            if not rule.get('reply'):
+                logger.warning(f"Regra {rule.get('id', index)} sem 'reply', ignorada")
+                continue
+
+            position = len(self.rules)
+            chats = rule.get('chats')
+            self.rules.append({
+                'id': rule.get('id', str(index)),
+                'reply': rule['reply'],
+                'chats': set(chats) if chats else None,
+                'cooldown': rule.get('cooldown', 0),
+                'regex': None,
+            })
+
+            for keyword in rule.get('keywords', []):
+                keyword = keyword.casefold().strip()
+                if keyword:
+                    keyword_rules.setdefault(keyword, set()).add(position)
+
+            if rule.get('regex'):
+                try:
+                    compiled = re.compile(rule['regex'], re.IGNORECASE)
+                except re.error as e:
+                    logger.error(f"Regex inválida na regra {self.rules[-1]['id']}: {e}")
+                    continue
+                self.rules[-1]['regex'] = compiled
+
+                trigger = _required_literal(rule['regex'])
+                if trigger:
+                    trigger_rules.setdefault(trigger, set()).add(position)
+                else:
+                    regex_parts.append(position)
+
+        # Palavras simples: interseção de conjuntos com as palavras do texto.
+        # Frases ("bom dia") ficam indexadas pela primeira palavra e só são
+        # testadas quando essa palavra aparece na mensagem.
+        self.word_rules = {}
+        self.phrases = {}
+        for keyword, positions in keyword_rules.items():
+            if _WORD.fullmatch(keyword):
+                self.word_rules[keyword] = positions
+                continue
+            first = _WORD.search(keyword)
+            phrase = re.compile(r"(?<!\w)" + re.escape(keyword) + r"(?!\w)")
+            self.phrases.setdefault(first.group(0) if first else None, []).append((phrase, positions))
+        self.word_set = frozenset(self.word_rules)
+        self.phrase_set = frozenset(self.phrases)
+
+        # Regex com literal obrigatório só são testadas quando o literal aparece
+        self.trigger_rules = self._expand_prefixes(trigger_rules)
+        self.trigger_matcher = None
+        if trigger_rules:
+            self.trigger_matcher = re.compile("(?=(" + _trie_pattern(trigger_rules) + "))")
+
+        # As demais viram uma única regex com um grupo nomeado por regra
+        # (r<posição>); o grupo que casou diz qual regra casou. Os grupos de
+        # captura internos deixariam a busca muito mais lenta, então viram
+        # grupos sem captura.
+        self.regex_positions = []
+        self.separate_positions = []
+        for position in regex_parts:
+            if _BACKREFERENCE.search(self.rules[position]['regex'].pattern):
+                self.separate_positions.append(position)
+            else:
+                self.regex_positions.append(position)
+
+        # Regras sem filtro de conversa entram sempre; as outras só na regex
+        # combinada das conversas delas (uma regex por combinação, em cache)
+        self.open_regex_positions = tuple(p for p in self.regex_positions if self.rules[p]['chats'] is None)
+        self.filtered_regex_positions = [(p, self.rules[p]['chats']) for p in self.regex_positions
+                                         if self.rules[p]['chats'] is not None]
+        self.regex_matchers = {}
+        if self.regex_positions and self._regex_matcher(tuple(self.regex_positions)) is None:
+            logger.warning("Regex combinada inválida, testando regras separadamente")
+            self.separate_positions += self.regex_positions
+            self.regex_positions = []
+            self.open_regex_positions = ()
+            self.filtered_regex_positions = []
+
+        logger.info(
+            f"{len(self.rules)} regra(s) compilada(s) "
+            f"({len(keyword_rules)} palavras-chave, {len(trigger_rules)} gatilhos, "
+            f"{len(regex_parts)} regex combinadas)"
+        )
+
+    @staticmethod
+    def _expand_prefixes(word_rules):
+        """
+        Inclui em cada gatilho as regras dos gatilhos que são prefixo dele
+
+        O trie devolve só o trecho mais longo em cada posição ("pedido"),
+        então as regras de "ped" precisam vir junto.
+        """
+        expanded = {}
+        for word, positions in word_rules.items():
+            merged = set(positions)
+            for size in range(1, len(word)):
+                merged |= word_rules.get(word[:size], set())
+            expanded[word] = merged
+        return expanded
+
+    def _regex_matcher(self, positions):
+        """
+        Regex combinada das regras informadas, na ordem do arquivo
+
+        Returns:
+            re.Pattern: Regex compilada (em cache), ou None se inválida
+        """
+        if positions not in self.regex_matchers:
+            combined = "|".join(
+                f"(?P<r{position}>{_uncaptured(self.rules[position]['regex'].pattern)})"
+                for position in positions
+            )
+            try:
+                self.regex_matchers[positions] = re.compile(combined, re.IGNORECASE)
+            except re.error:
+                self.regex_matchers[positions] = None
+        return self.regex_matchers[positions]
+
+    def _combined_matches(self, text, chat):
+        """
+        Regras da regex combinada que casam com o texto
+
+        Em cada posição a alternância devolve a primeira regra do arquivo que
+        casa ali, então buscar a partir de cada casamento + 1 (e não do fim
+        dele, como finditer) encontra a regra de maior prioridade mesmo
+        quando os casamentos se sobrepõem.
+
+        Returns:
+            set: Posições das regras que casam
+        """
+        positions = self.open_regex_positions
+        allowed = [p for p, chats in self.filtered_regex_positions if chat in chats]
+        if allowed:
+            positions = tuple(sorted(positions + tuple(allowed)))
+        if not positions:
+            return set()
+
+        matcher = self._regex_matcher(positions)
+        found_rules = set()
+        found = matcher.search(text)
+        while found:
+            found_rules.add(int(found.lastgroup[1:]))
+            if found.start() >= len(text):
+                break
+            found = matcher.search(text, found.start() + 1)
+        return found_rules
+
+    def match(self, text, chat=None):
+        """
+        Retorna a regra de maior prioridade (primeira do arquivo) que casa
+
+        Args:
+            text: Texto da mensagem
+            chat: Nome da conversa (para regras com filtro 'chats')
+
+        Returns:
+            tuple: (regra, match da regex ou None) ou None
+        """
+        if not text:
+            return None
+
+        # Palavras-chave acionam a regra diretamente
+        matched = set()
+        folded = text.casefold()
+        words = _WORD.findall(folded)
+        for word in self.word_set.intersection(words):
+            matched |= self.word_rules[word]
+        if self.phrases:
+            for first in self.phrase_set.intersection(words + [None]):
+                for phrase, positions in self.phrases[first]:
+                    if phrase.search(folded):
+                        matched |= positions
+
+        # Regras da regex combinada já estão confirmadas (e filtradas pela
+        # conversa); gatilhos só indicam que a regex pode casar
+        matched |= self._combined_matches(text, chat)
+        pending = set(self.separate_positions)
+        if self.trigger_matcher:
+            for found in self.trigger_matcher.finditer(text.lower()):
+                pending |= self.trigger_rules[found.group(1)]
+
+        for position in sorted(matched | pending):
+            rule = self.rules[position]
+            if rule['chats'] is not None and chat not in rule['chats']:
+                continue
+            regex_match = rule['regex'].search(text) if rule['regex'] else None
+            if position not in matched and not regex_match:
+                continue
+            return rule, regex_match
+
+        return None
+
+
+class AutoReplyEngine:
+    """Responde mensagens recebidas de acordo com um arquivo de regras"""
+
+    def __init__(self, bot, rules_path, max_replies_per_chat=3, rate_window=60):
+        """
+        Inicializa o motor de respostas automáticas
+
+        Args:
+            bot: Instância do WhatsAppBot já logada
+            rules_path: Arquivo JSON com as regras
+            max_replies_per_chat: Máximo de respostas por conversa na janela
+            rate_window: Tamanho da janela do limite em segundos
+        """
+        self.bot = bot
+        self.rules_path = Path(rules_path)
+        self.max_replies_per_chat = max_replies_per_chat
+        self.rate_window = rate_window
+        self.ruleset = RuleSet([])
+        self.rules_mtime = None
+        self.last_fired = {}
+        self.replies = {}
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        """Recompila as regras apenas quando o arquivo foi alterado"""
+        try:
+            mtime = self.rules_path.stat().st_mtime
+        except OSError as e:
+            logger.error(f"Arquivo de regras não encontrado: {e}")
+            return False
+
+        if mtime == self.rules_mtime:
+            return False
+
+        try:
+            with open(self.rules_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"Erro ao ler regras: {e}")
+            return False
+
+        self.ruleset = RuleSet(data.get('rules', []))
+        limit = data.get('chat_rate_limit', {})
+        self.max_replies_per_chat = limit.get('max', self.max_replies_per_chat)
+        self.rate_window = limit.get('per_seconds', self.rate_window)
+        self.rules_mtime = mtime
+        logger.info(f"Regras carregadas de {self.rules_path.name}")
+        return True
+
+    def _allowed(self, rule, chat, now):
+        """Verifica cooldown da regra e limite de respostas da conversa"""
+        last = self.last_fired.get((rule['id'], chat))
+        if last is not None and now - last < rule['cooldown']:
+            return False
+
+        history = self.replies.setdefault(chat, deque())
+        while history and now - history[0] >= self.rate_window:
+            history.popleft()
+        return len(history) < self.max_replies_per_chat
+
+    def render_reply(self, rule, message, regex_match):
+        """Monta o texto da resposta ({chat}, {sender}, {text}, {0}, {1}...)"""
+        groups = ()
+        if regex_match:
+            groups = (regex_match.group(0),) + tuple(g or "" for g in regex_match.groups())
+        try:
+            return rule['reply'].format(
+                *groups,
+                chat=message.get('chat') or "",
+                sender=message.get('sender') or "",
+                text=message.get('text') or "",
+            )
+        except (IndexError, KeyError):
+            return rule['reply']
+
+    def handle(self, messages):
+        """
+        Processa um lote de mensagens recebidas (callback do IncomingMessageStream)
+
+        Args:
+            messages: Lista de mensagens recebidas
+        """
+        self.reload_if_changed()
+
+        for message in messages:
+            chat = message.get('chat')
+            if not chat:
+                continue
+
+            found = self.ruleset.match(message.get('text'), chat)
+            if not found:
+                continue
+
+            rule, regex_match = found
+            now = time.monotonic()
+            if not self._allowed(rule, chat, now):
+                logger.info(f"Resposta da regra {rule['id']} suprimida em '{chat}' (limite)")
+                continue
+
+            reply = self.render_reply(rule, message, regex_match)
+            logger.info(f"Regra {rule['id']} acionada em '{chat}'")
+
+            try:
+                sent = self.bot.search_group(chat) and self.bot.send_text_message(reply)
+            except ChatUnavailableError as e:
+                logger.warning(f"Resposta em '{chat}' ignorada: {e.reason}")
+                continue
+            except UnconfirmedSendError as e:
+                # Conta nos limites: a resposta pode ter sido entregue
+                logger.warning(f"Resposta em '{chat}' {e}")
+                sent = True
+
+            if sent:
+                self.last_fired[(rule['id'], chat)] = now
+                self.replies[chat].append(now)
+            else:
+                logger.error(f"Falha ao responder em '{chat}'")
@@ -13,13 +13,18 @@ from selenium.webdriver.edge.options import Options as EdgeOptions
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 from pathlib import Path
 
+from .config import DRIVER_CACHE_FILE
+from .drivers import DriverCache, find_browser_path
+from .profile import compact_profile
+
 logger = logging.getLogger(__name__)
 
 
 class BrowserManager:
     """Gerenciador do navegador Selenium"""
 
-    def __init__(self, browser_type="chrome", profile_path=None, minimize=True, headless=False):
+    def __init__(self, browser_type="chrome", profile_path=None, minimize=True, headless=False,
+                 startup_budget=None, auto_compact=False, cache_drivers=True):
         """
         Inicializa o gerenciador do navegador
 
@@ -28,15 +33,68 @@ class BrowserManager:
             profile_path: Caminho para o perfil do navegador
             minimize: Minimizar janela ao abrir
             headless: Executar em modo headless
+            startup_budget: Tempo máximo de inicialização esperado (segundos)
+            auto_compact: Limpar o perfil ao fechar se o tempo de inicialização
+                          ultrapassar startup_budget
+            cache_drivers: Reutilizar os caminhos do driver e do navegador
+                           (drivers.json) em vez do Selenium Manager
         """
         self.browser_type = browser_type.lower()
         self.profile_path = profile_path
         self.minimize = minimize
         self.headless = headless
+        self.startup_budget = startup_budget
+        self.auto_compact = auto_compact
+        self.startup_time = None
+        self.driver_cache = DriverCache(DRIVER_CACHE_FILE) if cache_drivers else None
+        self.driver_entry = None
+        self.discovered_paths = None
         self.driver = None
 
-    def _get_chrome_driver(self):
-        """Configura e retorna driver do Chrome"""
+    def _launch(self, driver_class, service_class, build_options):
+        """
+        Cria o driver, passando os caminhos em cache pelo Service
+
+        Se não há cache válido, ou se a inicialização com o cache falhar, o
+        Selenium Manager faz a descoberta e os caminhos encontrados são
+        guardados por start() para a próxima vez.
+
+        Args:
+            driver_class: webdriver.Chrome, webdriver.Edge ou webdriver.Firefox
+            service_class: Service correspondente
+            build_options: Função que monta as Options do navegador
+
+        Returns:
+            WebDriver
+        """
+        self.driver_entry = None
+        self.discovered_paths = None
+
+        entry = self.driver_cache.lookup(self.browser_type) if self.driver_cache else None
+        if entry:
+            options = build_options()
+            options.binary_location = entry['browser_path']
+            try:
+                driver = driver_class(
+                    service=service_class(executable_path=entry['driver_path']),
+                    options=options
+                )
+                self.driver_entry = entry
+                return driver
+            except Exception as e:
+                logger.warning(f"Falha ao iniciar com os caminhos em cache ({e}), refazendo a descoberta")
+                self.driver_cache.invalidate(self.browser_type)
+
+        options = build_options()
+        driver = driver_class(service=service_class(), options=options)
+        self.discovered_paths = (
+            getattr(driver.service, "path", None),
+            find_browser_path(self.browser_type, options)
+        )
+        return driver
+
+    def _chrome_options(self):
+        """Monta as opções do Chrome"""
         options = ChromeOptions()
 
         # Perfil de usuário dedicado
@@ -66,15 +124,18 @@ class BrowserManager:
         if self.minimize and not self.headless:
             options.add_argument("--window-position=-2400,-2400")
 
+        return options
+
+    def _get_chrome_driver(self):
+        """Configura e retorna driver do Chrome"""
         try:
-            driver = webdriver.Chrome(options=options)
-            return driver
+            return self._launch(webdriver.Chrome, ChromeService, self._chrome_options)
         except Exception as e:
             logger.error(f"Erro ao iniciar Chrome: {e}")
             raise
 
-    def _get_edge_driver(self):
-        """Configura e retorna driver do Edge"""
+    def _edge_options(self):
+        """Monta as opções do Edge"""
         options = EdgeOptions()
 
         # Perfil de usuário dedicado
@@ -104,15 +165,18 @@ class BrowserManager:
         if self.minimize and not self.headless:
             options.add_argument("--window-position=-2400,-2400")
 
+        return options
+
+    def _get_edge_driver(self):
+        """Configura e retorna driver do Edge"""
         try:
-            driver = webdriver.Edge(options=options)
-            return driver
+            return self._launch(webdriver.Edge, EdgeService, self._edge_options)
         except Exception as e:
             logger.error(f"Erro ao iniciar Edge: {e}")
             raise
 
-    def _get_firefox_driver(self):
-        """Configura e retorna driver do Firefox"""
+    def _firefox_options(self):
+        """Monta as opções do Firefox"""
         options = FirefoxOptions()
 
         # Perfil de usuário dedicado
@@ -128,8 +192,12 @@ class BrowserManager:
         if self.headless:
             options.add_argument("--headless")
 
+        return options
+
+    def _get_firefox_driver(self):
+        """Configura e retorna driver do Firefox"""
         try:
-            driver = webdriver.Firefox(options=options)
+            driver = self._launch(webdriver.Firefox, FirefoxService, self._firefox_options)
 
             # Minimizar janela (Firefox não suporta window-position negativo)
             if self.minimize and not self.headless:
@@ -143,6 +211,7 @@ class BrowserManager:
     def start(self):
         """Inicia o navegador"""
         logger.info(f"Iniciando navegador {self.browser_type}...")
+        started = time.perf_counter()
 
         try:
             if self.browser_type == "chrome":
@@ -154,7 +223,29 @@ class BrowserManager:
             else:
                 raise ValueError(f"Navegador não suportado: {self.browser_type}")
 
-            logger.info("Navegador iniciado com sucesso")
+            self.startup_time = time.perf_counter() - started
+            if self.driver_entry:
+                logger.info(
+                    f"Navegador iniciado com sucesso em {self.startup_time:.1f}s "
+                    f"(caminhos em cache; com descoberta: "
+                    f"{self.driver_entry.get('discovery_startup_seconds')}s)"
+                )
+            else:
+                logger.info(
+                    f"Navegador iniciado com sucesso em {self.startup_time:.1f}s "
+                    f"(descoberta pelo Selenium Manager)"
+                )
+                if self.driver_cache and self.discovered_paths:
+                    driver_path, browser_path = self.discovered_paths
+                    self.driver_cache.record(self.browser_type, driver_path, browser_path,
+                                             self.driver.capabilities, self.startup_time)
+
+            if self.startup_budget and self.startup_time > self.startup_budget:
+                logger.warning(
+                    f"Inicialização levou {self.startup_time:.1f}s "
+                    f"(limite: {self.startup_budget}s)"
+                )
+
             return self.driver
 
         except Exception as e:
@@ -169,6 +260,36 @@ class BrowserManager:
                 logger.info("Navegador fechado")
             except Exception as e:
                 logger.error(f"Erro ao fechar navegador: {e}")
+            self.driver = None
+
+            if self.auto_compact and self.over_budget():
+                self.compact_profile()
+
+    def over_budget(self):
+        """Verifica se a última inicialização ultrapassou o limite configurado"""
+        return bool(
+            self.startup_budget
+            and self.startup_time
+            and self.startup_time > self.startup_budget
+        )
+
+    def compact_profile(self):
+        """
+        Limpa caches do perfil (navegador precisa estar fechado)
+
+        Returns:
+            dict: Estatísticas da manutenção ou None se não foi executada
+        """
+        if self.driver:
+            logger.error("Feche o navegador antes de limpar o perfil")
+            return None
+        if not self.profile_path:
+            return None
+
+        logger.info("Executando manutenção do perfil...")
+        # Dar tempo para os processos do navegador liberarem o perfil
+        time.sleep(2)
+        return compact_profile(self.profile_path, self.browser_type)
 
     def minimize_window(self):
         """Minimiza a janela do navegador"""
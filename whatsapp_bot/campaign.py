@@ -0,0 +1,276 @@
+"""
+Módulo para campanhas de envio em massa a partir de CSV
+"""
+
+import os
+import csv
+import json
+import time
+import logging
+from pathlib import Path
+
+from .errors import ChatUnavailableError, UnconfirmedSendError
+
+logger = logging.getLogger(__name__)
+
+
+class _SafeDict(dict):
+    """Dicionário que mantém placeholders desconhecidos no texto"""
+
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def render_template(template, row):
+    """
+    Substitui os placeholders {coluna} do template pelos valores da linha
+
+    Args:
+        template: Texto do template
+        row: Dicionário com os valores da linha do CSV
+
+    Returns:
+        str: Mensagem personalizada
+    """
+    values = _SafeDict({k.strip(): (v or "").strip() for k, v in row.items() if k})
+    return template.format_map(values)
+
+
+class CampaignRunner:
+    """Executa uma campanha lendo o CSV linha a linha com checkpoint"""
+
+    def __init__(self, bot, csv_path, template, phone_column="telefone", checkpoint_path=None):
+        """
+        Inicializa a campanha
+
+        Args:
+            bot: Instância do WhatsAppBot já com o WhatsApp aberto
+            csv_path: Caminho para o CSV de contatos
+            template: Texto do template com placeholders {coluna}
+            phone_column: Nome da coluna com o telefone
+            checkpoint_path: Arquivo de progresso (padrão: <csv>.checkpoint.json)
+
+        Contatos sem WhatsApp ou bloqueados são pulados e listados em
+        <csv>.skipped.csv com o motivo.
+        """
+        self.bot = bot
+        self.csv_path = Path(csv_path)
+        self.template = template
+        self.phone_column = phone_column
+        self.checkpoint_path = Path(checkpoint_path or f"{self.csv_path}.checkpoint.json")
+        self.skipped_path = Path(f"{self.csv_path}.skipped.csv")
+        self.state = self.load_checkpoint()
+
+    def load_checkpoint(self):
+        """
+        Carrega o progresso salvo de uma execução anterior
+
+        'offset' é a posição no CSV depois da última linha processada,
+        'in_flight' a linha cujo envio começou e não foi confirmado no
+        checkpoint (a execução parou no meio do envio) e 'failed' as linhas
+        com falha de envio, tentadas de novo na próxima execução.
+        """
+        state = {'rows_done': 0, 'offset': None, 'in_flight': None, 'sent': 0, 'errors': 0, 'skipped': 0,
+                 'failed': []}
+        if self.checkpoint_path.exists():
+            try:
+                with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                    state.update(json.load(f))
+                logger.info(f"Retomando campanha na linha {state['rows_done'] + 1}")
+            except Exception as e:
+                logger.error(f"Erro ao carregar checkpoint: {e}")
+        return state
+
+    def save_checkpoint(self):
+        """Grava o progresso de forma atômica"""
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def record_skipped(self, line, phone, reason):
+        """Acrescenta o contato pulado ao relatório"""
+        is_new = not self.skipped_path.exists()
+        with open(self.skipped_path, 'a', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(['linha', self.phone_column, 'motivo'])
+            writer.writerow([line, phone, reason])
+
+    def recover_in_flight(self):
+        """
+        Trata a linha que estava sendo enviada quando a execução parou
+
+        A mensagem pode ter sido entregue, então a linha não é reenviada: ela
+        vai para o relatório de pulados para conferência manual.
+        """
+        in_flight = self.state.get('in_flight')
+        if not in_flight:
+            return
+        logger.warning(f"Linha {in_flight['line']} estava em envio quando a execução parou, não será reenviada")
+        self.record_skipped(in_flight['line'], in_flight['phone'], "envio interrompido, conferir se foi entregue")
+        self.state['skipped'] += 1
+        self.state['in_flight'] = None
+        self.save_checkpoint()
+
+    def rows(self):
+        """
+        Lê o CSV sob demanda a partir da posição salva no checkpoint
+
+        O arquivo é lido com readline para que tell() informe a posição
+        depois de cada linha (o csv lê só o necessário para cada registro).
+
+        Yields:
+            tuple: (número da linha, dicionário da linha, posição depois dela)
+        """
+        with open(self.csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(iter(f.readline, ''))
+            header = [name.strip() for name in next(reader, [])]
+            index = 0
+
+            if self.state.get('offset'):
+                f.seek(self.state['offset'])
+                index = self.state['rows_done']
+            else:
+                # Checkpoint sem posição (versão anterior): pular pela contagem
+                while index < self.state['rows_done'] and next(reader, None) is not None:
+                    index += 1
+
+            for values in reader:
+                if not values:
+                    continue
+                yield index, dict(zip(header, values)), f.tell()
+                index += 1
+
+    def send_row(self, row):
+        """
+        Envia a mensagem personalizada para um contato
+
+        Returns:
+            bool: True se a mensagem foi enviada
+        """
+        phone = (row.get(self.phone_column) or "").strip()
+        if not phone:
+            logger.error(f"Linha sem valor na coluna '{self.phone_column}'")
+            return False
+
+        if not self.bot.open_chat_by_phone(phone):
+            return False
+
+        return self.bot.send_text_message(render_template(self.template, row))
+
+    def run(self):
+        """
+        Executa a campanha até o fim do CSV
+
+        Returns:
+            dict: Estatísticas finais ('rows_done', 'sent', 'errors', 'skipped')
+        """
+        for _success in self.iter_run():
+            pass
+        return dict(self.state)
+
+    def pending_lines(self):
+        """
+        Linhas a enviar: primeiro as que falharam antes, depois o resto do CSV
+
+        Yields:
+            tuple: (número da linha, dicionário da linha, item de 'failed'
+                sendo tentado de novo ou None, posição no CSV depois da linha)
+        """
+        retries = list(self.state['failed'])
+        if retries:
+            logger.info(f"Tentando de novo {len(retries)} linha(s) com falha")
+        for failed in retries:
+            yield failed['line'], failed['row'], failed, None
+
+        for index, row, offset in self.rows():
+            yield index + 1, row, None, {'rows_done': index + 1, 'offset': offset}
+
+    def process_line(self, line, row):
+        """
+        Envia uma linha e registra o resultado no checkpoint
+
+        O checkpoint em 'in_flight' já deve ter sido gravado pelo chamador.
+
+        Returns:
+            bool: True se a mensagem foi enviada
+        """
+        phone = row.get(self.phone_column, '')
+        skipped = None
+        try:
+            success = self.send_row(row)
+        except ChatUnavailableError as e:
+            skipped, success = e, False
+        except UnconfirmedSendError as e:
+            # Pode ter sido entregue: vai para o relatório para conferência,
+            # não para 'failed' (a retomada reenviaria)
+            skipped, success = e, False
+        except Exception as e:
+            logger.error(f"Erro na linha {line}: {e}")
+            success = False
+
+        if success:
+            self.state['sent'] += 1
+        elif skipped:
+            self.state['skipped'] += 1
+            self.record_skipped(line, phone, skipped.reason)
+            logger.warning(f"Linha {line} pulada: {skipped}")
+        else:
+            self.state['errors'] += 1
+            self.state['failed'].append({'line': line, 'row': row})
+            logger.error(f"Falha no envio da linha {line}")
+
+        self.state['in_flight'] = None
+        self.save_checkpoint()
+        return success
+
+    def iter_run(self):
+        """
+        Executa a campanha uma linha por vez
+
+        Cada linha abre a própria conversa, então a execução pode ser pausada
+        entre duas linhas (ex: por um job urgente) e retomada depois. As
+        linhas que falharam na execução anterior são tentadas de novo antes
+        de continuar o CSV.
+
+        Yields:
+            bool: Resultado do envio de cada linha
+        """
+        started = time.monotonic()
+        sent_this_run = 0
+        self.recover_in_flight()
+
+        for line, row, retry, position in self.pending_lines():
+            phone = row.get(self.phone_column, '')
+            if retry:
+                # Volta para 'failed' se falhar de novo
+                self.state['failed'].remove(retry)
+                self.state['errors'] -= 1
+            else:
+                self.state.update(position)
+
+            # Checkpoint antes do envio: se a execução morrer durante o envio,
+            # a linha não é reenviada (ver recover_in_flight)
+            self.state['in_flight'] = {'line': line, 'phone': phone}
+            self.save_checkpoint()
+
+            success = self.process_line(line, row)
+            if success:
+                sent_this_run += 1
+
+            elapsed_min = (time.monotonic() - started) / 60
+            rate = sent_this_run / elapsed_min if elapsed_min > 0 else 0.0
+            logger.info(
+                f"[linha {line}] enviados: {self.state['sent']} | "
+                f"erros: {self.state['errors']} | pulados: {self.state['skipped']} | "
+                f"{rate:.1f} envios/min"
+            )
+            yield success
+
+        logger.info(
+            f"Campanha concluída: {self.state['sent']} enviados, "
+            f"{self.state['errors']} erros, {self.state['skipped']} pulados"
+        )
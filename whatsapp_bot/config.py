@@ -13,14 +13,20 @@ PROFILES_DIR = BASE_DIR / "profiles"
 MESSAGES_DIR = BASE_DIR / "messages"
 IMAGES_DIR = BASE_DIR / "images"
 LOGS_DIR = BASE_DIR / "logs"
+EXPORTS_DIR = BASE_DIR / "exports"
+JOBS_DIR = BASE_DIR / "jobs"
+SNAPSHOTS_DIR = BASE_DIR / "snapshots"
 
 # Criar diretórios se não existirem
-for directory in [PROFILES_DIR, MESSAGES_DIR, IMAGES_DIR, LOGS_DIR]:
+for directory in [PROFILES_DIR, MESSAGES_DIR, IMAGES_DIR, LOGS_DIR, EXPORTS_DIR]:
     directory.mkdir(exist_ok=True)
 
 # Arquivo de configuração
 CONFIG_FILE = BASE_DIR / "config.json"
 
+# Cache dos caminhos do driver e do navegador
+DRIVER_CACHE_FILE = BASE_DIR / "drivers.json"
+
 
 class Config:
     """Classe para gerenciar configurações do bot"""
@@ -32,6 +38,28 @@ class Config:
         "last_send_date": None,  # Data do último envio
         "headless": False,  # Executar em modo headless
         "minimize_window": True,  # Minimizar janela ao abrir
+        "startup_budget_seconds": 20,  # Tempo máximo esperado para abrir o navegador
+        "auto_compact_profile": False,  # Limpar caches do perfil se passar do limite
+        "pacing_min_per_minute": 2,  # Ritmo mínimo de envios (campanhas/respostas)
+        "pacing_max_per_minute": 20,  # Ritmo máximo de envios
+        "slo_seconds": {"urgent": 30, "normal": 600, "bulk": 3600},  # Espera máxima na fila
+        "daily_retry_seconds": 60,  # Espera após a 1ª falha do envio diário no --serve (dobra a cada falha)
+        "daily_max_attempts": 5,  # Tentativas do envio diário por dia no --serve
+        "account": "",  # Nome único da conta na fila compartilhada (obrigatório para --worker/--orchestrate)
+        "queue_path": "",  # Arquivo SQLite da fila compartilhada (padrão: queue.db)
+        "record_snapshots": False,  # Gravar snapshots sanitizados das telas em snapshots/
+        "sessions": [],  # Contas do --orchestrate (vazio: só a conta configurada acima)
+        "last_send_dates": {},  # Último envio diário por conta (--orchestrate)
+        "sent_targets": {},  # Conversas que já receberam a mensagem diária de hoje
+        "max_concurrent_sessions": 2,  # Operações de navegador simultâneas no --orchestrate
+        "metrics_port": 8765,  # Porta local de /metrics e /health (0 = desativado)
+        "health_interval_seconds": 60,  # Intervalo das verificações de saúde das sessões
+        "prewarm_lead_seconds": 0,  # Preparar o envio diário N segundos antes (0 = desativado)
+        "prewarm_targets": [],  # Conversas do envio pré-aquecido (padrão: group_name)
+        "soak_sends": 500,  # Envios do --soak quando --sends/--hours não são informados
+        "soak_delay_ms": 400,  # Atraso médio da página simulada do --soak
+        "soak_failure_rate": 0.05,  # Fração de atrasos longos, acks com falha e conversas indisponíveis
+        "soak_sample_seconds": 30,  # Intervalo entre amostras de memória e descritores
     }
 
     def __init__(self):
@@ -68,21 +96,83 @@ class Config:
         self.config[key] = value
         self.save_config()
 
-    def update_last_send_date(self):
-        """Atualiza a data do último envio"""
-        self.set("last_send_date", datetime.now().strftime("%Y-%m-%d"))
+    def _is_own_account(self, account):
+        """Indica se é a conta deste config.json (modo normal e --serve)"""
+        return account is None or account == self.get_account()
+
+    def update_last_send_date(self, account=None):
+        """
+        Atualiza a data do último envio (por conta, se informada)
 
-    def should_send_today(self):
-        """Verifica se deve enviar mensagem hoje"""
-        last_send = self.get("last_send_date")
+        A conta deste config.json fica registrada nas duas chaves:
+        "last_send_date" (modo normal e --serve) e "last_send_dates"
+        (--orchestrate), para que trocar de modo no mesmo dia não repita o envio.
+        """
         today = datetime.now().strftime("%Y-%m-%d")
-        return last_send != today
+        if self._is_own_account(account):
+            self.config["last_send_date"] = today
+            account = self.get_account()
+        self.set("last_send_dates", {**self.get("last_send_dates", {}), account: today})
+
+    def sent_targets_today(self):
+        """Conversas que já receberam a mensagem diária hoje"""
+        record = self.get("sent_targets", {})
+        if record.get("date") != datetime.now().strftime("%Y-%m-%d"):
+            return []
+        return list(record.get("targets", []))
+
+    def add_sent_target(self, target):
+        """
+        Registra que a conversa recebeu a mensagem diária de hoje
+
+        Com várias conversas, uma nova tentativa envia só às que faltam.
+        """
+        targets = self.sent_targets_today()
+        if target not in targets:
+            targets.append(target)
+        self.set("sent_targets", {"date": datetime.now().strftime("%Y-%m-%d"), "targets": targets})
+
+    def should_send_today(self, account=None):
+        """Verifica se deve enviar mensagem hoje (por conta, se informada)"""
+        sent = [self.get("last_send_dates", {}).get(account)] if account else []
+        if self._is_own_account(account):
+            # Envios anteriores a "last_send_dates" só estão na chave antiga
+            sent += [self.get("last_send_date"), self.get("last_send_dates", {}).get(self.get_account())]
+        today = datetime.now().strftime("%Y-%m-%d")
+        return today not in sent
 
     def get_profile_path(self):
         """Retorna o caminho do perfil do navegador"""
         browser = self.get("browser", "chrome")
         return str(PROFILES_DIR / f"{browser}_profile")
 
+    def get_account(self, required=False):
+        """
+        Retorna o nome da conta
+
+        Args:
+            required: Exige "account" configurado. Usado pela fila
+                compartilhada: o nome da pasta do perfil é o mesmo em todas as
+                máquinas e faria contas diferentes pegarem os jobs umas das outras
+
+        Returns:
+            str: "account" do config.json ou, se não exigido, o nome do perfil
+
+        Raises:
+            ValueError: Se required=True e "account" não está configurado
+        """
+        account = (self.get("account") or "").strip()
+        if account:
+            return account
+        if required:
+            raise ValueError('Configure "account" no config.json com um nome único para esta '
+                             'conta do WhatsApp antes de usar a fila compartilhada')
+        return Path(self.get_profile_path()).name
+
+    def get_queue_path(self):
+        """Retorna o caminho do arquivo da fila compartilhada"""
+        return self.get("queue_path") or str(BASE_DIR / "queue.db")
+
     def setup_wizard(self):
         """Assistente de configuração inicial"""
         print("\n" + "="*50)
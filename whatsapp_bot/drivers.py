@@ -0,0 +1,278 @@
+"""
+Módulo de cache dos caminhos do driver e do navegador
+
+Sem caminhos explícitos, cada webdriver.Chrome/Edge/Firefox passa pelo
+Selenium Manager, que procura (e às vezes baixa) driver e navegador. Isso
+leva segundos e pode travar sem internet. Depois da primeira inicialização
+os caminhos encontrados ficam em cache e são passados direto ao Service.
+"""
+
+import os
+import re
+import json
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Instalações padrão usadas quando o Selenium não informa o executável
+KNOWN_BROWSER_PATHS = {
+    "chrome": [
+        r"%PROGRAMFILES%\Google\Chrome\Application\chrome.exe",
+        r"%PROGRAMFILES(X86)%\Google\Chrome\Application\chrome.exe",
+        r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium",
+        "/usr/bin/chromium-browser",
+    ],
+    "edge": [
+        r"%PROGRAMFILES(X86)%\Microsoft\Edge\Application\msedge.exe",
+        r"%PROGRAMFILES%\Microsoft\Edge\Application\msedge.exe",
+        "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",
+        "/usr/bin/microsoft-edge",
+        "/usr/bin/microsoft-edge-stable",
+    ],
+    "firefox": [
+        r"%PROGRAMFILES%\Mozilla Firefox\firefox.exe",
+        r"%PROGRAMFILES(X86)%\Mozilla Firefox\firefox.exe",
+        "/Applications/Firefox.app/Contents/MacOS/firefox",
+        "/usr/bin/firefox",
+    ],
+}
+
+# Chrome e Edge no Windows atualizam em subpastas "130.0.6723.92"
+_VERSION_DIR = re.compile(r'^\d+\.\d+\.\d+\.\d+$')
+
+# No Linux /usr/bin/google-chrome (e similares) aponta para um script que
+# executa o binário real na mesma pasta
+_WRAPPED_BINARIES = ("chrome", "msedge", "chromium", "firefox-bin", "firefox")
+
+# Gravações do cache no mesmo processo (sessões do --orchestrate)
+_save_lock = threading.Lock()
+
+
+def find_browser_path(browser_type, options=None):
+    """
+    Retorna o executável do navegador
+
+    Args:
+        browser_type: chrome, edge ou firefox
+        options: Options usadas na inicialização (binary_location definido
+                 pelo usuário ou pelo Selenium Manager)
+
+    Returns:
+        str: Caminho do executável ou None
+    """
+    try:
+        location = getattr(options, "binary_location", None)
+    except Exception:
+        location = None
+    if isinstance(location, str) and location and os.path.isfile(location):
+        return location
+
+    for candidate in KNOWN_BROWSER_PATHS.get(browser_type, []):
+        path = os.path.expandvars(candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def _is_script(path):
+    """Indica se o arquivo é um script (#!) em vez de um executável"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(2) == b"#!"
+    except OSError:
+        return False
+
+
+def resolve_browser_binary(browser_path):
+    """
+    Retorna o executável real do navegador
+
+    Segue links simbólicos (/usr/bin/google-chrome → /opt/google/chrome/...)
+    e, se o destino for um script de inicialização, o binário ao lado dele.
+
+    Args:
+        browser_path: Caminho configurado/descoberto do navegador
+
+    Returns:
+        str: Caminho do binário
+    """
+    path = os.path.realpath(browser_path)
+    if not _is_script(path):
+        return path
+
+    folder = os.path.dirname(path)
+    for name in _WRAPPED_BINARIES:
+        candidate = os.path.join(folder, name)
+        if candidate != path and os.path.isfile(candidate) and not _is_script(candidate):
+            return candidate
+    return path
+
+
+def browser_fingerprint(browser_path):
+    """
+    Identifica a instalação do navegador sem executá-lo
+
+    Usa o binário real (resolve_browser_binary): muda quando ele é
+    substituído ou quando uma atualização cria uma nova pasta de versão ao
+    lado dele, mas não quando só o script de inicialização muda.
+
+    Returns:
+        str: Impressão digital ou None se o arquivo não existe
+    """
+    if not browser_path:
+        return None
+    try:
+        path = Path(resolve_browser_binary(browser_path))
+        stat = path.stat()
+        versions = sorted(p.name for p in path.parent.iterdir() if _VERSION_DIR.match(p.name))
+    except OSError:
+        return None
+    return f"{stat.st_size}:{int(stat.st_mtime)}:{','.join(versions)}"
+
+
+def driver_versions(browser_type, capabilities):
+    """
+    Extrai as versões do navegador e do driver das capabilities da sessão
+
+    Returns:
+        tuple: (versão do navegador, versão do driver)
+    """
+    browser_version = capabilities.get("browserVersion")
+    if browser_type == "chrome":
+        driver_version = capabilities.get("chrome", {}).get("chromedriverVersion", "")
+    elif browser_type == "edge":
+        driver_version = capabilities.get("msedge", {}).get("msedgedriverVersion", "")
+    else:
+        driver_version = capabilities.get("moz:geckodriverVersion", "")
+    return browser_version, (driver_version.split() or [None])[0]
+
+
+class DriverCache:
+    """Caminhos do driver e do navegador por tipo de navegador, em JSON"""
+
+    def __init__(self, path):
+        """
+        Inicializa o cache
+
+        Args:
+            path: Arquivo JSON do cache
+        """
+        self.path = Path(path)
+        self.entries = self.load()
+
+    def load(self):
+        """Lê o cache do disco"""
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache de drivers: {e}")
+            return {}
+
+    def save(self, browser_type):
+        """
+        Grava a entrada do navegador no disco
+
+        Relê o arquivo e troca só a entrada deste navegador, para não apagar
+        o que outra sessão gravou, e grava em um arquivo temporário
+        substituído de uma vez (os.replace), para que sessões simultâneas
+        nunca leiam ou deixem um JSON pela metade.
+
+        Args:
+            browser_type: Navegador cuja entrada mudou
+        """
+        with _save_lock:
+            try:
+                entries = self.load()
+                if browser_type in self.entries:
+                    entries[browser_type] = self.entries[browser_type]
+                else:
+                    entries.pop(browser_type, None)
+
+                fd, tmp_path = tempfile.mkstemp(prefix=f".{self.path.name}.", suffix=".tmp",
+                                                dir=str(self.path.parent))
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(entries, f, indent=4, ensure_ascii=False)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+            except Exception as e:
+                logger.warning(f"Erro ao salvar cache de drivers: {e}")
+
+    def lookup(self, browser_type):
+        """
+        Retorna a entrada do navegador se ainda for válida
+
+        A entrada é descartada se o driver sumiu ou se o navegador mudou de
+        versão (impressão digital diferente).
+
+        Returns:
+            dict: Entrada com 'driver_path' e 'browser_path', ou None
+        """
+        entry = self.entries.get(browser_type)
+        if not entry:
+            return None
+
+        if not os.path.isfile(entry.get("driver_path") or ""):
+            logger.info(f"Driver em cache não existe mais, refazendo a descoberta ({browser_type})")
+            self.invalidate(browser_type)
+            return None
+
+        if browser_fingerprint(entry.get("browser_path") or "") != entry.get("fingerprint"):
+            logger.info(
+                f"Navegador {browser_type} mudou desde a versão "
+                f"{entry.get('browser_version')}, refazendo a descoberta"
+            )
+            self.invalidate(browser_type)
+            return None
+
+        return entry
+
+    def record(self, browser_type, driver_path, browser_path, capabilities, startup_time):
+        """
+        Salva os caminhos encontrados pelo Selenium Manager
+
+        Args:
+            browser_type: chrome, edge ou firefox
+            driver_path: Executável do driver usado na sessão
+            browser_path: Executável do navegador
+            capabilities: Capabilities da sessão (versões)
+            startup_time: Tempo de inicialização com descoberta (segundos)
+        """
+        fingerprint = browser_fingerprint(browser_path or "")
+        if not driver_path or not fingerprint:
+            logger.info(f"Caminhos do {browser_type} não identificados, cache não atualizado")
+            return
+
+        browser_version, driver_version = driver_versions(browser_type, capabilities)
+        self.entries[browser_type] = {
+            "driver_path": str(driver_path),
+            "browser_path": str(browser_path),
+            "browser_version": browser_version,
+            "driver_version": driver_version,
+            "fingerprint": fingerprint,
+            "discovery_startup_seconds": round(startup_time, 2),
+        }
+        self.save(browser_type)
+        logger.info(
+            f"Cache de drivers atualizado: {browser_type} {browser_version}, "
+            f"driver {driver_version}"
+        )
+
+    def invalidate(self, browser_type):
+        """Remove a entrada do navegador"""
+        if self.entries.pop(browser_type, None) is not None:
+            self.save(browser_type)
@@ -0,0 +1,58 @@
+"""
+Erros definitivos de conversa
+
+São situações em que repetir não adianta (nome errado, grupo só de
+administradores, participante removido). O bot as detecta na tela junto com
+o resultado esperado, em vez de esperar o timeout, e os executores em lote
+pulam a conversa e a registram no relatório.
+
+UnconfirmedSendError é o caso oposto: a mensagem saiu (Enter ou clique em
+enviar), mas não há confirmação. Ela pode ter sido entregue, então também
+não deve ser repetida.
+"""
+
+
+class ChatUnavailableError(Exception):
+    """Conversa não pode receber mensagens"""
+
+    reason = "conversa indisponível"
+
+    def __init__(self, chat=None):
+        """
+        Args:
+            chat: Nome da conversa ou telefone (opcional)
+        """
+        self.chat = chat
+        super().__init__(f"{self.reason}: {chat}" if chat else self.reason)
+
+
+class ChatNotFoundError(ChatUnavailableError):
+    """A pesquisa não encontrou a conversa ou o telefone é inválido"""
+
+    reason = "conversa não encontrada"
+
+
+class ComposerBlockedError(ChatUnavailableError):
+    """Só administradores podem enviar mensagens no grupo"""
+
+    reason = "somente administradores podem enviar mensagens"
+
+
+class NotParticipantError(ChatUnavailableError):
+    """A conta não participa mais do grupo"""
+
+    reason = "não é mais participante do grupo"
+
+
+class UnconfirmedSendError(Exception):
+    """A mensagem foi enviada, mas o WhatsApp não confirmou (sem ack ou com aviso de limite)"""
+
+    reason = "enviada sem confirmação"
+
+    def __init__(self, detail=None):
+        """
+        Args:
+            detail: O que faltou (opcional)
+        """
+        self.detail = detail
+        super().__init__(f"{self.reason}: {detail}" if detail else self.reason)
@@ -0,0 +1,348 @@
+"""
+Módulo para exportar o histórico de conversas em JSONL
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Lê em lote as mensagens ainda não exportadas da conversa aberta e rola para
+# cima para carregar mais. As linhas lidas são removidas da página, então a
+# cada lote só existem as mensagens recém-carregadas: o DOM e a busca por
+# mensagens ficam do tamanho de um lote, mesmo em conversas com 100 mil
+# mensagens. A conversa só volta a mostrar tudo depois de recarregar a página.
+#
+# arguments[0]: id da mensagem mais recente já exportada (cursor)
+# arguments[1]: id da mensagem mais antiga lida por uma execução interrompida;
+#               tudo o que for mais recente que ela é ignorado (retomada)
+EXTRACT_SCRIPT = r"""
+const cursor = arguments[0];
+const resumeFrom = arguments[1];
+const main = document.querySelector('#main');
+if (!main) { return null; }
+
+// As linhas dos lotes anteriores já foram removidas: só há mensagens novas
+const nodes = main.querySelectorAll('div[data-id]');
+let messages = [];
+let reachedCursor = false;
+let passedResume = !resumeFrom;
+let afterResume = false;
+
+nodes.forEach(function (el) {
+    const id = el.getAttribute('data-id');
+    if (afterResume) { return; }
+    if (id === cursor) {
+        // Tudo até o cursor (inclusive) já foi exportado antes
+        reachedCursor = true;
+        messages = [];
+        return;
+    }
+    if (id === resumeFrom) {
+        // Desta mensagem em diante já está no arquivo parcial
+        passedResume = true;
+        afterResume = true;
+        return;
+    }
+
+    const copy = el.querySelector('[data-pre-plain-text]');
+    const pre = copy ? copy.getAttribute('data-pre-plain-text') : '';
+    const meta = pre.match(/^\[(.+?)\]\s*(.*?):\s*$/);
+    const text = el.querySelector('span.selectable-text');
+
+    messages.push({
+        id: id,
+        outgoing: id.indexOf('true_') === 0,
+        sender: meta ? meta[2] : null,
+        timestamp: meta ? meta[1] : null,
+        text: text ? text.innerText : '',
+        has_media: !!el.querySelector('img[src^="blob:"], video, audio, [data-icon*="audio"], [data-icon*="document"]')
+    });
+});
+
+// Retomada: antes de achar a mensagem de parada tudo é mais recente que ela
+if (!passedResume) { messages = []; }
+
+// Início do histórico: aviso de criptografia na primeira linha da conversa
+let atTop = false;
+let noticeRow = null;
+let row = main.querySelector('[role="row"]');
+for (let i = 0; row && i < 3; i++, row = row.nextElementSibling) {
+    const content = (row.textContent || '').toLowerCase();
+    if (content.indexOf('criptografia de ponta a ponta') !== -1 ||
+        content.indexOf('end-to-end encrypted') !== -1) {
+        atTop = true;
+        noticeRow = row;
+    }
+}
+
+// Histórico antigo que só está no celular: pedir para carregar
+const prompt = document.evaluate(
+    './/*[text()[contains(., "mensagens mais antigas") or contains(., "older messages")]]',
+    main, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (prompt) { (prompt.closest('button, [role="button"]') || prompt).click(); }
+
+const loading = !!main.querySelector('[role="progressbar"]');
+
+// Contêiner com rolagem da conversa (guardado: num lote vazio não há
+// mensagem para chegar até ele)
+let scroller = window.wppExportScroller;
+if (!scroller || !scroller.isConnected) {
+    scroller = nodes.length ? nodes[0].parentElement : null;
+    while (scroller && scroller !== main) {
+        const style = getComputedStyle(scroller);
+        if (style.overflowY === 'auto' || style.overflowY === 'scroll') { break; }
+        scroller = scroller.parentElement;
+    }
+    window.wppExportScroller = scroller !== main ? scroller : null;
+}
+
+// Libera as linhas lidas (o aviso de criptografia fica: ele marca o início)
+nodes.forEach(function (el) {
+    const line = el.closest('[role="row"]') || el;
+    if (line !== noticeRow && line.isConnected) { line.remove(); }
+});
+
+// Se nada foi acrescentado acima desde a última rolagem, continua no topo
+const scrolledToTop = !!scroller && scroller !== main && scroller.scrollTop === 0;
+if (scroller && !reachedCursor) { scroller.scrollTop = 0; }
+
+return {
+    messages: messages,
+    scanned: nodes.length,
+    reached_cursor: reachedCursor,
+    passed_resume: !!resumeFrom && passedResume,
+    at_top: atTop,
+    older_on_phone: !!prompt,
+    loading: loading,
+    scrolled_to_top: scrolledToTop
+};
+"""
+
+
+def _safe_name(chat_name):
+    """Converte o nome da conversa em nome de arquivo"""
+    return re.sub(r'[^\w\-]+', '_', chat_name).strip('_') or "chat"
+
+
+class ChatExporter:
+    """Exporta o histórico de uma conversa com cursor para exportações incrementais"""
+
+    def __init__(self, bot, chat_name, output_dir, batch_wait=1.5, idle_rounds=5,
+                 max_messages=None, max_phone_requests=10):
+        """
+        Inicializa o exportador
+
+        Args:
+            bot: Instância do WhatsAppBot já logada
+            chat_name: Nome da conversa/grupo
+            output_dir: Diretório dos arquivos exportados
+            batch_wait: Espera após cada rolagem para o WhatsApp carregar mensagens
+            idle_rounds: Lotes vazios seguidos, já no topo da rolagem e sem
+                carregamento pendente, tratados como início do histórico
+            max_messages: Limite de mensagens nesta execução (opcional)
+            max_phone_requests: Pedidos seguidos de "mensagens mais antigas do
+                celular" sem resultado antes de desistir nesta execução
+        """
+        self.bot = bot
+        self.chat_name = chat_name
+        self.batch_wait = batch_wait
+        self.idle_rounds = idle_rounds
+        self.max_messages = max_messages
+        self.max_phone_requests = max_phone_requests
+        self.complete = False
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(exist_ok=True)
+        self.output_path = output_dir / f"{_safe_name(chat_name)}.jsonl"
+        self.partial_path = output_dir / f"{_safe_name(chat_name)}.partial.jsonl"
+        self.cursor_path = output_dir / f"{_safe_name(chat_name)}.cursor.json"
+
+    def load_state(self):
+        """
+        Carrega o cursor da conversa
+
+        'last_id' é a mensagem mais recente já gravada no arquivo final e
+        'walk' o progresso de uma exportação ainda não concluída: lotes
+        gravados no arquivo parcial (posição de início de cada um), tamanho
+        válido do parcial e as mensagens mais recente e mais antiga lidas.
+
+        Returns:
+            dict: Estado da exportação
+        """
+        state = {'chat': self.chat_name, 'last_id': None, 'walk': None}
+        if self.cursor_path.exists():
+            try:
+                with open(self.cursor_path, 'r', encoding='utf-8') as f:
+                    state.update(json.load(f))
+            except Exception as e:
+                logger.error(f"Erro ao ler cursor: {e}")
+        return state
+
+    def save_state(self, state):
+        """Grava o cursor de forma atômica"""
+        state['updated_at'] = time.strftime("%Y-%m-%d %H:%M:%S")
+        tmp_path = self.cursor_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.cursor_path)
+
+    def load_cursor(self):
+        """Retorna o id da última mensagem exportada (ou None)"""
+        return self.load_state().get('last_id')
+
+    def _commit(self, state):
+        """
+        Acrescenta a exportação concluída ao arquivo final
+
+        Os lotes foram lidos do mais recente para o mais antigo; são copiados
+        em ordem inversa para que o arquivo final fique em ordem cronológica.
+        O tamanho do arquivo antes da cópia fica no cursor para que uma cópia
+        interrompida seja desfeita e refeita na próxima execução.
+        """
+        walk = state['walk']
+        if walk['batches']:
+            walk['committing'] = self.output_path.stat().st_size if self.output_path.exists() else 0
+            self.save_state(state)
+
+            ends = walk['batches'][1:] + [walk['size']]
+            with open(self.partial_path, 'rb') as src, open(self.output_path, 'ab') as dst:
+                for start, end in reversed(list(zip(walk['batches'], ends))):
+                    src.seek(start)
+                    dst.write(src.read(end - start))
+                dst.flush()
+                os.fsync(dst.fileno())
+            state['last_id'] = walk['newest_id']
+
+        state['walk'] = None
+        self.save_state(state)
+        if self.partial_path.exists():
+            self.partial_path.unlink()
+
+    def _recover(self, state):
+        """Conclui a cópia para o arquivo final interrompida na execução anterior"""
+        walk = state.get('walk')
+        if not walk or walk.get('committing') is None:
+            return
+        logger.info("Refazendo a gravação interrompida do arquivo final")
+        with open(self.output_path, 'ab') as f:
+            f.truncate(walk['committing'])
+        self._commit(state)
+
+    def run(self):
+        """
+        Exporta as mensagens novas desde a última execução
+
+        Os lotes vão para o arquivo parcial e o cursor é gravado junto com
+        cada lote. Quando a leitura chega ao cursor anterior ou ao início do
+        histórico, o parcial é acrescentado ao arquivo final em ordem
+        cronológica e o cursor avança. Uma execução interrompida (ou limitada
+        por max_messages) continua de onde parou na próxima, sem duplicar.
+
+        Returns:
+            int: Quantidade de mensagens lidas nesta execução, ou None em caso de erro
+        """
+        state = self.load_state()
+        self._recover(state)
+
+        cursor = state.get('last_id')
+        walk = state.get('walk')
+        if walk:
+            logger.info(f"Retomando exportação de '{self.chat_name}' ({walk['exported']} mensagem(ns) já lidas)")
+            with open(self.partial_path, 'ab') as f:
+                f.truncate(walk['size'])
+        else:
+            walk = {'newest_id': None, 'oldest_id': None, 'batches': [], 'size': 0, 'exported': 0}
+            if self.partial_path.exists():
+                self.partial_path.unlink()
+            if cursor:
+                logger.info(f"Exportação incremental de '{self.chat_name}' a partir de {cursor}")
+            else:
+                logger.info(f"Exportação completa de '{self.chat_name}'")
+
+        if not self.bot.search_group(self.chat_name):
+            return None
+
+        resume_from = walk['oldest_id']
+        exported = 0
+        idle = 0
+        phone_requests = 0
+        complete = False
+
+        with open(self.partial_path, 'ab') as f:
+            while True:
+                result = self.bot.driver.execute_script(EXTRACT_SCRIPT, cursor, resume_from)
+                if result is None:
+                    logger.error("Conversa não está aberta")
+                    return None
+                if result['passed_resume']:
+                    resume_from = None
+
+                # Lote em ordem cronológica, gravado junto com o cursor
+                batch = result['messages']
+                if batch:
+                    walk['batches'].append(f.tell())
+                    for message in batch:
+                        message['chat'] = self.chat_name
+                        f.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                    walk['size'] = f.tell()
+                    walk['newest_id'] = walk['newest_id'] or batch[-1]['id']
+                    walk['oldest_id'] = batch[0]['id']
+                    walk['exported'] += len(batch)
+                    state['walk'] = walk
+                    self.save_state(state)
+
+                    exported += len(batch)
+                    logger.info(f"{walk['exported']} mensagem(ns) lida(s)")
+
+                if result['reached_cursor']:
+                    complete = True
+                    break
+                if result['at_top']:
+                    logger.info("Início do histórico alcançado")
+                    complete = True
+                    break
+                if self.max_messages and exported >= self.max_messages:
+                    logger.info("Limite de mensagens atingido; a próxima execução continua daqui")
+                    break
+
+                if result['older_on_phone']:
+                    phone_requests = 0 if result['scanned'] else phone_requests + 1
+                    if phone_requests >= self.max_phone_requests:
+                        logger.warning("O celular não enviou as mensagens mais antigas; "
+                                       "a próxima execução continua daqui")
+                        break
+                    idle = 0
+                elif result['loading'] or result['scanned']:
+                    idle = 0
+                else:
+                    idle += 1
+
+                if idle >= self.idle_rounds:
+                    if result['scrolled_to_top']:
+                        logger.info("Início do histórico alcançado (topo da conversa)")
+                        complete = True
+                    else:
+                        logger.warning("O WhatsApp parou de carregar mensagens; "
+                                       "a próxima execução continua daqui")
+                    break
+
+                time.sleep(self.batch_wait)
+
+        self.complete = complete
+        if complete:
+            state['walk'] = walk
+            self._commit(state)
+            logger.info(f"Exportação concluída: {walk['exported']} mensagem(ns) em {self.output_path}")
+        else:
+            logger.info(f"Exportação parcial: {walk['exported']} mensagem(ns) em {self.partial_path}")
+        return exported
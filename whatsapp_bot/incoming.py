@@ -0,0 +1,290 @@
+"""
+Módulo para captura de mensagens recebidas no WhatsApp Web
+"""
+
+import json
+import time
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Observer injetado na página. Guarda as mensagens recebidas em
+# window.__wppInbox.buffer; o Python esvazia o buffer em lotes.
+#
+# Só a lista de mensagens da conversa aberta (#main) e a lista lateral
+# (#pane-side) são observadas, não o app inteiro (horários e "digitando..."
+# mudam o tempo todo). Quando o WhatsApp troca o #main, attach() passa a
+# observar o novo; DRAIN_SCRIPT também chama attach() a cada leitura.
+OBSERVER_SCRIPT = r"""
+if (window.__wppInbox) { window.__wppInbox.attach(); return true; }
+
+const inbox = {buffer: [], seen: new Set(), maxSeen: 20000, dropped: 0, max: 5000,
+               mutedUntil: 0, switchedAt: 0, pending: [], main: null, side: null, shell: null};
+window.__wppInbox = inbox;
+
+const UNREAD = 'span[aria-label*="não lida"], span[aria-label*="unread"]';
+const TYPING = /(digitando|typing|gravando áudio|recording audio)(…|\.\.\.)\s*$/i;
+
+function now() { return Date.now(); }
+
+// Conjunto limitado: passando do máximo, esquece os ids mais antigos
+function remember(id) {
+    inbox.seen.delete(id);
+    inbox.seen.add(id);
+    while (inbox.seen.size > inbox.maxSeen) { inbox.seen.delete(inbox.seen.values().next().value); }
+}
+
+function enqueue(msg) {
+    if (inbox.buffer.length >= inbox.max) { inbox.buffer.shift(); inbox.dropped++; }
+    inbox.buffer.push(msg);
+}
+
+function push(msg) {
+    if (inbox.seen.has(msg.id)) { return; }
+    remember(msg.id);
+    enqueue(msg);
+}
+
+function chatTitle() {
+    const el = document.querySelector('#main header span[title], #main header span[dir="auto"]');
+    return el ? (el.getAttribute('title') || el.textContent) : null;
+}
+
+function hasMedia(el) {
+    return !!el.querySelector('img[src^="blob:"], video, audio, [data-icon*="audio"], [data-icon*="image"], [data-icon*="video"], [data-icon*="document"]');
+}
+
+// "[10:32, 18/10/2026]" ou "[10:32 AM, 10/18/2026]": enviada no dia e a
+// partir do minuto de since?
+function sentSince(timestamp, since) {
+    const time = /(\d{1,2}):(\d{2})\s*([AaPp][Mm])?/.exec(timestamp || '');
+    if (!time) { return false; }
+    let hour = parseInt(time[1], 10) % (time[3] ? 12 : 24);
+    if (time[3] && time[3].toLowerCase() === 'pm') { hour += 12; }
+    const start = new Date(since);
+    const numbers = (timestamp.slice(time.index + time[0].length).match(/\d+/g) || []).map(Number);
+    const year = start.getFullYear();
+    if ((numbers.indexOf(year) === -1 && numbers.indexOf(year % 100) === -1) ||
+        numbers.indexOf(start.getDate()) === -1) { return false; }
+    return hour * 60 + parseInt(time[2], 10) >= start.getHours() * 60 + start.getMinutes();
+}
+
+// Logo depois de trocar de conversa o histórico ainda está sendo
+// renderizado; as mensagens desse período esperam aqui e só as enviadas
+// depois da troca entram no buffer
+function flushPending() {
+    const pending = inbox.pending;
+    inbox.pending = [];
+    for (const msg of pending) {
+        if (sentSince(msg.timestamp, inbox.switchedAt)) { enqueue(msg); }
+    }
+}
+
+// Mensagem da conversa aberta (div[data-id]); ids "true_" são enviadas por nós
+function fromMessageNode(el) {
+    const id = el.getAttribute('data-id');
+    if (!id || id.indexOf('true_') === 0 || inbox.seen.has(id)) { return; }
+
+    const copy = el.querySelector('[data-pre-plain-text]');
+    const pre = copy ? copy.getAttribute('data-pre-plain-text') : '';
+    const meta = pre.match(/^\[(.+?)\]\s*(.*?):\s*$/);
+    const text = el.querySelector('span.selectable-text');
+
+    const msg = {
+        id: id,
+        chat: chatTitle(),
+        sender: meta ? meta[2] : null,
+        timestamp: meta ? meta[1] : null,
+        text: text ? text.innerText : '',
+        has_media: hasMedia(el),
+        source: 'chat',
+        received_at: now()
+    };
+    if (now() < inbox.mutedUntil) {
+        remember(id);
+        inbox.pending.push(msg);
+        return;
+    }
+    push(msg);
+}
+
+// Prévia de outras conversas na lista lateral (apenas com badge de não lidas)
+function fromChatRow(row) {
+    const unread = row.querySelector(UNREAD);
+    if (!unread) { return; }
+
+    const titles = row.querySelectorAll('span[title]');
+    if (titles.length < 2) { return; }
+    const chat = titles[0].getAttribute('title');
+    let preview = titles[titles.length - 1].getAttribute('title') || '';
+    if (TYPING.test(preview)) { return; }
+    let sender = null;
+    const split = preview.indexOf(': ');
+    if (split > 0 && split < 40) { sender = preview.slice(0, split); preview = preview.slice(split + 2); }
+
+    // Contador de não lidas e horário da prévia diferenciam dois "ok" seguidos
+    const count = ((unread.getAttribute('aria-label') || unread.textContent || '').match(/\d+/) || ['1'])[0];
+    const time = /\b\d{1,2}:\d{2}(\s?[AaPp][Mm])?/.exec(row.textContent || '');
+
+    push({
+        id: 'list:' + chat + '|' + (time ? time[0] : '') + '|' + count + '|' + preview,
+        chat: chat,
+        sender: sender,
+        timestamp: null,
+        text: preview,
+        has_media: hasMedia(row),
+        source: 'chat_list',
+        received_at: now()
+    });
+}
+
+const chatObserver = new MutationObserver(function (mutations) {
+    for (const mutation of mutations) {
+        for (const node of mutation.addedNodes) {
+            if (node.nodeType !== 1) { continue; }
+            if (node.hasAttribute('data-id')) {
+                fromMessageNode(node);
+            } else if (node.firstElementChild) {
+                node.querySelectorAll('div[data-id]').forEach(fromMessageNode);
+            }
+        }
+    }
+});
+
+const sideObserver = new MutationObserver(function (mutations) {
+    const rows = new Set();
+    for (const mutation of mutations) {
+        const target = mutation.target.nodeType === 1 ? mutation.target : mutation.target.parentElement;
+        const row = target && target.closest('[role="listitem"], [role="row"]');
+        if (row) { rows.add(row); }
+    }
+    rows.forEach(fromChatRow);
+});
+
+// O WhatsApp troca o #main dentro do mesmo contêiner ao mudar de conversa
+const shellObserver = new MutationObserver(function () { inbox.attach(); });
+
+inbox.attach = function (initial) {
+    const side = document.querySelector('#pane-side');
+    if (side !== inbox.side) {
+        sideObserver.disconnect();
+        inbox.side = side;
+        if (side) {
+            sideObserver.observe(side, {childList: true, subtree: true, characterData: true,
+                                        attributes: true, attributeFilter: ['title', 'aria-label']});
+        }
+    }
+
+    const main = document.querySelector('#main');
+    if (main === inbox.main) { return; }
+    chatObserver.disconnect();
+    inbox.main = main;
+    if (!main) { return; }
+
+    // Mensagens já visíveis não são novas
+    main.querySelectorAll('div[data-id]').forEach(function (el) { remember(el.getAttribute('data-id')); });
+    if (!initial) {
+        flushPending();
+        inbox.switchedAt = now();
+        inbox.mutedUntil = now() + 1500;
+        setTimeout(flushPending, 1600);
+    }
+    chatObserver.observe(main, {childList: true, subtree: true});
+
+    if (main.parentElement !== inbox.shell) {
+        shellObserver.disconnect();
+        inbox.shell = main.parentElement;
+        if (inbox.shell) { shellObserver.observe(inbox.shell, {childList: true}); }
+    }
+};
+
+inbox.observers = [chatObserver, sideObserver, shellObserver];
+inbox.attach(true);
+return true;
+"""
+
+# Esvazia o buffer em uma única chamada
+DRAIN_SCRIPT = r"""
+const inbox = window.__wppInbox;
+if (!inbox) { return null; }
+inbox.attach();
+const messages = inbox.buffer;
+inbox.buffer = [];
+const dropped = inbox.dropped;
+inbox.dropped = 0;
+return {messages: messages, dropped: dropped};
+"""
+
+
+class IncomingMessageStream:
+    """Lê as mensagens recebidas em lotes e grava em JSONL e/ou callback"""
+
+    def __init__(self, bot, output_path=None, callback=None, interval=2.0):
+        """
+        Inicializa o stream de mensagens recebidas
+
+        Args:
+            bot: Instância do WhatsAppBot já logada
+            output_path: Arquivo JSONL de saída (opcional)
+            callback: Função chamada com a lista de mensagens de cada lote (opcional)
+            interval: Intervalo entre leituras em segundos
+        """
+        self.bot = bot
+        self.output_path = Path(output_path) if output_path else None
+        self.callback = callback
+        self.interval = interval
+        self.total = 0
+        self.running = False
+
+    def poll(self):
+        """
+        Lê um lote de mensagens e entrega para a saída configurada
+
+        Returns:
+            list: Mensagens do lote
+        """
+        messages = self.bot.drain_incoming_messages()
+        if not messages:
+            return []
+
+        if self.output_path:
+            with open(self.output_path, 'a', encoding='utf-8') as f:
+                for message in messages:
+                    f.write(json.dumps(message, ensure_ascii=False) + "\n")
+
+        if self.callback:
+            try:
+                self.callback(messages)
+            except Exception as e:
+                logger.error(f"Erro no callback de mensagens recebidas: {e}", exc_info=True)
+
+        self.total += len(messages)
+        logger.info(f"{len(messages)} mensagem(ns) recebida(s) (total: {self.total})")
+        return messages
+
+    def run(self, duration=None):
+        """
+        Lê mensagens continuamente até stop() ou o fim da duração
+
+        Args:
+            duration: Tempo máximo em segundos (None = sem limite)
+        """
+        self.bot.install_incoming_observer()
+        self.running = True
+        deadline = time.monotonic() + duration if duration else None
+
+        logger.info("Escutando mensagens recebidas...")
+        while self.running:
+            started = time.monotonic()
+            self.poll()
+
+            if deadline and time.monotonic() >= deadline:
+                break
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+        self.running = False
+
+    def stop(self):
+        """Interrompe o loop de leitura"""
+        self.running = False
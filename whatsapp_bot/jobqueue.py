@@ -0,0 +1,350 @@
+"""
+Módulo de fila de jobs compartilhada entre processos e máquinas
+"""
+
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from .errors import ChatUnavailableError, UnconfirmedSendError
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueBackend(ABC):
+    """
+    Interface da fila compartilhada
+
+    Um job tem conta, conversa, payload e horário (slot). Um worker reserva
+    (claim) um job por um tempo (lease) e renova a reserva com heartbeat;
+    reservas vencidas de workers mortos voltam a ficar disponíveis.
+    """
+
+    @abstractmethod
+    def enqueue(self, account, chat, payload, slot=None, max_attempts=3):
+        """Adiciona um job e retorna o id"""
+
+    @abstractmethod
+    def claim(self, worker_id, accounts, lease_seconds=60):
+        """Reserva o próximo job disponível para as contas (dict ou None)"""
+
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id, lease_seconds=60):
+        """Renova a reserva; False se ela foi perdida"""
+
+    @abstractmethod
+    def complete(self, job_id, worker_id):
+        """Marca o job reservado como concluído"""
+
+    @abstractmethod
+    def fail(self, job_id, worker_id, error, retry_delay=60, permanent=False):
+        """Registra uma falha do job reservado"""
+
+    @abstractmethod
+    def stats(self):
+        """Quantidade de jobs por status"""
+
+
+class SQLiteJobQueue(JobQueueBackend):
+    """
+    Fila em arquivo SQLite (pode ficar em um volume compartilhado)
+
+    Usa journal em modo DELETE e transações BEGIN IMMEDIATE: o próprio
+    bloqueio do arquivo serializa os claims, sem processo coordenador.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            chat TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            slot REAL NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL DEFAULT 3,
+            lease_owner TEXT,
+            lease_expires REAL,
+            created_at REAL NOT NULL,
+            finished_at REAL,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, account, slot);
+    """
+
+    def __init__(self, path):
+        """
+        Inicializa a fila
+
+        Args:
+            path: Caminho do arquivo SQLite
+        """
+        self.path = str(path)
+        self.local = threading.local()
+        self._db().executescript(self.SCHEMA)
+
+    def _db(self):
+        """Conexão por thread (sqlite3 não compartilha conexões entre threads)"""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=DELETE")
+            self.local.db = db
+        return db
+
+    def _connect(self):
+        """Abre uma transação de escrita"""
+        return _Transaction(self._db())
+
+    def enqueue(self, account, chat, payload, slot=None, max_attempts=3):
+        """
+        Adiciona um job
+
+        Args:
+            account: Conta que deve enviar (nome do perfil)
+            chat: Nome da conversa/grupo
+            payload: Dicionário com 'text', 'image'/'caption' ou 'parts'
+            slot: datetime a partir do qual o job pode rodar (padrão: agora)
+            max_attempts: Tentativas antes de marcar como falho
+
+        Returns:
+            int: Id do job
+        """
+        slot_ts = slot.timestamp() if slot else time.time()
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT INTO jobs (account, chat, payload, slot, max_attempts, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (account, chat, json.dumps(payload, ensure_ascii=False), slot_ts,
+                 max_attempts, time.time())
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id, accounts, lease_seconds=60):
+        """
+        Reserva o próximo job disponível para uma das contas do worker
+
+        Jobs pendentes ou com reserva vencida são elegíveis.
+
+        Returns:
+            dict: Job reservado ou None
+        """
+        if not accounts:
+            return None
+
+        now = time.time()
+        marks = ",".join("?" for _ in accounts)
+        with self._connect() as db:
+            # Reservas vencidas que já esgotaram as tentativas viram falha
+            db.execute(
+                f"UPDATE jobs SET status = 'failed', finished_at = ?, "
+                f"error = COALESCE(error, 'reserva vencida') "
+                f"WHERE status = 'leased' AND lease_expires < ? "
+                f"AND attempts >= max_attempts AND account IN ({marks})",
+                (now, now, *accounts)
+            )
+            row = db.execute(
+                f"SELECT * FROM jobs WHERE account IN ({marks}) AND slot <= ? "
+                f"AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) "
+                f"ORDER BY slot, id LIMIT 1",
+                (*accounts, now, now)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row['status'] == 'leased':
+                logger.warning(f"Job {row['id']} recuperado de {row['lease_owner']} (reserva vencida)")
+
+            db.execute(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (worker_id, now + lease_seconds, row['id'])
+            )
+
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['attempts'] += 1
+        return job
+
+    def heartbeat(self, job_id, worker_id, lease_seconds=60):
+        """
+        Renova a reserva de um job
+
+        Returns:
+            bool: False se a reserva foi perdida para outro worker
+        """
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id):
+        """Marca o job como concluído"""
+        with self._connect() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, lease_expires = NULL "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (time.time(), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error, retry_delay=60, permanent=False):
+        """
+        Registra uma falha; volta para a fila se ainda houver tentativas
+
+        Com permanent=True (ex: conversa inexistente) o job falha na hora.
+        """
+        now = time.time()
+        with self._connect() as db:
+            if permanent:
+                cursor = db.execute(
+                    "UPDATE jobs SET status = 'failed', finished_at = ?, lease_expires = NULL, error = ? "
+                    "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                    (now, str(error), job_id, worker_id)
+                )
+                return cursor.rowcount == 1
+
+            cursor = db.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                "slot = CASE WHEN attempts < max_attempts THEN ? ELSE slot END, "
+                "finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE ? END, "
+                "lease_expires = NULL, error = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'leased'",
+                (now + retry_delay, now, str(error), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def stats(self):
+        """
+        Quantidade de jobs por status
+
+        Returns:
+            dict: {status: quantidade}
+        """
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+
+class _Transaction:
+    """Transação BEGIN IMMEDIATE (reserva o arquivo para escrita logo no início)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class QueueWorker:
+    """Processa jobs da fila compartilhada para as contas deste worker"""
+
+    def __init__(self, queue, bot, accounts, worker_id=None, lease_seconds=60, idle_sleep=5):
+        """
+        Inicializa o worker
+
+        Args:
+            queue: JobQueueBackend
+            bot: WhatsAppBot já logado na conta
+            accounts: Contas cujo perfil está neste worker
+            worker_id: Identificador único (padrão: host-pid-aleatório)
+            lease_seconds: Duração da reserva; renovada a cada lease_seconds/3
+            idle_sleep: Espera quando não há jobs
+        """
+        self.queue = queue
+        self.bot = bot
+        self.accounts = list(accounts)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.idle_sleep = idle_sleep
+        self.running = False
+
+    def _keep_alive(self, job_id, done):
+        """Renova a reserva enquanto o job executa"""
+        while not done.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                logger.warning(f"Reserva do job {job_id} perdida")
+                return
+
+    def execute(self, job):
+        """
+        Envia o payload do job
+
+        Returns:
+            bool: True se enviado
+        """
+        return self.bot.search_group(job['chat']) and self.bot.send_message_data(job['payload'])
+
+    def run_once(self):
+        """
+        Reserva e executa um job
+
+        Returns:
+            bool: True se algum job foi processado
+        """
+        job = self.queue.claim(self.worker_id, self.accounts, self.lease_seconds)
+        if not job:
+            return False
+
+        logger.info(f"Job {job['id']} → '{job['chat']}' (tentativa {job['attempts']})")
+        done = threading.Event()
+        keeper = threading.Thread(target=self._keep_alive, args=(job['id'], done), daemon=True)
+        keeper.start()
+
+        permanent = False
+        try:
+            success = self.execute(job)
+            error = None if success else "falha no envio"
+        except ChatUnavailableError as e:
+            # Repetir não adianta: falha definitiva sem novas tentativas
+            success, error, permanent = False, str(e), True
+        except UnconfirmedSendError as e:
+            # A mensagem já saiu: repetir duplicaria o envio
+            logger.warning(f"Job {job['id']} {e}, não será repetido")
+            success, error, permanent = False, str(e), True
+        except Exception as e:
+            logger.error(f"Erro no job {job['id']}: {e}", exc_info=True)
+            success, error = False, str(e)
+        finally:
+            done.set()
+            keeper.join()
+
+        if success:
+            self.queue.complete(job['id'], self.worker_id)
+            logger.info(f"Job {job['id']} concluído")
+        else:
+            self.queue.fail(job['id'], self.worker_id, error, permanent=permanent)
+            logger.error(f"Job {job['id']} falhou: {error}")
+        return True
+
+    def run(self):
+        """Processa jobs até stop()"""
+        self.running = True
+        logger.info(f"Worker {self.worker_id} atendendo contas: {', '.join(self.accounts)}")
+        while self.running:
+            if not self.run_once():
+                time.sleep(self.idle_sleep)
+
+    def stop(self):
+        """Interrompe o loop do worker"""
+        self.running = False
+
+
+def parse_slot(value):
+    """Converte "2026-10-18 09:00" (ou ISO) em datetime; None = agora"""
+    return datetime.fromisoformat(value) if value else None
@@ -0,0 +1,467 @@
+"""
+Módulo de orquestração assíncrona de várias sessões em um único processo
+"""
+
+import json
+import time
+import signal
+import asyncio
+import logging
+import functools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .whatsapp import WhatsAppBot
+from .jobqueue import QueueWorker
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """
+    Uma conta do WhatsApp com navegador próprio
+
+    O WebDriver não é thread-safe, então todas as operações da sessão rodam
+    em sequência em uma thread exclusiva (executor de 1 thread).
+    """
+
+    def __init__(self, account, browser_manager, group_name=None, send_time=None,
+                 pacer=None, recorder=None):
+        """
+        Inicializa a sessão
+
+        Args:
+            account: Nome da conta (o mesmo usado na fila compartilhada)
+            browser_manager: BrowserManager com o perfil da conta
+            group_name: Grupo da mensagem diária (opcional)
+            send_time: Horário da mensagem diária (HH:MM)
+            pacer: PacingController da conta (opcional)
+            recorder: DomRecorder (opcional)
+        """
+        self.account = account
+        self.browser_manager = browser_manager
+        self.group_name = group_name
+        self.send_time = send_time
+        self.pacer = pacer
+        self.recorder = recorder
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sessao-{account}")
+
+        self.bot = None
+        self.worker = None
+        self.state = "stopped"
+        self.busy = False
+        self.failed_probes = 0
+        self.restarts = 0
+        self.ops = 0
+        self.op_errors = 0
+        self.op_seconds = 0.0
+        self.jobs = 0
+        self.daily_sent = 0
+        self.daily_retry_at = 0.0
+
+    def launch(self, restart=False):
+        """Abre (ou reabre) o navegador e carrega o WhatsApp Web (bloqueante)"""
+        if restart:
+            self.stop()
+        driver = self.browser_manager.start()
+        self.bot = WhatsAppBot(driver, pacer=self.pacer, recorder=self.recorder)
+        self.bot.open_whatsapp()
+
+    def wait_for_login(self):
+        """Aguarda o login no WhatsApp já aberto (bloqueante)"""
+        if not self.bot.wait_for_login():
+            raise RuntimeError(f"Falha no login da conta '{self.account}'")
+
+    def start(self):
+        """Abre o navegador e aguarda o login (bloqueante)"""
+        self.launch()
+        self.wait_for_login()
+
+    def stop(self):
+        """Fecha o navegador (bloqueante)"""
+        self.bot = None
+        self.worker = None
+        self.browser_manager.stop()
+
+    def restart(self):
+        """Reinicia o navegador da sessão (bloqueante)"""
+        self.launch(restart=True)
+        self.wait_for_login()
+
+
+class Orchestrator:
+    """
+    Supervisor assíncrono das sessões
+
+    O loop de eventos só coordena: timers da mensagem diária, fila
+    compartilhada, verificações de saúde e o endpoint de métricas. As
+    operações do Selenium rodam no executor de cada sessão, limitadas a
+    max_concurrency operações simultâneas no processo.
+    """
+
+    def __init__(self, sessions, queue=None, config=None, messages_dir=None, max_concurrency=2,
+                 metrics_host="127.0.0.1", metrics_port=8765, health_interval=60,
+                 idle_sleep=5, shutdown_timeout=120, max_failed_probes=3):
+        """
+        Inicializa o orquestrador
+
+        Args:
+            sessions: Lista de Session
+            queue: JobQueueBackend compartilhado (opcional)
+            config: Config usado para registrar o último envio diário por conta
+            messages_dir: Diretório das mensagens diárias
+            max_concurrency: Operações do navegador simultâneas no processo
+            metrics_host: Endereço do endpoint de métricas
+            metrics_port: Porta do endpoint de métricas (0/None = desativado)
+            health_interval: Intervalo entre verificações de saúde (segundos)
+            idle_sleep: Espera quando a sessão não tem trabalho
+            shutdown_timeout: Tempo máximo para terminar envios ao encerrar
+            max_failed_probes: Verificações falhas seguidas antes de reiniciar
+        """
+        self.sessions = list(sessions)
+        self.queue = queue
+        self.config = config
+        self.messages_dir = messages_dir
+        self.max_concurrency = max_concurrency
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.health_interval = health_interval
+        self.idle_sleep = idle_sleep
+        self.shutdown_timeout = shutdown_timeout
+        self.max_failed_probes = max_failed_probes
+
+        self.loop = None
+        self.stopping = None
+        self.slots = None
+        self.restarting = {}
+        self.inflight = 0
+        self.queue_stats = {}
+        self.started = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Execução das operações bloqueantes
+
+    async def call(self, session, func, *args, slot=True):
+        """
+        Executa uma operação bloqueante na thread da sessão
+
+        Operações que ainda esperavam vaga quando o encerramento foi pedido
+        não começam; as que já estão rodando terminam normalmente.
+
+        Args:
+            slot: Ocupar uma vaga de concorrência. Esperas longas que quase
+                não usam o navegador (login) rodam sem vaga para não travar
+                as outras sessões
+
+        Returns:
+            Resultado da função, ou None se não foi executada
+        """
+        if not slot:
+            return await self._execute(session, func, *args)
+        async with self.slots:
+            return await self._execute(session, func, *args)
+
+    async def _execute(self, session, func, *args):
+        """Roda a operação no executor da sessão e contabiliza as métricas"""
+        if self.stopping.is_set():
+            return None
+        self.inflight += 1
+        session.busy = True
+        started = time.perf_counter()
+        try:
+            return await self.loop.run_in_executor(session.executor, functools.partial(func, *args))
+        except Exception:
+            session.op_errors += 1
+            raise
+        finally:
+            self.inflight -= 1
+            session.busy = False
+            session.ops += 1
+            session.op_seconds += time.perf_counter() - started
+
+    async def _sleep(self, seconds):
+        """Espera, acordando imediatamente se o encerramento for pedido"""
+        try:
+            await asyncio.wait_for(self.stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Sessões
+
+    async def _start_session(self, session, restart=False):
+        """Inicia (ou reinicia) o navegador da sessão"""
+        session.state = "starting"
+        try:
+            # Abrir o navegador ocupa vaga; a espera do login (até 120s) não
+            await self.call(session, session.launch, restart)
+            if self.stopping.is_set():
+                return False
+            await self.call(session, session.wait_for_login, slot=False)
+        except Exception as e:
+            logger.error(f"[{session.account}] Erro ao iniciar sessão: {e}")
+            session.state = "down"
+            return False
+        if self.stopping.is_set():
+            return False
+
+        if self.queue is not None:
+            session.worker = QueueWorker(self.queue, session.bot, [session.account])
+        session.state = "ready"
+        session.failed_probes = 0
+        logger.info(f"[{session.account}] Sessão pronta")
+        return True
+
+    def _daily_due(self, session):
+        """Verifica se a mensagem diária da sessão deve sair agora"""
+        if not session.group_name or not session.send_time or self.config is None:
+            return False
+        if datetime.now().strftime("%H:%M") < session.send_time:
+            return False
+        if time.monotonic() < session.daily_retry_at:
+            return False
+        return self.config.should_send_today(session.account)
+
+    async def _send_daily(self, session):
+        """Envia a mensagem diária da sessão"""
+        logger.info(f"[{session.account}] Enviando mensagem diária para '{session.group_name}'")
+        success = await self.call(session, session.bot.send_daily_message,
+                                  session.group_name, self.messages_dir)
+        if success:
+            session.daily_sent += 1
+            self.config.update_last_send_date(session.account)
+        else:
+            # Nova tentativa em 5 minutos, sem travar a fila da sessão
+            session.daily_retry_at = time.monotonic() + 300
+            logger.error(f"[{session.account}] Falha na mensagem diária, nova tentativa em 5 min")
+        return success
+
+    async def _session_loop(self, session):
+        """Loop de trabalho de uma sessão: timer diário e fila compartilhada"""
+        await self._start_session(session)
+
+        while not self.stopping.is_set():
+            if session.state != "ready":
+                await self._sleep(self.idle_sleep)
+                continue
+
+            processed = False
+            try:
+                if self._daily_due(session):
+                    processed = await self._send_daily(session)
+                elif session.worker is not None:
+                    processed = await self.call(session, session.worker.run_once)
+                    if processed:
+                        session.jobs += 1
+            except Exception as e:
+                logger.error(f"[{session.account}] Erro na sessão: {e}", exc_info=True)
+
+            if not processed:
+                await self._sleep(self.idle_sleep)
+
+    async def _probe(self, session):
+        """
+        Verifica se a sessão responde e continua logada
+
+        Não ocupa uma vaga de concorrência e só roda com a sessão ociosa (um
+        envio em andamento já revela um navegador com problema); um
+        navegador travado estoura o timeout.
+        """
+        bot = session.bot
+        future = self.loop.run_in_executor(session.executor, bot.is_logged_in)
+        try:
+            return await asyncio.wait_for(future, self.health_interval)
+        except Exception:
+            return False
+
+    async def _health_loop(self):
+        """Verificações de saúde periódicas, reinício de sessões e relatório de CPU"""
+        last_report = time.monotonic()
+        while not self.stopping.is_set():
+            await self._sleep(self.health_interval)
+            if self.stopping.is_set():
+                break
+
+            for session in self.sessions:
+                if session.state == "ready" and not session.busy:
+                    if await self._probe(session):
+                        session.failed_probes = 0
+                    else:
+                        session.failed_probes += 1
+                        logger.warning(f"[{session.account}] Verificação de saúde falhou "
+                                       f"({session.failed_probes}/{self.max_failed_probes})")
+
+                if session.state == "down" or session.failed_probes >= self.max_failed_probes:
+                    if self.stopping.is_set():
+                        break
+                    self._restart_in_background(session)
+
+            if self.queue is not None:
+                try:
+                    self.queue_stats = await self.loop.run_in_executor(None, self.queue.stats)
+                except Exception as e:
+                    logger.warning(f"Erro ao ler estatísticas da fila: {e}")
+
+            if time.monotonic() - last_report >= 3600:
+                logger.info(f"Uso de CPU do processo: {self.cpu_usage():.1%} de um núcleo")
+                last_report = time.monotonic()
+
+    def _restart_in_background(self, session):
+        """
+        Reinicia a sessão em uma tarefa separada
+
+        O reinício (login de até 120s) não segura as verificações de saúde
+        das outras sessões; uma sessão só tem um reinício por vez.
+        """
+        task = self.restarting.get(session.account)
+        if task is not None and not task.done():
+            return
+        logger.warning(f"[{session.account}] Reiniciando sessão")
+        session.restarts += 1
+        session.state = "starting"
+        self.restarting[session.account] = asyncio.ensure_future(
+            self._start_session(session, restart=True)
+        )
+
+    # ------------------------------------------------------------------
+    # Métricas
+
+    def cpu_usage(self):
+        """Fração de um núcleo usada pelo processo desde o início"""
+        elapsed = time.monotonic() - self.started
+        return time.process_time() / elapsed if elapsed > 0 else 0.0
+
+    @staticmethod
+    def _label(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+    def render_metrics(self):
+        """
+        Métricas no formato texto do Prometheus
+
+        Returns:
+            str: Corpo da resposta de /metrics
+        """
+        lines = [
+            f"wpp_uptime_seconds {time.monotonic() - self.started:.1f}",
+            f"wpp_process_cpu_seconds_total {time.process_time():.3f}",
+            f"wpp_inflight_operations {self.inflight}",
+        ]
+        for session in self.sessions:
+            label = f'account="{self._label(session.account)}"'
+            lines += [
+                f"wpp_session_up{{{label}}} {int(session.state == 'ready')}",
+                f"wpp_session_restarts_total{{{label}}} {session.restarts}",
+                f"wpp_session_operations_total{{{label}}} {session.ops}",
+                f"wpp_session_operation_errors_total{{{label}}} {session.op_errors}",
+                f"wpp_session_operation_seconds_total{{{label}}} {session.op_seconds:.3f}",
+                f"wpp_session_jobs_total{{{label}}} {session.jobs}",
+                f"wpp_session_daily_sent_total{{{label}}} {session.daily_sent}",
+            ]
+        for status, count in sorted(self.queue_stats.items()):
+            lines.append(f'wpp_queue_jobs{{status="{self._label(status)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def health(self):
+        """
+        Estado das sessões
+
+        Returns:
+            dict: {'ok': bool, 'sessions': {conta: estado}}
+        """
+        states = {session.account: session.state for session in self.sessions}
+        return {'ok': all(state == "ready" for state in states.values()), 'sessions': states}
+
+    async def _handle_http(self, reader, writer):
+        """Atende GET /metrics e GET /health"""
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while True:
+                header = await asyncio.wait_for(reader.readline(), 5)
+                if header in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request.decode("latin-1").split()
+            path = parts[1] if len(parts) > 1 else "/"
+            if path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.render_metrics()
+            elif path == "/health":
+                health = self.health()
+                status = "200 OK" if health['ok'] else "503 Service Unavailable"
+                content_type, body = "application/json", json.dumps(health, ensure_ascii=False)
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "não encontrado\n"
+
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                + payload
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Erro no endpoint de métricas: {e}")
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+
+    def request_stop(self):
+        """Pede o encerramento: os envios em andamento terminam antes"""
+        if not self.stopping.is_set():
+            logger.info("Encerramento solicitado, terminando envios em andamento...")
+            self.stopping.set()
+
+    def _install_signal_handlers(self):
+        """SIGTERM/SIGINT encerram de forma limpa"""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                self.loop.add_signal_handler(sig, self.request_stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows: o loop não suporta sinais, o handler só agenda o stop
+                signal.signal(sig, lambda *_: self.loop.call_soon_threadsafe(self.request_stop))
+
+    async def _stop_session(self, session):
+        """Fecha o navegador na thread da sessão, depois da operação atual"""
+        try:
+            await asyncio.wait_for(self.loop.run_in_executor(session.executor, session.stop), 30)
+        except asyncio.TimeoutError:
+            logger.warning(f"[{session.account}] Sessão travada, fechando o navegador à força")
+            await self.loop.run_in_executor(None, session.browser_manager.stop)
+        session.state = "stopped"
+        session.executor.shutdown(wait=False)
+
+    async def run(self):
+        """Executa até SIGTERM/SIGINT ou request_stop()"""
+        self.loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self.started = time.monotonic()
+        self._install_signal_handlers()
+
+        server = None
+        if self.metrics_port:
+            server = await asyncio.start_server(self._handle_http, self.metrics_host, self.metrics_port)
+            logger.info(f"Métricas em http://{self.metrics_host}:{self.metrics_port}/metrics")
+
+        logger.info(f"Orquestrando {len(self.sessions)} sessão(ões), "
+                    f"até {self.max_concurrency} operação(ões) simultânea(s)")
+        tasks = [asyncio.ensure_future(self._session_loop(session)) for session in self.sessions]
+        tasks.append(asyncio.ensure_future(self._health_loop()))
+
+        try:
+            await self.stopping.wait()
+        finally:
+            tasks += [task for task in self.restarting.values() if not task.done()]
+            _done, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                logger.warning("Tarefa não terminou no prazo de encerramento, cancelando")
+                task.cancel()
+
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+
+            await asyncio.gather(*(self._stop_session(session) for session in self.sessions))
+            logger.info(f"Orquestrador encerrado (CPU média: {self.cpu_usage():.1%} de um núcleo)")
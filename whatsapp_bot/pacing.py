@@ -0,0 +1,188 @@
+"""
+Módulo de controle de ritmo de envio por conta
+"""
+
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class PacingController:
+    """
+    Token bucket com taxa adaptativa
+
+    A taxa sobe aos poucos enquanto as confirmações (ack) chegam rápido e cai
+    forte com acks lentos, erros ou avisos de bloqueio do WhatsApp.
+    """
+
+    def __init__(self, account, min_per_minute=2, max_per_minute=20, burst=3,
+                 fast_ack=2.0, slow_ack=6.0, throttle_pause=300, state_path=None):
+        """
+        Inicializa o controlador
+
+        Args:
+            account: Identificador da conta (ex: caminho do perfil)
+            min_per_minute: Taxa mínima de envios por minuto
+            max_per_minute: Taxa máxima de envios por minuto
+            burst: Quantidade de envios permitidos em sequência
+            fast_ack: Ack abaixo deste tempo (s) aumenta a taxa
+            slow_ack: Ack acima deste tempo (s) reduz a taxa
+            throttle_pause: Pausa (s) ao detectar aviso de bloqueio
+            state_path: Arquivo para manter a taxa entre execuções (opcional)
+        """
+        self.account = account
+        self.min_rate = min_per_minute / 60.0
+        self.max_rate = max_per_minute / 60.0
+        self.burst = burst
+        self.fast_ack = fast_ack
+        self.slow_ack = slow_ack
+        self.throttle_pause = throttle_pause
+        self.state_path = Path(state_path) if state_path else None
+
+        self.rate = self.min_rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.ack_average = None
+        self.sent = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.load_state()
+
+    def load_state(self):
+        """Recupera a última taxa conhecida da conta"""
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                rate = json.load(f).get('rate_per_minute')
+            if rate:
+                self.rate = min(self.max_rate, max(self.min_rate, rate / 60.0))
+                logger.info(f"Ritmo inicial de {self.account}: {self.per_minute:.1f} envios/min")
+        except Exception as e:
+            logger.warning(f"Erro ao carregar estado de ritmo: {e}")
+
+    def save_state(self):
+        """Grava a taxa atual da conta"""
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump({'account': self.account, 'rate_per_minute': self.per_minute}, f)
+        except Exception as e:
+            logger.warning(f"Erro ao salvar estado de ritmo: {e}")
+
+    @property
+    def per_minute(self):
+        """Taxa atual em envios por minuto"""
+        return self.rate * 60.0
+
+    def _refill(self, now):
+        """Acrescenta as fichas acumuladas desde a última atualização"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Aguarda até haver uma ficha disponível e a consome
+
+        Returns:
+            float: Tempo esperado em segundos
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                else:
+                    delay = (1.0 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def _set_rate(self, rate, reason):
+        """Ajusta a taxa dentro dos limites"""
+        previous = self.per_minute
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        if abs(self.per_minute - previous) >= 0.05:
+            logger.info(f"Ritmo {previous:.1f} → {self.per_minute:.1f} envios/min ({reason})")
+
+    def record_ack(self, latency):
+        """
+        Registra o tempo até a confirmação de um envio
+
+        Args:
+            latency: Segundos entre o envio e o ack do servidor
+        """
+        with self.lock:
+            self.sent += 1
+            if self.ack_average is None:
+                self.ack_average = latency
+            else:
+                self.ack_average = 0.7 * self.ack_average + 0.3 * latency
+
+            if self.ack_average <= self.fast_ack:
+                # Aumento aditivo (5% da taxa máxima); redução multiplicativa
+                step = max(self.max_rate * 0.05, 1 / 60.0)
+                self._set_rate(self.rate + step, f"ack {self.ack_average:.1f}s")
+            elif self.ack_average >= self.slow_ack:
+                self._set_rate(self.rate * 0.7, f"ack lento {self.ack_average:.1f}s")
+        self.save_state()
+
+    def record_error(self, latency=None):
+        """
+        Registra uma falha de envio (reduz a taxa pela metade)
+
+        Args:
+            latency: Tempo esperado sem ack (timeout); entra na média de ack
+                para que a taxa não volte a subir logo no próximo ack rápido
+        """
+        with self.lock:
+            self.errors += 1
+            if latency is not None:
+                if self.ack_average is None:
+                    self.ack_average = latency
+                else:
+                    self.ack_average = 0.7 * self.ack_average + 0.3 * latency
+            self._set_rate(self.rate * 0.5, "falha no envio")
+        self.save_state()
+
+    def record_throttle(self):
+        """Registra um aviso de bloqueio: taxa mínima e pausa"""
+        with self.lock:
+            self.errors += 1
+            self._set_rate(self.min_rate, "aviso de bloqueio")
+            self.tokens = 0.0
+            self.paused_until = time.monotonic() + self.throttle_pause
+        logger.warning(f"Aviso de bloqueio detectado, pausando envios por {self.throttle_pause}s")
+        self.save_state()
+
+
+# Um controlador por conta no processo
+_pacers = {}
+_pacers_lock = threading.Lock()
+
+
+def get_pacer(account, **kwargs):
+    """
+    Retorna o controlador de ritmo da conta, criando se necessário
+
+    Args:
+        account: Identificador da conta (ex: caminho do perfil)
+        **kwargs: Parâmetros do PacingController na criação
+
+    Returns:
+        PacingController
+    """
+    with _pacers_lock:
+        if account not in _pacers:
+            _pacers[account] = PacingController(account, **kwargs)
+        return _pacers[account]
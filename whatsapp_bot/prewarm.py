@@ -0,0 +1,254 @@
+"""
+Módulo de envio pré-aquecido no horário exato
+
+Tudo que é lento (abrir o navegador, login, pesquisar as conversas e
+digitar o texto) acontece antes do horário. No horário só resta abrir cada
+conversa pela lista lateral e apertar Enter, em rajada: sem esperar o
+controlador de ritmo nem o ack de cada conversa, que são conferidos depois
+que todas receberam.
+
+No --serve a preparação é feita uma conversa por vez, intercalada com os
+outros jobs, e só os últimos COMMIT_GUARD_SECONDS antes do horário ficam
+reservados para o envio.
+"""
+
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+
+from .errors import ChatUnavailableError, UnconfirmedSendError
+
+logger = logging.getLogger(__name__)
+
+# Segundos antes do horário em que a sessão persistente para de iniciar
+# outros jobs e espera só pelo envio
+COMMIT_GUARD_SECONDS = 5
+
+
+def deadline_for(send_time, now=None):
+    """
+    Converte "HH:MM" no datetime de hoje
+
+    Args:
+        send_time: Horário no formato HH:MM
+        now: Data de referência (padrão: agora)
+
+    Returns:
+        datetime: Horário de envio de hoje
+    """
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in send_time.split(":"))
+    return now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def prewarm_start(deadline, lead_seconds):
+    """Instante em que a preparação deve começar"""
+    return deadline - timedelta(seconds=lead_seconds)
+
+
+def sleep_until(moment):
+    """
+    Dorme até o instante informado (datetime)
+
+    Dorme em passos de até 1 s e termina os últimos milissegundos em laço
+    curto, porque time.sleep pode atrasar ~15 ms no Windows.
+    """
+    while True:
+        remaining = (moment - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        if remaining > 0.05:
+            time.sleep(min(remaining - 0.03, 1.0))
+        else:
+            time.sleep(0)
+
+
+class PrewarmedSend:
+    """Envio para várias conversas preparado antes do horário"""
+
+    def __init__(self, bot, targets, message_data, deadline, skew_log=None, on_sent=None):
+        """
+        Inicializa o envio
+
+        Args:
+            bot: WhatsAppBot já logado
+            targets: Nomes das conversas/grupos
+            message_data: Mensagem de get_message_for_today
+            deadline: datetime do envio
+            skew_log: Arquivo JSONL para registrar o atraso de cada envio (opcional)
+            on_sent: Chamado com o nome de cada conversa que recebeu (opcional)
+        """
+        self.bot = bot
+        self.targets = list(targets)
+        self.message_data = message_data
+        self.deadline = deadline
+        self.skew_log = skew_log
+        self.on_sent = on_sent
+        self.job = f"{deadline:%Y-%m-%d %H:%M}"
+        self.ready = []
+        self.results = []
+        # Outros jobs rodaram entre a preparação e o envio (conversa aberta,
+        # pesquisa e rascunhos podem ter mudado)
+        self.interrupted = False
+
+        # Só texto pode ficar pronto como rascunho; imagens e sequências são
+        # enviadas no horário com as conversas já verificadas
+        self.draft_mode = bool(
+            message_data.get('text') and not message_data.get('image') and not message_data.get('parts')
+        )
+
+    def prepare_steps(self):
+        """
+        Gerador que prepara uma conversa por passo
+
+        Cada passo abre uma conversa e deixa o texto como rascunho (ou só
+        verifica a conversa). A sessão persistente executa um passo por volta
+        do laço, intercalado com os outros jobs.
+
+        Yields:
+            bool: True se a conversa ficou pronta
+        """
+        mode = "rascunho" if self.draft_mode else "verificação"
+        logger.info(f"Preparando {len(self.targets)} conversa(s) para {self.deadline:%H:%M} ({mode})")
+
+        for target in self.targets:
+            try:
+                if not self.bot.search_group(target):
+                    logger.error(f"'{target}' não encontrada, será ignorada")
+                    self._log(target, None, False, "conversa não encontrada")
+                    yield False
+                    continue
+                if self.draft_mode and not self.bot.fill_draft(self.message_data['text']):
+                    self._log(target, None, False, "falha ao escrever rascunho")
+                    yield False
+                    continue
+            except ChatUnavailableError as e:
+                logger.error(f"'{target}' será ignorada: {e.reason}")
+                self._log(target, None, False, e.reason)
+                yield False
+                continue
+            self.ready.append(target)
+            yield True
+
+        # Lista lateral completa para abrir as conversas sem pesquisar
+        self.bot.clear_search()
+
+        # A última conversa preparada já está aberta: ela vai primeiro
+        self.ready.reverse()
+        logger.info(f"{len(self.ready)} conversa(s) pronta(s), aguardando {self.deadline:%H:%M:%S}")
+
+    def prepare(self):
+        """
+        Prepara todas as conversas de uma vez
+
+        Returns:
+            int: Quantidade de conversas prontas
+        """
+        for _ in self.prepare_steps():
+            pass
+        return len(self.ready)
+
+    def commit(self):
+        """
+        Envia para todas as conversas preparadas a partir do horário
+
+        Primeiro envia para todas (rajada) e só depois confere os acks; o
+        atraso registrado é o do envio, não o do ack.
+
+        Returns:
+            list: Resultados por conversa ('target', 'ok', 'skew_ms')
+        """
+        if self.interrupted:
+            # Um job intercalado pode ter deixado uma pesquisa na lista lateral
+            self.bot.clear_search()
+        sleep_until(self.deadline)
+
+        self.bot.begin_burst()
+        fired = []
+        for target in self.ready:
+            try:
+                opened = self.bot.current_chat == target or self.bot.open_chat_fast(target)
+                if not opened:
+                    success, error = False, "falha ao abrir conversa"
+                elif self.draft_mode:
+                    # Sem rascunho (ex: apagado por um envio de outro job nesta
+                    # conversa) nada foi enviado: enviar o texto direto
+                    success = self.bot.commit_draft(target) or self.bot.send_message_data(self.message_data)
+                    error = None if success else "falha no envio"
+                else:
+                    success = self.bot.send_message_data(self.message_data)
+                    error = None if success else "falha no envio"
+            except Exception as e:
+                success, error = False, str(e)
+
+            if success:
+                fired.append((target, datetime.now()))
+            else:
+                self._log(target, datetime.now(), False, error)
+
+        try:
+            acks = self.bot.collect_acks()
+        except Exception as e:
+            logger.warning(f"Erro ao conferir os acks: {e}")
+            acks = {}
+        for target, sent_at in fired:
+            ack = acks.get(target)
+            if ack is False:
+                self._log(target, sent_at, False, "WhatsApp indicou falha no envio")
+            else:
+                # Sem ack a mensagem pode ter sido entregue: conta como
+                # enviada para não repetir
+                self._log(target, sent_at, True, None if ack else UnconfirmedSendError.reason)
+
+        sent = [r for r in self.results if r['ok']]
+        if sent:
+            skews = [r['skew_ms'] for r in sent]
+            logger.info(
+                f"Envio de {self.job}: {len(sent)}/{len(self.targets)} conversa(s), "
+                f"atraso de {min(skews):.0f} a {max(skews):.0f} ms"
+            )
+        return self.results
+
+    def run(self):
+        """
+        Prepara e envia
+
+        Returns:
+            bool: True se todas as conversas receberam a mensagem
+        """
+        if self.prepare():
+            if datetime.now() > self.deadline:
+                logger.warning("Preparação terminou depois do horário; aumente prewarm_lead_seconds")
+            self.commit()
+        # Cada conversa tem exatamente um resultado (preparação ou envio)
+        return all(r['ok'] for r in self.results)
+
+    def _log(self, target, sent_at, success, error=None):
+        """Registra o resultado e o atraso de uma conversa"""
+        skew_ms = (sent_at - self.deadline).total_seconds() * 1000 if sent_at else None
+        result = {
+            'job': self.job,
+            'target': target,
+            'scheduled': self.deadline.isoformat(timespec='seconds'),
+            'sent_at': sent_at.isoformat(timespec='milliseconds') if sent_at else None,
+            'skew_ms': round(skew_ms, 1) if skew_ms is not None else None,
+            'mode': "draft" if self.draft_mode else "direct",
+            'ok': success,
+            'error': error,
+        }
+        self.results.append(result)
+        if success and self.on_sent:
+            self.on_sent(target)
+        if success:
+            note = f" ({error})" if error else ""
+            logger.info(f"'{target}' enviado com atraso de {skew_ms:.0f} ms{note}")
+        elif sent_at:
+            logger.error(f"'{target}' falhou: {error}")
+
+        if self.skew_log:
+            try:
+                with open(self.skew_log, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.warning(f"Erro ao gravar atraso de envio: {e}")
@@ -0,0 +1,172 @@
+"""
+Módulo de manutenção do perfil do navegador
+"""
+
+import os
+import shutil
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Diretórios descartáveis por navegador (relativos à raiz do perfil).
+# A sessão do WhatsApp fica em IndexedDB / Local Storage e NÃO entra aqui.
+PRUNABLE_DIRS = {
+    "chrome": [
+        "ShaderCache",
+        "GrShaderCache",
+        "GraphiteDawnCache",
+        "Crashpad",
+        "BrowserMetrics",
+        "component_crx_cache",
+        "Default/Cache",
+        "Default/Code Cache",
+        "Default/GPUCache",
+        "Default/DawnCache",
+        "Default/DawnGraphiteCache",
+        "Default/Media Cache",
+        "Default/Service Worker/CacheStorage",
+        "Default/Service Worker/ScriptCache",
+    ],
+    "firefox": [
+        "cache2",
+        "startupCache",
+        "shader-cache",
+        "thumbnails",
+        "crashes",
+        "minidumps",
+        "saved-telemetry-pings",
+    ],
+}
+PRUNABLE_DIRS["edge"] = PRUNABLE_DIRS["chrome"]
+
+# Arquivos de trava criados enquanto o navegador está aberto
+LOCK_FILES = ["SingletonLock", "lockfile", "parent.lock", "lock"]
+
+
+def get_profile_stats(profile_path):
+    """
+    Calcula tamanho e quantidade de arquivos do perfil
+
+    Args:
+        profile_path: Caminho para o perfil do navegador
+
+    Returns:
+        dict: Dicionário com 'size' (bytes) e 'files'
+    """
+    size = 0
+    files = 0
+    for root, _dirs, names in os.walk(profile_path):
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                continue
+    return {'size': size, 'files': files}
+
+
+def format_size(size):
+    """Formata um tamanho em bytes para leitura humana"""
+    for unit in ["B", "KB", "MB"]:
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def is_profile_in_use(profile_path):
+    """
+    Verifica se o perfil está aberto por algum navegador
+
+    Args:
+        profile_path: Caminho para o perfil do navegador
+
+    Returns:
+        bool: True se houver uma trava ativa no perfil
+    """
+    for name in LOCK_FILES:
+        lock = Path(profile_path) / name
+        if not (lock.exists() or lock.is_symlink()):
+            continue
+
+        # No Windows o navegador mantém o arquivo aberto em modo exclusivo
+        if os.name == "nt":
+            try:
+                with open(lock, "a"):
+                    pass
+                continue
+            except OSError:
+                return True
+
+        # No Linux/macOS o SingletonLock é um symlink "host-pid"
+        if lock.is_symlink():
+            target = os.readlink(lock)
+            pid = target.rsplit("-", 1)[-1]
+            if pid.isdigit() and _pid_alive(int(pid)):
+                return True
+
+    return False
+
+
+def _pid_alive(pid):
+    """Verifica se um processo ainda existe"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def compact_profile(profile_path, browser_type="chrome"):
+    """
+    Remove caches e dumps do perfil preservando a sessão do WhatsApp
+
+    Deve ser executado com o navegador fechado.
+
+    Args:
+        profile_path: Caminho para o perfil do navegador
+        browser_type: Tipo de navegador (chrome, edge, firefox)
+
+    Returns:
+        dict: Estatísticas 'before', 'after' e 'removed' (lista de diretórios),
+              ou None se o perfil estiver em uso
+    """
+    profile = Path(profile_path)
+    if not profile.exists():
+        logger.warning(f"Perfil não encontrado: {profile}")
+        return None
+
+    if is_profile_in_use(profile):
+        logger.error("Perfil em uso - feche o navegador antes da manutenção")
+        return None
+
+    before = get_profile_stats(profile)
+    logger.info(
+        f"Perfil antes da manutenção: {format_size(before['size'])} "
+        f"em {before['files']} arquivos"
+    )
+
+    removed = []
+    for relative in PRUNABLE_DIRS.get(browser_type.lower(), []):
+        target = profile / relative
+        if not target.is_dir():
+            continue
+        try:
+            shutil.rmtree(target)
+            removed.append(relative)
+        except Exception as e:
+            logger.warning(f"Não foi possível remover {relative}: {e}")
+
+    after = get_profile_stats(profile)
+    logger.info(
+        f"Perfil após a manutenção: {format_size(after['size'])} "
+        f"em {after['files']} arquivos "
+        f"({format_size(before['size'] - after['size'])} liberados)"
+    )
+
+    return {'before': before, 'after': after, 'removed': removed}
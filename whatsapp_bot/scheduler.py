@@ -0,0 +1,435 @@
+"""
+Módulo de fila de jobs com prioridade para a sessão persistente
+"""
+
+import os
+import json
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .campaign import CampaignRunner
+from .errors import ChatUnavailableError, UnconfirmedSendError
+
+logger = logging.getLogger(__name__)
+
+# Classes de prioridade (menor = mais urgente)
+PRIORITIES = {"urgent": 0, "normal": 1, "bulk": 2}
+
+# SLO de espera (segundos entre entrar na fila e começar) por classe
+DEFAULT_SLO = {"urgent": 30, "normal": 600, "bulk": 3600}
+
+
+def local_deadline(value):
+    """
+    Converte um prazo para datetime local sem fuso
+
+    Os prazos são comparados com datetime.now(); um valor com fuso
+    ("2026-10-18T09:00:00-03:00" ou "...Z") é convertido para a hora local.
+
+    Args:
+        value: datetime ou texto ISO ("2026-10-18 09:00")
+
+    Returns:
+        datetime: Prazo na hora local, sem fuso
+    """
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith(("Z", "z")):
+            text = text[:-1] + "+00:00"
+        value = datetime.fromisoformat(text)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class Job:
+    """Job dividido em passos; cada passo é um envio completo"""
+
+    def __init__(self, name, steps, priority="normal", deadline=None):
+        """
+        Inicializa o job
+
+        Args:
+            name: Nome para os logs
+            steps: Iterável/gerador; cada next() executa um envio (abre a
+                   conversa e envia) e devolve True/False
+            priority: urgent, normal ou bulk
+            deadline: datetime limite para terminar (opcional)
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridade inválida: {priority}")
+
+        self.name = name
+        self.steps = iter(steps)
+        self.priority = priority
+        self.deadline = local_deadline(deadline) if deadline else None
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.sent = 0
+        self.errors = 0
+        self.preemptions = 0
+
+    def sort_key(self):
+        """Ordem na fila: prioridade, depois prazo mais próximo"""
+        deadline = self.deadline.timestamp() if self.deadline else float("inf")
+        return (PRIORITIES[self.priority], deadline)
+
+
+class SloTracker:
+    """Acompanha a latência de cada classe de prioridade em relação ao SLO"""
+
+    def __init__(self, targets=None):
+        self.targets = {**DEFAULT_SLO, **(targets or {})}
+        self.waits = {priority: [] for priority in PRIORITIES}
+        self.durations = {priority: [] for priority in PRIORITIES}
+        self.misses = {priority: 0 for priority in PRIORITIES}
+        self.deadline_misses = {priority: 0 for priority in PRIORITIES}
+
+    def record_start(self, job):
+        """Registra a espera na fila de um job que começou"""
+        wait = job.started_at - job.enqueued_at
+        self.waits[job.priority].append(wait)
+        if wait > self.targets[job.priority]:
+            self.misses[job.priority] += 1
+            logger.warning(
+                f"SLO {job.priority} violado: '{job.name}' esperou {wait:.1f}s "
+                f"(meta {self.targets[job.priority]}s)"
+            )
+
+    def record_finish(self, job):
+        """Registra a duração total e o prazo de um job concluído"""
+        self.durations[job.priority].append(job.finished_at - job.enqueued_at)
+        if job.deadline and datetime.now() > job.deadline:
+            self.deadline_misses[job.priority] += 1
+            logger.warning(f"Job '{job.name}' terminou depois do prazo {job.deadline:%H:%M:%S}")
+
+    @staticmethod
+    def _percentile(values, fraction):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self):
+        """
+        Resumo por classe
+
+        Returns:
+            dict: {prioridade: {'jobs', 'wait_p50', 'wait_p95', 'slo', 'slo_misses', ...}}
+        """
+        summary = {}
+        for priority in PRIORITIES:
+            waits = self.waits[priority]
+            summary[priority] = {
+                'jobs': len(waits),
+                'wait_p50': self._percentile(waits, 0.5),
+                'wait_p95': self._percentile(waits, 0.95),
+                'total_p95': self._percentile(self.durations[priority], 0.95),
+                'slo': self.targets[priority],
+                'slo_misses': self.misses[priority],
+                'deadline_misses': self.deadline_misses[priority],
+            }
+        return summary
+
+    def log_report(self):
+        """Grava o resumo no log"""
+        for priority, data in self.report().items():
+            if not data['jobs']:
+                continue
+            logger.info(
+                f"SLO {priority}: {data['jobs']} job(s), espera p50 {data['wait_p50']:.1f}s / "
+                f"p95 {data['wait_p95']:.1f}s (meta {data['slo']}s), "
+                f"{data['slo_misses']} violação(ões), {data['deadline_misses']} prazo(s) perdido(s)"
+            )
+
+
+class JobScheduler:
+    """
+    Fila de jobs com preempção entre envios
+
+    A cada passo é executado um envio do job de maior prioridade. Se chegar
+    um job mais urgente, o job atual é pausado no ponto seguro entre dois
+    envios e retomado depois do urgente.
+    """
+
+    def __init__(self, slo_targets=None):
+        self.queue = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.current = None
+        self.slo = SloTracker(slo_targets)
+
+    def submit(self, name, steps, priority="normal", deadline=None):
+        """
+        Coloca um job na fila (pode ser chamado de outra thread)
+
+        Returns:
+            Job: Job criado
+        """
+        job = Job(name, steps, priority, deadline)
+        with self.lock:
+            heapq.heappush(self.queue, (job.sort_key(), next(self.counter), job))
+        logger.info(f"Job '{name}' ({priority}) na fila")
+        return job
+
+    def has_pending(self):
+        """Indica se há jobs na fila"""
+        with self.lock:
+            return bool(self.queue)
+
+    def step(self):
+        """
+        Executa um envio do job mais prioritário
+
+        Returns:
+            Job: Job que avançou, ou None se a fila está vazia
+        """
+        with self.lock:
+            if not self.queue:
+                return None
+            key, order, job = heapq.heappop(self.queue)
+
+        if self.current is not None and self.current is not job and self.current.finished_at is None:
+            self.current.preemptions += 1
+            logger.info(f"Job '{self.current.name}' pausado para '{job.name}' ({job.priority})")
+        self.current = job
+
+        if job.started_at is None:
+            job.started_at = time.monotonic()
+            self.slo.record_start(job)
+            logger.info(f"Iniciando job '{job.name}' ({job.priority})")
+
+        try:
+            success = next(job.steps)
+        except StopIteration:
+            self._finish(job)
+            return job
+        except Exception as e:
+            logger.error(f"Erro no job '{job.name}': {e}", exc_info=True)
+            job.errors += 1
+            self._finish(job)
+            return job
+
+        if success:
+            job.sent += 1
+        else:
+            job.errors += 1
+
+        # Volta para a fila mantendo a ordem de chegada original
+        with self.lock:
+            heapq.heappush(self.queue, (key, order, job))
+        return job
+
+    def _finish(self, job):
+        """Marca o job como concluído"""
+        job.finished_at = time.monotonic()
+        self.slo.record_finish(job)
+        logger.info(
+            f"Job '{job.name}' concluído: {job.sent} envio(s), {job.errors} erro(s), "
+            f"{job.preemptions} pausa(s)"
+        )
+
+    def run_until_idle(self):
+        """Executa jobs até a fila esvaziar"""
+        while self.step():
+            pass
+
+
+class RetryBackoff:
+    """Tentativas de um job recorrente com espera exponencial entre falhas"""
+
+    def __init__(self, name, base_delay=60, max_delay=1800, max_attempts=5):
+        """
+        Args:
+            name: Nome para os logs
+            base_delay: Espera (s) depois da primeira falha; dobra a cada falha
+            max_delay: Espera máxima entre tentativas
+            max_attempts: Tentativas antes de desistir (até reset())
+        """
+        self.name = name
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.reset()
+
+    def reset(self):
+        """Volta a permitir tentativas imediatamente (ex: novo dia)"""
+        self.attempts = 0
+        self.next_at = 0.0
+
+    @property
+    def exhausted(self):
+        """Indica se todas as tentativas foram usadas"""
+        return self.attempts >= self.max_attempts
+
+    def ready(self):
+        """Indica se já pode tentar de novo"""
+        return not self.exhausted and time.monotonic() >= self.next_at
+
+    def failed(self):
+        """Registra uma falha e agenda a próxima tentativa"""
+        self.attempts += 1
+        if self.exhausted:
+            logger.error(f"'{self.name}' falhou {self.attempts} vez(es); sem novas tentativas")
+            return
+        delay = min(self.max_delay, self.base_delay * 2 ** (self.attempts - 1))
+        self.next_at = time.monotonic() + delay
+        logger.warning(f"'{self.name}' falhou (tentativa {self.attempts}/{self.max_attempts}); "
+                       f"nova tentativa em {delay:.0f}s")
+
+
+def chat_message_steps(bot, chat_name, text):
+    """Passo único: abrir a conversa e enviar um texto"""
+    try:
+        success = bot.search_group(chat_name) and bot.send_text_message(text)
+    except UnconfirmedSendError as e:
+        logger.warning(f"Mensagem para '{chat_name}' {e}")
+        success = True
+    yield success
+
+
+def daily_message_steps(bot, targets, messages_dir, on_sent=None, on_success=None):
+    """
+    Um passo por conversa: enviar a mensagem do dia
+
+    Args:
+        targets: Conversas que ainda não receberam a mensagem hoje
+        on_sent: Chamado com o nome de cada conversa que recebeu, para que
+            uma nova tentativa envie só às que falharam
+        on_success: Chamado quando todas receberam
+    """
+    message_data = bot.get_message_for_today(messages_dir)
+    if not message_data:
+        logger.error("Nenhuma mensagem configurada para hoje")
+        yield False
+        return
+
+    failed = []
+    for target in targets:
+        try:
+            success = bot.search_group(target) and bot.send_message_data(message_data)
+        except ChatUnavailableError as e:
+            logger.error(f"'{target}' não recebeu a mensagem diária: {e.reason}")
+            success = False
+        except UnconfirmedSendError as e:
+            # Conta como enviada para não repetir na próxima tentativa
+            logger.warning(f"Mensagem diária para '{target}' {e}")
+            success = True
+        if success and on_sent:
+            on_sent(target)
+        if not success:
+            failed.append(target)
+        yield success
+
+    if not failed and on_success:
+        on_success()
+
+
+class JobSpool:
+    """
+    Diretório de entrada de jobs para a sessão persistente
+
+    Cada arquivo .json vira um job:
+        {"priority": "urgent", "chat": "Grupo", "text": "..."}
+        {"priority": "bulk", "campaign": "contatos.csv", "template": "campanha.txt"}
+    Campo opcional "deadline": "2026-10-18 09:00" ou "2026-10-18T09:00:00"
+    (com fuso, é convertido para a hora local).
+
+    Quem cria o job deve gravar com outro nome (ex: job.json.tmp) e renomear
+    para .json no fim, para que a sessão nunca leia um arquivo pela metade.
+    Nomes temporários (.tmp, iniciados por "." ou "~") são ignorados.
+    """
+
+    # Arquivo .json que não pode ser lido é considerado ainda em gravação
+    # por este tempo antes de ser descartado como inválido
+    WRITE_GRACE_SECONDS = 10
+
+    def __init__(self, spool_dir):
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(exist_ok=True)
+        (self.spool_dir / "accepted").mkdir(exist_ok=True)
+
+    @staticmethod
+    def write(spool_dir, name, spec):
+        """
+        Grava um job no diretório de forma atômica (temporário + rename)
+
+        Args:
+            spool_dir: Diretório de entrada de jobs
+            name: Nome do job (vira <name>.json)
+            spec: Dicionário do job
+
+        Returns:
+            Path: Arquivo criado
+        """
+        spool_dir = Path(spool_dir)
+        spool_dir.mkdir(exist_ok=True)
+        path = spool_dir / f"{name}.json"
+        tmp_path = spool_dir / f".{name}.json.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(spec, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return path
+
+    def pending_files(self):
+        """Arquivos de job completos, em ordem de nome"""
+        return [path for path in sorted(self.spool_dir.glob("*.json"))
+                if not path.name.startswith((".", "~"))]
+
+    def poll(self, scheduler, bot):
+        """
+        Envia para a fila os arquivos novos do diretório
+
+        Returns:
+            int: Quantidade de jobs aceitos
+        """
+        accepted = 0
+        for path in self.pending_files():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    spec = json.load(f)
+            except ValueError as e:
+                # Escrito sem rename: pode ainda estar sendo gravado
+                if time.time() - path.stat().st_mtime < self.WRITE_GRACE_SECONDS:
+                    continue
+                logger.error(f"Job inválido {path.name}: {e}")
+                path.replace(path.with_suffix(".invalid"))
+                continue
+            except OSError as e:
+                logger.warning(f"Não foi possível ler {path.name}: {e}")
+                continue
+
+            try:
+                priority = spec.get('priority', 'normal')
+                deadline = None
+                if spec.get('deadline'):
+                    deadline = local_deadline(spec['deadline'])
+
+                if spec.get('campaign'):
+                    with open(spec['template'], 'r', encoding='utf-8') as f:
+                        template = f.read().strip()
+                    runner = CampaignRunner(bot, spec['campaign'], template,
+                                            phone_column=spec.get('phone_column', 'telefone'))
+                    steps = runner.iter_run()
+                elif spec.get('chat') and spec.get('text'):
+                    steps = chat_message_steps(bot, spec['chat'], spec['text'])
+                else:
+                    raise ValueError("informe 'chat' e 'text' ou 'campaign' e 'template'")
+
+                scheduler.submit(path.stem, steps, priority, deadline)
+                path.replace(self.spool_dir / "accepted" / path.name)
+                accepted += 1
+
+            except Exception as e:
+                logger.error(f"Job inválido {path.name}: {e}")
+                path.replace(path.with_suffix(".invalid"))
+
+        return accepted
@@ -0,0 +1,334 @@
+"""
+Módulo de gravação e replay de snapshots do DOM do WhatsApp Web
+
+O gravador salva cópias sanitizadas das telas principais durante execuções
+reais. O harness de replay abre essas cópias em um navegador headless local
+e mede, para cada seletor de xpaths.py, se ele ainda encontra o elemento e
+quanto tempo leva a busca, sem precisar de login no WhatsApp.
+"""
+
+import json
+import time
+import logging
+import statistics
+from datetime import datetime
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from . import xpaths
+from .browser import BrowserManager
+
+logger = logging.getLogger(__name__)
+
+# Copia o documento e remove tudo que é pessoal ou executável: scripts,
+# textos de mensagens e conversas, nomes, ids com telefone, imagens e o
+# token do QR Code. Atributos de interface (data-icon, data-tab,
+# aria-label dos botões) são mantidos porque são eles que os seletores usam.
+# Os estilos são mantidos (copiados para <style>) para que as verificações
+# de visível/clicável do replay valham o mesmo que na página real.
+SANITIZE_SCRIPT = r"""
+const screen = arguments[0];
+const root = document.documentElement.cloneNode(true);
+
+root.querySelectorAll('script, noscript, iframe, object, embed, link[rel="preload"], link[rel="manifest"]')
+    .forEach(function (el) { el.remove(); });
+
+// Estilos: regras legíveis viram um <style>; folhas de outra origem (sem
+// acesso às regras) ficam como <link> com o endereço absoluto
+const css = [];
+const external = [];
+Array.from(document.styleSheets).forEach(function (sheet) {
+    try {
+        css.push(Array.from(sheet.cssRules).map(function (rule) { return rule.cssText; }).join('\n'));
+    } catch (e) {
+        if (sheet.href) { external.push(sheet.href); }
+    }
+});
+root.querySelectorAll('style, link[rel="stylesheet"]').forEach(function (el) { el.remove(); });
+
+// Conteúdo privado: linhas de mensagens, lista de conversas e cabeçalho da conversa
+const privateAreas = '#main div[data-id], #pane-side, #main header, [role="listitem"], [role="row"]';
+root.querySelectorAll(privateAreas).forEach(function (area) {
+    const walker = document.createTreeWalker(area, NodeFilter.SHOW_TEXT);
+    let node;
+    while ((node = walker.nextNode())) {
+        if (node.nodeValue.trim()) { node.nodeValue = 'texto'; }
+    }
+    area.querySelectorAll('[aria-label]').forEach(function (el) { el.setAttribute('aria-label', 'rótulo'); });
+});
+
+// Texto digitado na caixa de mensagem ou de legenda
+root.querySelectorAll('[contenteditable="true"]').forEach(function (el) { el.replaceChildren(); });
+root.querySelectorAll('input').forEach(function (el) { el.removeAttribute('value'); });
+
+// Nomes de conversas viram "Conversa N" (mesmo nome → mesmo número)
+const names = {};
+let count = 0;
+root.querySelectorAll('span[title]').forEach(function (el) {
+    const title = el.getAttribute('title');
+    if (!(title in names)) { names[title] = 'Conversa ' + (++count); }
+    el.setAttribute('title', names[title]);
+});
+
+// Ids de mensagens contêm o telefone; mantém só o prefixo enviada/recebida
+let messages = 0;
+root.querySelectorAll('[data-id]').forEach(function (el) {
+    const id = el.getAttribute('data-id');
+    el.setAttribute('data-id', (id.indexOf('true_') === 0 ? 'true_' : 'false_') + 'msg' + (++messages));
+});
+
+root.querySelectorAll('[data-pre-plain-text]').forEach(function (el) { el.setAttribute('data-pre-plain-text', ''); });
+root.querySelectorAll('[data-ref]').forEach(function (el) { el.setAttribute('data-ref', 'qr'); });
+root.querySelectorAll('img, video, audio, source').forEach(function (el) {
+    el.removeAttribute('src');
+    el.removeAttribute('srcset');
+});
+root.querySelectorAll('a[href]').forEach(function (el) { el.setAttribute('href', '#'); });
+root.querySelectorAll('*').forEach(function (el) {
+    for (const attr of Array.from(el.attributes)) {
+        if (attr.name.indexOf('on') === 0) { el.removeAttribute(attr.name); }
+    }
+});
+
+const head = root.querySelector('head');
+if (head) {
+    external.forEach(function (href) {
+        const link = document.createElement('link');
+        link.setAttribute('rel', 'stylesheet');
+        link.setAttribute('href', href);
+        head.appendChild(link);
+    });
+    const style = document.createElement('style');
+    style.textContent = css.join('\n');
+    head.appendChild(style);
+    const meta = document.createElement('meta');
+    meta.setAttribute('name', 'wpp-snapshot');
+    meta.setAttribute('content', screen);
+    head.prepend(meta);
+    const charset = document.createElement('meta');
+    charset.setAttribute('charset', 'utf-8');
+    head.prepend(charset);
+}
+
+return '<!DOCTYPE html>\n' + root.outerHTML;
+"""
+
+
+class DomRecorder:
+    """Grava snapshots sanitizados das telas principais"""
+
+    def __init__(self, snapshot_dir, once_per_screen=True):
+        """
+        Inicializa o gravador
+
+        Args:
+            snapshot_dir: Diretório dos snapshots
+            once_per_screen: Gravar cada tela uma vez só por execução
+        """
+        self.snapshot_dir = Path(snapshot_dir)
+        self.snapshot_dir.mkdir(exist_ok=True)
+        self.once_per_screen = once_per_screen
+        self.recorded = set()
+
+    def capture(self, driver, screen):
+        """
+        Salva o DOM atual como <tela>_<data-hora>.html
+
+        Falhas são só registradas no log para nunca atrapalhar um envio.
+
+        Args:
+            driver: WebDriver com o WhatsApp aberto
+            screen: Nome da tela (chat_list, open_chat, media_preview, qr)
+
+        Returns:
+            Path: Arquivo gravado, ou None
+        """
+        if self.once_per_screen and screen in self.recorded:
+            return None
+
+        try:
+            html = driver.execute_script(SANITIZE_SCRIPT, screen)
+            path = self.snapshot_dir / f"{screen}_{datetime.now():%Y%m%d-%H%M%S}.html"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            self.recorded.add(screen)
+            logger.info(f"Snapshot da tela '{screen}' salvo em {path.name}")
+            return path
+        except Exception as e:
+            logger.warning(f"Erro ao gravar snapshot de '{screen}': {e}")
+            return None
+
+
+def screen_of(path):
+    """Extrai o nome da tela de um arquivo <tela>_<data-hora>.html"""
+    return Path(path).stem.rpartition("_")[0]
+
+
+class ReplayHarness:
+    """
+    Executa os seletores contra os snapshots gravados
+
+    Para cada seletor são medidos find_elements (mediana de várias buscas) e
+    as duas estratégias de espera usadas pelo bot: presença e clicável. Em
+    listas de alternativas é informada a primeira que funciona; se não for a
+    primeira da lista, o bot perde o timeout de cada alternativa anterior.
+    Elementos em que o bot clica (xpaths.CLICKED_CHECKS) só passam se
+    estiverem clicáveis com os estilos do snapshot.
+    """
+
+    # Tamanho da janela do replay (o layout do WhatsApp esconde painéis em
+    # janelas estreitas)
+    WINDOW_SIZE = (1366, 900)
+
+    def __init__(self, snapshot_dir, browser_type="chrome", runs=20, wait_timeout=2):
+        """
+        Inicializa o harness
+
+        Args:
+            snapshot_dir: Diretório com os snapshots .html
+            browser_type: Navegador usado no replay (sempre headless)
+            runs: Quantidade de buscas para calcular a mediana
+            wait_timeout: Timeout das esperas (um seletor quebrado custa isso)
+        """
+        self.snapshot_dir = Path(snapshot_dir)
+        self.browser_type = browser_type
+        self.runs = runs
+        self.wait_timeout = wait_timeout
+
+    def _time_find(self, driver, selector):
+        """Mediana em ms de find_elements e quantidade de elementos"""
+        timings = []
+        found = 0
+        for _ in range(self.runs):
+            started = time.perf_counter()
+            found = len(driver.find_elements(By.XPATH, selector))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), found
+
+    def _time_wait(self, driver, condition, selector):
+        """Tempo em ms de uma espera, ou None se estourou o timeout"""
+        started = time.perf_counter()
+        try:
+            WebDriverWait(driver, self.wait_timeout, poll_frequency=0.05).until(
+                condition((By.XPATH, selector))
+            )
+        except TimeoutException:
+            return None
+        return (time.perf_counter() - started) * 1000
+
+    def check_selector(self, driver, name, selector):
+        """
+        Mede um seletor (ou lista de alternativas) na página aberta
+
+        Returns:
+            dict: Resultado da verificação com as medições de cada alternativa
+        """
+        alternatives = selector if isinstance(selector, list) else [selector]
+        results = []
+        for xpath in alternatives:
+            find_ms, found = self._time_find(driver, xpath)
+            results.append({
+                'xpath': xpath,
+                'found': found,
+                'find_ms': round(find_ms, 2),
+                'presence_ms': None,
+                'clickable_ms': None,
+            })
+            if found:
+                for key, condition in (('presence_ms', EC.presence_of_element_located),
+                                       ('clickable_ms', EC.element_to_be_clickable)):
+                    elapsed = self._time_wait(driver, condition, xpath)
+                    results[-1][key] = round(elapsed, 2) if elapsed is not None else None
+
+        if name in xpaths.CLICKED_CHECKS:
+            usable = lambda r: r['clickable_ms'] is not None
+        else:
+            usable = lambda r: r['found']
+        matched = next((i for i, r in enumerate(results) if usable(r)), None)
+        return {
+            'check': name,
+            'ok': matched is not None,
+            'matched_index': matched,
+            'alternatives': results,
+        }
+
+    def run(self, driver=None):
+        """
+        Executa todas as verificações em todos os snapshots
+
+        Args:
+            driver: WebDriver já aberto (opcional; padrão: abre um navegador
+                headless e fecha no fim)
+
+        Returns:
+            dict: Relatório com 'ok', 'snapshots' e 'results'
+        """
+        files = sorted(self.snapshot_dir.glob("*.html"))
+        report = {'ok': True, 'snapshots': len(files), 'results': []}
+        if not files:
+            logger.error(f"Nenhum snapshot em {self.snapshot_dir}")
+            report['ok'] = False
+            return report
+
+        browser = None
+        if driver is None:
+            browser = BrowserManager(self.browser_type, minimize=False, headless=True)
+            driver = browser.start()
+        try:
+            driver.set_window_size(*self.WINDOW_SIZE)
+            for path in files:
+                screen = screen_of(path)
+                checks = xpaths.SCREEN_CHECKS.get(screen)
+                if not checks:
+                    logger.warning(f"Tela desconhecida em {path.name}, ignorando")
+                    continue
+
+                driver.get(path.resolve().as_uri())
+                for name, selector in checks:
+                    result = self.check_selector(driver, name, selector)
+                    result.update({'snapshot': path.name, 'screen': screen})
+                    report['results'].append(result)
+                    if not result['ok']:
+                        report['ok'] = False
+        finally:
+            if browser:
+                browser.stop()
+
+        return report
+
+    @staticmethod
+    def log_report(report):
+        """Grava o relatório em forma de tabela no log"""
+        for result in report['results']:
+            matched = result['matched_index']
+            if matched is None:
+                found = any(r['found'] for r in result['alternatives'])
+                problem = "elemento encontrado, mas não clicável" if found else "nenhum seletor encontrou o elemento"
+                logger.error(f"✗ {result['snapshot']} {result['check']}: {problem}")
+                continue
+
+            best = result['alternatives'][matched]
+            line = (
+                f"{result['snapshot']} {result['check']}: find {best['find_ms']:.2f}ms, "
+                f"presença {best['presence_ms']}ms, clicável {best['clickable_ms']}ms"
+            )
+            if matched:
+                logger.warning(f"⚠ {line} (alternativa {matched + 1}: {best['xpath']})")
+            else:
+                logger.info(f"✓ {line}")
+
+    def save_report(self, report, path=None):
+        """
+        Salva o relatório em JSON
+
+        Returns:
+            Path: Arquivo gravado
+        """
+        path = Path(path or self.snapshot_dir / "replay_report.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return path
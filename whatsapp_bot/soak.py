@@ -0,0 +1,723 @@
+"""
+Módulo de teste de longa duração (soak) contra uma página local
+
+Uma página que imita o WhatsApp Web (pesquisa, lista de conversas, caixa de
+mensagem e ícones de ack) é servida em 127.0.0.1, com atrasos e falhas
+aleatórios. O teste usa BrowserManager e WhatsAppBot como em produção,
+envia por um número de envios ou de horas, amostra memória, descritores
+abertos e latência ao longo do tempo e gera um relatório que aponta
+vazamentos e regressões de latência.
+"""
+
+import gc
+import os
+import json
+import time
+import random
+import logging
+import threading
+import statistics
+from array import array
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+from .browser import BrowserManager
+from .errors import ChatUnavailableError, UnconfirmedSendError
+from .pacing import PacingController
+from .whatsapp import WhatsAppBot
+
+logger = logging.getLogger(__name__)
+
+# Conversas que a página simula como indisponíveis (uma por tipo de erro)
+UNAVAILABLE_CHATS = ["Grupo Inexistente", "Grupo Admins", "Grupo Antigo"]
+
+# Página simulada. Os atrasos variam entre 0,5x e 1,5x de delay_ms e, com
+# probabilidade failure_rate, ficam 10x maiores; o ack falha (alert-msg) com
+# a mesma probabilidade. Só as últimas keep_messages mensagens ficam no DOM,
+# como na lista virtualizada do WhatsApp, então o DOM só cresce por vazamento.
+# window.lastSent guarda a conversa e o texto do último envio, para o teste
+# conferir que a mensagem chegou na conversa pedida.
+FAKE_PAGE = r"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>WhatsApp (simulado)</title>
+<style>
+body { margin: 0; display: flex; font-family: sans-serif; height: 100vh; }
+#side { width: 320px; border-right: 1px solid #ddd; overflow: auto; }
+#app-main { flex: 1; display: flex; }
+#main { flex: 1; display: flex; flex-direction: column; }
+#main .messages { flex: 1; overflow: auto; }
+[contenteditable] { border: 1px solid #999; min-height: 1.4em; padding: 4px; margin: 6px; }
+#pane-side span { display: block; padding: 8px; cursor: pointer; }
+</style>
+</head>
+<body>
+<div id="side" hidden>
+  <div contenteditable="true" data-tab="3" id="search"></div>
+  <div id="pane-side"></div>
+</div>
+<div id="app-main"></div>
+<script>
+const cfg = __CONFIG__;
+const chats = [];
+for (let i = 1; i <= cfg.chats; i++) { chats.push('Grupo ' + i); }
+chats.push('Grupo Admins', 'Grupo Antigo');
+
+const side = document.getElementById('side');
+const pane = document.getElementById('pane-side');
+const search = document.getElementById('search');
+const app = document.getElementById('app-main');
+const drafts = {};
+let current = null;
+let counter = 0;
+let searchTimer = null;
+
+function delay() {
+  const base = cfg.delay_ms * (0.5 + Math.random());
+  return Math.random() < cfg.failure_rate ? base * 10 : base;
+}
+
+function renderList(filter) {
+  pane.replaceChildren();
+  const term = filter.toLowerCase();
+  const matches = chats.filter(function (c) { return !term || c.toLowerCase().indexOf(term) !== -1; });
+  if (!matches.length) {
+    const empty = document.createElement('span');
+    empty.textContent = 'Nenhuma conversa, contato ou mensagem encontrada';
+    pane.appendChild(empty);
+    return;
+  }
+  for (const name of matches) {
+    const row = document.createElement('div');
+    row.setAttribute('role', 'listitem');
+    const title = document.createElement('span');
+    title.setAttribute('title', name);
+    title.textContent = name;
+    row.appendChild(title);
+    row.addEventListener('click', function () { openChat(name); });
+    pane.appendChild(row);
+  }
+}
+
+function sendMessage(chat, list, text) {
+  window.lastSent = { id: counter + 1, chat: chat, text: text };
+  const msg = document.createElement('div');
+  msg.className = 'message-out';
+  msg.setAttribute('data-id', 'true_simulado_' + (++counter));
+  const body = document.createElement('span');
+  body.className = 'selectable-text';
+  body.textContent = text;
+  const icon = document.createElement('span');
+  icon.setAttribute('data-icon', 'msg-time');
+  msg.append(body, icon);
+  list.appendChild(msg);
+  while (list.children.length > cfg.keep_messages) { list.firstChild.remove(); }
+  setTimeout(function () {
+    icon.setAttribute('data-icon', Math.random() < cfg.failure_rate ? 'alert-msg' : 'msg-dblcheck');
+  }, delay());
+}
+
+function renderChat(name) {
+  const old = document.querySelector('#main div[data-tab="10"]');
+  if (current && old) { drafts[current] = old.innerText; }
+  current = name;
+
+  const main = document.createElement('div');
+  main.id = 'main';
+  const header = document.createElement('header');
+  const title = document.createElement('span');
+  title.setAttribute('title', name);
+  title.textContent = name;
+  header.appendChild(title);
+  const list = document.createElement('div');
+  list.className = 'messages';
+  const footer = document.createElement('footer');
+  const notice = document.createElement('span');
+
+  if (name === 'Grupo Admins') {
+    notice.textContent = 'Somente administradores podem enviar mensagens';
+    footer.appendChild(notice);
+  } else if (name === 'Grupo Antigo') {
+    notice.textContent = 'Você não é mais participante deste grupo';
+    footer.appendChild(notice);
+  } else {
+    const composer = document.createElement('div');
+    composer.setAttribute('contenteditable', 'true');
+    composer.setAttribute('data-tab', '10');
+    composer.innerText = drafts[name] || '';
+    delete drafts[name];
+    composer.addEventListener('keydown', function (event) {
+      if (event.key !== 'Enter' || event.shiftKey) { return; }
+      event.preventDefault();
+      const text = composer.innerText.trim();
+      if (text) { sendMessage(name, list, text); }
+      composer.replaceChildren();
+    });
+    footer.appendChild(composer);
+  }
+
+  main.append(header, list, footer);
+  app.replaceChildren(main);
+}
+
+function openChat(name) {
+  setTimeout(function () { renderChat(name); }, delay());
+}
+
+search.addEventListener('input', function () {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(function () { renderList(search.innerText.trim()); }, delay());
+});
+
+// Carregamento inicial (equivale ao login já feito)
+setTimeout(function () {
+  side.hidden = false;
+  renderList('');
+  if (location.pathname === '/send') {
+    const phone = new URLSearchParams(location.search).get('phone') || '';
+    if (phone.length < 10) {
+      const invalid = document.createElement('span');
+      invalid.textContent = 'O número de telefone compartilhado por URL é inválido.';
+      app.replaceChildren(invalid);
+    } else {
+      openChat(phone);
+    }
+  }
+}, cfg.boot_ms);
+</script>
+</body>
+</html>
+"""
+
+# Último envio registrado pela página simulada ({id, chat, text} ou null)
+LAST_SENT_SCRIPT = "return window.lastSent || null;"
+
+# Dados da página lidos junto com cada amostra
+PAGE_STATS_SCRIPT = r"""
+    const memory = performance.memory;
+    return {
+        nodes: document.getElementsByTagName('*').length,
+        heap: memory ? memory.usedJSHeapSize : null
+    };
+"""
+
+# Métrica: (nome no relatório, crescimento absoluto mínimo para ser vazamento)
+LEAK_METRICS = [
+    ("python_rss_mb", 20),
+    ("python_objects", 20000),
+    ("open_fds", 10),
+    ("threads", 2),
+    ("browser_rss_mb", 100),
+    ("browser_processes", 2),
+    ("js_heap_mb", 10),
+    ("dom_nodes", 500),
+]
+
+
+class FakeWhatsAppServer:
+    """Servidor HTTP local da página simulada"""
+
+    def __init__(self, delay_ms=400, failure_rate=0.05, chats=20, keep_messages=200, boot_ms=1000):
+        """
+        Inicializa o servidor
+
+        Args:
+            delay_ms: Atraso médio da pesquisa, da abertura de conversa e do ack
+            failure_rate: Probabilidade de atraso 10x maior e de ack com falha
+            chats: Quantidade de grupos normais ("Grupo 1" a "Grupo N")
+            keep_messages: Mensagens mantidas no DOM por conversa
+            boot_ms: Tempo até a lista de conversas aparecer
+        """
+        self.page = FAKE_PAGE.replace("__CONFIG__", json.dumps({
+            'delay_ms': delay_ms,
+            'failure_rate': failure_rate,
+            'chats': chats,
+            'keep_messages': keep_messages,
+            'boot_ms': boot_ms,
+        })).encode('utf-8')
+        self.chats = [f"Grupo {i}" for i in range(1, chats + 1)]
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        """Endereço da página (sem barra no final, como WHATSAPP_URL)"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Inicia o servidor em uma porta livre"""
+        page = self.page
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if urlparse(self.path).path not in ("/", "/send"):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="soak-http", daemon=True)
+        self.thread.start()
+        logger.info(f"Página simulada em {self.url}")
+        return self.url
+
+    def stop(self):
+        """Encerra o servidor"""
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class ResourceSampler:
+    """Lê memória, descritores e processos do bot e do navegador"""
+
+    def __init__(self, browser_manager):
+        """
+        Args:
+            browser_manager: BrowserManager já iniciado
+        """
+        self.browser_manager = browser_manager
+        self.process = psutil.Process() if HAS_PSUTIL else None
+        if not HAS_PSUTIL:
+            logger.warning("psutil não instalado: memória e processos do navegador não serão medidos")
+
+    def python_rss(self):
+        """Memória residente do processo Python em bytes (ou None)"""
+        if self.process:
+            return self.process.memory_info().rss
+        try:
+            with open("/proc/self/status", 'r') as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    def open_fds(self):
+        """Descritores (ou handles no Windows) abertos pelo processo Python"""
+        if self.process:
+            if hasattr(self.process, "num_fds"):
+                return self.process.num_fds()
+            return self.process.num_handles()
+        try:
+            return len(os.listdir("/proc/self/fd"))
+        except OSError:
+            return None
+
+    def browser_processes(self):
+        """Processos do navegador abaixo do driver (chromedriver → chrome → renderers)"""
+        if not HAS_PSUTIL:
+            return []
+        try:
+            service = psutil.Process(self.browser_manager.driver.service.process.pid)
+            return service.children(recursive=True)
+        except Exception:
+            return []
+
+    def sample(self, elapsed, sends, latencies):
+        """
+        Lê uma amostra
+
+        Args:
+            elapsed: Segundos desde o início
+            sends: Envios feitos até agora
+            latencies: Latências (s) dos envios desde a amostra anterior
+
+        Returns:
+            dict: Amostra com as métricas de LEAK_METRICS e a latência do período
+        """
+        rss = self.python_rss()
+        sample = {
+            'elapsed_s': round(elapsed, 1),
+            'sends': sends,
+            'python_rss_mb': round(rss / 2 ** 20, 1) if rss is not None else None,
+            'python_objects': len(gc.get_objects()),
+            'open_fds': self.open_fds(),
+            'threads': threading.active_count(),
+            'browser_rss_mb': None,
+            'browser_processes': None,
+            'js_heap_mb': None,
+            'dom_nodes': None,
+            'latency_p50_s': round(statistics.median(latencies), 3) if latencies else None,
+        }
+
+        processes = self.browser_processes()
+        if processes:
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            sample['browser_rss_mb'] = round(total / 2 ** 20, 1)
+            sample['browser_processes'] = len(processes)
+
+        try:
+            page = self.browser_manager.driver.execute_script(PAGE_STATS_SCRIPT)
+            sample['dom_nodes'] = page['nodes']
+            if page['heap'] is not None:
+                sample['js_heap_mb'] = round(page['heap'] / 2 ** 20, 1)
+        except Exception as e:
+            logger.warning(f"Erro ao ler estatísticas da página: {e}")
+
+        return sample
+
+
+def percentile(values, fraction):
+    """Percentil por posição (values não vazio)"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def trend_per_hour(points):
+    """
+    Inclinação da reta de mínimos quadrados
+
+    Args:
+        points: Lista de (segundos, valor)
+
+    Returns:
+        float: Variação por hora, ou None com menos de 2 pontos
+    """
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return slope * 3600
+
+
+def find_leaks(samples, threshold=0.2, warmup=0.1):
+    """
+    Aponta métricas que cresceram de forma contínua
+
+    As amostras do aquecimento são ignoradas (caches do navegador, imports).
+    Uma métrica é vazamento quando a última amostra passa da primeira em mais
+    de threshold (fração) e do mínimo absoluto de LEAK_METRICS, e a
+    tendência é de alta.
+
+    Returns:
+        dict: Análise por métrica ('first', 'last', 'per_hour', 'leak')
+    """
+    steady = samples[int(len(samples) * warmup):]
+    analysis = {}
+    for metric, minimum in LEAK_METRICS:
+        points = [(s['elapsed_s'], s[metric]) for s in steady if s[metric] is not None]
+        if len(points) < 3:
+            continue
+        first, last = points[0][1], points[-1][1]
+        growth = last - first
+        per_hour = trend_per_hour(points)
+        analysis[metric] = {
+            'first': first,
+            'last': last,
+            'per_hour': round(per_hour, 2) if per_hour is not None else None,
+            'leak': bool(
+                growth > minimum and growth > abs(first) * threshold
+                and per_hour is not None and per_hour > 0
+            ),
+        }
+    return analysis
+
+
+def compare_latency(latencies, threshold=0.5, window=0.2, min_window=10):
+    """
+    Compara a latência do começo com a do fim do teste
+
+    Args:
+        latencies: Latências (s) dos envios bem-sucedidos, em ordem
+        threshold: Aumento relativo do p95 considerado regressão
+        window: Fração dos envios em cada ponta
+        min_window: Tamanho mínimo de cada ponta
+
+    Returns:
+        dict: p50/p95 do começo e do fim e 'regression', ou None se há poucos envios
+    """
+    size = max(min_window, int(len(latencies) * window))
+    if len(latencies) < size * 2:
+        return None
+
+    start, end = latencies[:size], latencies[-size:]
+    result = {
+        'window': size,
+        'start_p50_s': round(statistics.median(start), 3),
+        'start_p95_s': round(percentile(start, 0.95), 3),
+        'end_p50_s': round(statistics.median(end), 3),
+        'end_p95_s': round(percentile(end, 0.95), 3),
+    }
+    result['regression'] = result['end_p95_s'] > result['start_p95_s'] * (1 + threshold)
+    return result
+
+
+class SoakTest:
+    """
+    Envios contínuos contra a página simulada, com amostragem de recursos
+
+    Cada envio é gravado em um arquivo JSONL assim que termina; na memória
+    ficam só os contadores e as latências (array de floats), para que o
+    próprio teste não faça a memória e os objetos medidos crescerem.
+    """
+
+    def __init__(self, browser_type="chrome", sends=None, hours=None, delay_ms=400,
+                 failure_rate=0.05, sample_seconds=30, headless=True, report_dir=None):
+        """
+        Inicializa o teste
+
+        Args:
+            browser_type: chrome, edge ou firefox
+            sends: Quantidade de envios (opcional)
+            hours: Duração máxima em horas (opcional; o que terminar primeiro)
+            delay_ms: Atraso médio da página simulada
+            failure_rate: Probabilidade de atrasos longos, acks com falha e
+                          envio para uma conversa indisponível
+            sample_seconds: Intervalo entre amostras de recursos
+            headless: Executar o navegador em modo headless
+            report_dir: Pasta do relatório JSON e dos envios (padrão: pasta atual)
+        """
+        if not sends and not hours:
+            raise ValueError("Informe a quantidade de envios ou a duração do teste")
+
+        self.browser_type = browser_type
+        self.sends = sends
+        self.hours = hours
+        self.failure_rate = failure_rate
+        self.sample_seconds = sample_seconds
+        self.headless = headless
+        self.report_dir = Path(report_dir or ".")
+        self.server = FakeWhatsAppServer(delay_ms=delay_ms, failure_rate=failure_rate)
+        self.name = f"soak_{datetime.now():%Y%m%d-%H%M%S}"
+        self.sends_path = self.report_dir / f"{self.name}.sends.jsonl"
+        self.sends_file = None
+        self.samples = []
+
+        # Agregados dos envios
+        self.count = 0
+        self.sent = 0
+        self.normal = 0
+        self.failed_normal = 0
+        self.unexpected = 0
+        self.wrong_chat = 0
+        self.errors = {}
+        self.latencies = array('d')  # Envios normais bem-sucedidos, em ordem
+
+    def _pick_target(self):
+        """Conversa do próximo envio (às vezes uma indisponível)"""
+        if random.random() < self.failure_rate:
+            return random.choice(UNAVAILABLE_CHATS), True
+        return random.choice(self.server.chats), False
+
+    def _message(self, number):
+        """Texto do envio (um em cada cinco tem várias linhas)"""
+        text = f"Soak #{number} {datetime.now():%H:%M:%S}"
+        if number % 5 == 0:
+            text += "\nSegunda linha\nTerceira linha 🙂"
+        return text
+
+    @staticmethod
+    def _last_sent(bot):
+        """Último envio registrado pela página (ou None)"""
+        try:
+            return bot.driver.execute_script(LAST_SENT_SCRIPT)
+        except Exception as e:
+            logger.warning(f"Erro ao ler o último envio da página: {e}")
+            return None
+
+    def _send(self, bot, number):
+        """Faz um envio, confere em que conversa a mensagem chegou e registra"""
+        target, injected = self._pick_target()
+        before = self._last_sent(bot)
+        started = time.monotonic()
+        error = None
+        try:
+            ok = bot.search_group(target) and bot.send_text_message(self._message(number))
+            if not ok:
+                error = "falha no envio"
+        except ChatUnavailableError as e:
+            ok, error = False, e.reason
+        except UnconfirmedSendError:
+            # A página diz se chegou
+            ok = True
+        except Exception as e:
+            ok, error = False, str(e)
+        latency = time.monotonic() - started
+
+        # O que vale é a conversa que a página registrou, não o retorno do bot
+        after = self._last_sent(bot)
+        delivered = after if after and (not before or after['id'] != before['id']) else None
+        delivered_to = delivered['chat'] if delivered else None
+        wrong_chat = bool(delivered) and (delivered_to != target or f"Soak #{number} " not in delivered['text'])
+        if wrong_chat:
+            ok, error = False, "mensagem na conversa errada"
+        elif ok and not delivered:
+            ok, error = False, "mensagem não chegou"
+
+        self._record({
+            'number': number,
+            'target': target,
+            'delivered_to': delivered_to,
+            'wrong_chat': wrong_chat,
+            'ok': ok,
+            'latency_s': round(latency, 3),
+            'error': error,
+            # Conversa indisponível escolhida de propósito: o esperado é falhar
+            'injected': injected,
+        })
+
+    def _record(self, result):
+        """Grava o envio no arquivo JSONL e atualiza os agregados"""
+        if self.sends_file:
+            self.sends_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+        self.count += 1
+        if result['ok']:
+            self.sent += 1
+        if result['error']:
+            self.errors[result['error']] = self.errors.get(result['error'], 0) + 1
+        if result['wrong_chat']:
+            self.wrong_chat += 1
+        if result['injected']:
+            if result['ok']:
+                self.unexpected += 1
+        else:
+            self.normal += 1
+            if result['ok']:
+                self.latencies.append(result['latency_s'])
+            else:
+                self.failed_normal += 1
+
+    def _done(self, started):
+        """Verifica se o teste atingiu a quantidade de envios ou a duração"""
+        if self.sends and self.count >= self.sends:
+            return True
+        return bool(self.hours) and time.monotonic() - started >= self.hours * 3600
+
+    def run(self):
+        """
+        Executa o teste (Ctrl+C encerra e gera o relatório com o que foi feito)
+
+        Returns:
+            dict: Relatório (ver report)
+        """
+        self.server.start()
+        browser = BrowserManager(self.browser_type, minimize=True, headless=self.headless)
+        try:
+            self.sends_file = open(self.sends_path, 'a', encoding='utf-8', buffering=1)
+            driver = browser.start()
+            # Taxa alta: o controlador só serve para medir o ack como em produção
+            pacer = PacingController("soak", min_per_minute=600, max_per_minute=600, burst=10)
+            bot = WhatsAppBot(driver, pacer=pacer, url=self.server.url)
+            bot.open_whatsapp()
+            if not bot.wait_for_login(timeout=30):
+                raise RuntimeError("Página simulada não carregou")
+
+            sampler = ResourceSampler(browser)
+            started = time.monotonic()
+            last_sample = None
+            pending = 0
+
+            try:
+                while not self._done(started):
+                    now = time.monotonic()
+                    if last_sample is None or now - last_sample >= self.sample_seconds:
+                        self._sample(sampler, started, pending)
+                        last_sample, pending = now, len(self.latencies)
+                    self._send(bot, self.count + 1)
+            except KeyboardInterrupt:
+                logger.warning("Teste interrompido, gerando relatório parcial")
+
+            self._sample(sampler, started, pending)
+        finally:
+            browser.stop()
+            self.server.stop()
+            if self.sends_file:
+                self.sends_file.close()
+                self.sends_file = None
+
+        return self.report()
+
+    def _sample(self, sampler, started, since):
+        """Lê uma amostra com a latência dos envios a partir do índice since de latencies"""
+        sample = sampler.sample(time.monotonic() - started, self.count, self.latencies[since:])
+        self.samples.append(sample)
+        logger.info(
+            f"Amostra {len(self.samples)}: {sample['sends']} envios, "
+            f"Python {sample['python_rss_mb']} MB, navegador {sample['browser_rss_mb']} MB, "
+            f"fds {sample['open_fds']}, DOM {sample['dom_nodes']}, p50 {sample['latency_p50_s']}s"
+        )
+
+    def report(self):
+        """
+        Monta o relatório
+
+        Returns:
+            dict: 'ok', 'summary', 'leaks', 'latency', 'samples' e 'sends_file'
+        """
+        latencies = list(self.latencies)
+        leaks = find_leaks(self.samples)
+        latency = compare_latency(latencies)
+        flags = [f"vazamento: {metric}" for metric, data in leaks.items() if data['leak']]
+        if latency and latency['regression']:
+            flags.append("regressão de latência")
+        if self.wrong_chat:
+            flags.append(f"{self.wrong_chat} mensagem(ns) na conversa errada")
+        # Conversas indisponíveis devem falhar; as normais só falham pelo ack
+        # com alert-msg, na taxa injetada
+        if self.unexpected:
+            flags.append(f"{self.unexpected} envio(s) para conversa indisponível não falharam")
+        if self.normal and self.failed_normal / self.normal > self.failure_rate * 2 + 0.02:
+            flags.append(f"taxa de falhas acima da injetada ({self.failed_normal}/{self.normal})")
+
+        return {
+            'ok': not flags,
+            'flags': flags,
+            'summary': {
+                'sends': self.count,
+                'sent': self.sent,
+                'failed_normal': self.failed_normal,
+                'injected_unavailable': self.count - self.normal,
+                'wrong_chat': self.wrong_chat,
+                'duration_s': self.samples[-1]['elapsed_s'] if self.samples else 0,
+                'latency_p50_s': round(statistics.median(latencies), 3) if latencies else None,
+                'latency_p95_s': round(percentile(latencies, 0.95), 3) if latencies else None,
+                'errors': dict(self.errors),
+            },
+            'leaks': leaks,
+            'latency': latency,
+            'samples': self.samples,
+            'sends_file': str(self.sends_path),
+        }
+
+    def save_report(self, report):
+        """
+        Salva o relatório em JSON
+
+        Returns:
+            Path: Arquivo gravado
+        """
+        path = self.report_dir / f"{self.name}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return path
@@ -5,6 +5,7 @@ Módulo para interação com WhatsApp Web
 import time
 import logging
 import os
+import json
 from datetime import datetime
 from pathlib import Path
 from selenium.webdriver.common.by import By
@@ -16,6 +17,12 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import io
 from PIL import Image
 
+from . import xpaths
+from .errors import (
+    ChatUnavailableError, ChatNotFoundError, ComposerBlockedError, NotParticipantError, UnconfirmedSendError
+)
+from .incoming import OBSERVER_SCRIPT, DRAIN_SCRIPT
+
 logger = logging.getLogger(__name__)
 
 # Importar biblioteca de clipboard baseado no sistema operacional
@@ -33,20 +40,146 @@ class WhatsAppBot:
 
     WHATSAPP_URL = "https://web.whatsapp.com"
 
-    def __init__(self, driver):
+    # Espera máxima (s) pelo ack de um envio com controlador de ritmo
+    ACK_TIMEOUT = 20
+
+    # Avisos no lugar da caixa de mensagem
+    COMPOSER_FAILURES = [
+        (xpaths.ADMINS_ONLY, ComposerBlockedError),
+        (xpaths.NOT_PARTICIPANT, NotParticipantError),
+    ]
+
+    # Id e ícone de status da última mensagem enviada ("msg-time" = pendente)
+    LAST_OUTGOING_SCRIPT = r"""
+        const out = document.querySelectorAll('#main div.message-out');
+        if (!out.length) { return null; }
+        const last = out[out.length - 1];
+        const row = last.closest('[data-id]') || last.querySelector('[data-id]');
+        const icon = last.querySelector('span[data-icon^="msg-"], span[data-icon="alert-msg"]');
+        return {
+            id: row ? row.getAttribute('data-id') : null,
+            status: icon ? icon.getAttribute('data-icon') : null
+        };
+    """
+
+    # Título do cabeçalho da conversa aberta
+    OPEN_CHAT_TITLE_SCRIPT = r"""
+        const title = document.querySelector('#main header span[title]');
+        return title ? title.getAttribute('title') : null;
+    """
+
+    # Clica em um link do WhatsApp dentro da página: o WhatsApp Web abre a
+    # conversa sem recarregar (sem tratamento, o clique só navega para a URL)
+    OPEN_LINK_SCRIPT = r"""
+        const link = document.createElement('a');
+        link.href = arguments[0];
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+    """
+
+    # Avisos do WhatsApp que indicam limitação de envio
+    THROTTLE_SCRIPT = r"""
+        const dialogs = document.querySelectorAll('div[role="dialog"], [data-animate-modal-popup="true"]');
+        const phrases = ['muito rápido', 'temporariamente', 'tente novamente mais tarde',
+                         'too fast', 'temporarily', 'try again later'];
+        for (const dialog of dialogs) {
+            const text = (dialog.innerText || '').toLowerCase();
+            if (phrases.some(function (p) { return text.indexOf(p) !== -1; })) { return true; }
+        }
+        return false;
+    """
+
+    def __init__(self, driver, pacer=None, recorder=None, url=None):
         """
         Inicializa o bot do WhatsApp
 
         Args:
             driver: Instância do WebDriver do Selenium
+            pacer: PacingController da conta (opcional). Sem ele, são usadas
+                   pausas fixas após cada envio
+            recorder: DomRecorder para gravar snapshots das telas (opcional)
+            url: Endereço do WhatsApp Web (padrão: WHATSAPP_URL; o teste de
+                 soak usa uma página local)
         """
         self.driver = driver
+        self.url = url or self.WHATSAPP_URL
         self.wait = WebDriverWait(self.driver, 30)
+        self.pacer = pacer
+        self.recorder = recorder
+        # Conversa aberta e pronta para envio (None se nenhuma) e o XPath do
+        # painel dela, usado para não confundir com o painel anterior
+        self.current_chat = None
+        self.chat_scope = xpaths.ANY_OPEN_CHAT
+        # Rajada de envios já preparados (begin_burst): conversa → id da
+        # última mensagem enviada antes do envio, conferido em collect_acks
+        self.burst = None
+
+    def _record(self, screen):
+        """Grava um snapshot da tela atual se o gravador estiver ativo"""
+        if self.recorder:
+            self.recorder.capture(self.driver, screen)
+
+    def _set_chat(self, name, scope=xpaths.ANY_OPEN_CHAT):
+        """Registra a conversa aberta (name=None: nenhuma)"""
+        self.current_chat = name
+        self.chat_scope = scope if name else xpaths.ANY_OPEN_CHAT
+
+    def _wait_for_outcome(self, expected, failures, timeout=30, chat=None):
+        """
+        Espera pelo elemento esperado ou por uma tela de erro conhecida
+
+        As duas possibilidades são verificadas juntas, então um grupo
+        inexistente ou bloqueado falha assim que o aviso aparece. Os avisos
+        são verificados primeiro: se os dois estão na tela, vale o aviso.
+
+        Args:
+            expected: XPath do resultado esperado
+            failures: Lista de (XPath, classe de erro) que encerram a espera
+            timeout: Espera máxima em segundos
+            chat: Conversa informada no erro (padrão: current_chat)
+
+        Returns:
+            WebElement: Elemento esperado
+
+        Raises:
+            ChatUnavailableError: Se um dos avisos apareceu (a conversa deixa
+                                  de ser a current_chat)
+            TimeoutException: Se nada apareceu no prazo
+        """
+        def outcome(driver):
+            for xpath, error in failures:
+                if driver.find_elements(By.XPATH, xpath):
+                    return error
+            found = driver.find_elements(By.XPATH, expected)
+            return found[0] if found else False
+
+        result = WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(outcome)
+        if isinstance(result, type) and issubclass(result, ChatUnavailableError):
+            error = result(chat or self.current_chat)
+            self._set_chat(None)
+            logger.error(str(error))
+            raise error
+        return result
+
+    def wait_for_composer(self, timeout=30):
+        """
+        Retorna a caixa de mensagem da conversa aberta
+
+        Só aceita a caixa e os avisos do painel de current_chat, não os da
+        conversa anterior que ainda está sendo trocada.
+
+        Raises:
+            ComposerBlockedError: Grupo em que só administradores enviam
+            NotParticipantError: A conta saiu ou foi removida do grupo
+        """
+        failures = [(xpaths.in_chat(xpath, self.chat_scope), error) for xpath, error in self.COMPOSER_FAILURES]
+        return self._wait_for_outcome(xpaths.in_chat(xpaths.COMPOSER, self.chat_scope), failures, timeout)
 
     def open_whatsapp(self):
         """Abre o WhatsApp Web"""
         logger.info("Abrindo WhatsApp Web...")
-        self.driver.get(self.WHATSAPP_URL)
+        self.driver.get(self.url)
 
     def wait_for_login(self, timeout=120):
         """
@@ -58,13 +191,25 @@ class WhatsAppBot:
         logger.info("Aguardando login no WhatsApp Web...")
 
         try:
-            # Espera pela caixa de pesquisa aparecer (indica que está logado)
-            wait = WebDriverWait(self.driver, timeout)
-            wait.until(EC.presence_of_element_located(
-                (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')
+            deadline = time.monotonic() + timeout
+            if self.recorder:
+                # Aguarda também o QR Code para gravar a tela de login
+                element = WebDriverWait(self.driver, timeout).until(EC.any_of(
+                    EC.presence_of_element_located((By.XPATH, xpaths.SEARCH_BOX)),
+                    EC.presence_of_element_located((By.XPATH, " | ".join(xpaths.QR_CODE)))
+                ))
+                if element.tag_name == "canvas":
+                    self._record("qr")
+
+            # Espera pela caixa de pesquisa aparecer (indica que está logado),
+            # no tempo que resta do timeout
+            remaining = max(0.0, deadline - time.monotonic())
+            WebDriverWait(self.driver, remaining).until(EC.presence_of_element_located(
+                (By.XPATH, xpaths.SEARCH_BOX)
             ))
             logger.info("Login realizado com sucesso!")
             time.sleep(3)  # Pequena pausa para garantir carregamento completo
+            self._record("chat_list")
             return True
 
         except TimeoutException:
@@ -80,26 +225,43 @@ class WhatsAppBot:
 
         Returns:
             bool: True se o grupo foi encontrado e aberto
+
+        Raises:
+            ChatNotFoundError: Se a pesquisa não encontrou nenhuma conversa
         """
         logger.info(f"Buscando grupo: {group_name}")
+        self._set_chat(None)
 
         try:
-            # Clicar na caixa de pesquisa
+            # Limpar a pesquisa anterior (Ctrl+A e Backspace disparam a
+            # atualização da lista, o que clear() não faz em contenteditable)
             search_box = self.wait.until(EC.presence_of_element_located(
-                (By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')
+                (By.XPATH, xpaths.SEARCH_BOX)
             ))
-            search_box.clear()
-            time.sleep(1)
+            search_box.send_keys(Keys.CONTROL, 'a')
+            search_box.send_keys(Keys.BACKSPACE)
+
+            # "Nenhuma conversa" da pesquisa anterior não pode valer para esta
+            try:
+                WebDriverWait(self.driver, 2, poll_frequency=0.1).until_not(
+                    EC.presence_of_element_located((By.XPATH, xpaths.NO_CHATS_FOUND))
+                )
+            except TimeoutException:
+                logger.warning("Resultado da pesquisa anterior ainda na tela")
             search_box.send_keys(group_name)
-            time.sleep(2)
 
             # Clicar no primeiro resultado
-            group_xpath = f'//span[@title="{group_name}"]'
-            group = self.wait.until(EC.presence_of_element_located(
-                (By.XPATH, group_xpath)
-            ))
+            group_xpath = xpaths.CHAT_TITLE.format(name=group_name)
+            group = self._wait_for_outcome(
+                group_xpath, [(xpaths.NO_CHATS_FOUND, ChatNotFoundError)], chat=group_name
+            )
             group.click()
-            time.sleep(2)
+
+            # O painel da conversa anterior continua na tela até a troca
+            chat = xpaths.OPEN_CHAT.format(name=group_name)
+            self.wait.until(EC.presence_of_element_located((By.XPATH, chat)))
+            self._set_chat(group_name, chat)
+            self._record("open_chat")
 
             logger.info(f"Grupo '{group_name}' encontrado e aberto")
             return True
@@ -107,10 +269,202 @@ class WhatsAppBot:
         except TimeoutException:
             logger.error(f"Grupo '{group_name}' não encontrado")
             return False
+        except ChatUnavailableError:
+            raise
         except Exception as e:
             logger.error(f"Erro ao buscar grupo: {e}")
             return False
 
+    def clear_search(self):
+        """Limpa a pesquisa para a lista lateral voltar a mostrar todas as conversas"""
+        try:
+            search_box = self.driver.find_element(By.XPATH, xpaths.SEARCH_BOX)
+            search_box.send_keys(Keys.CONTROL, 'a')
+            search_box.send_keys(Keys.BACKSPACE)
+            return True
+        except Exception as e:
+            logger.warning(f"Erro ao limpar pesquisa: {e}")
+            return False
+
+    def open_chat_fast(self, chat_name, timeout=5):
+        """
+        Abre uma conversa clicando direto na lista lateral, sem pesquisar
+
+        Usa search_group se a conversa não estiver visível na lista.
+
+        Args:
+            chat_name: Nome da conversa/grupo
+            timeout: Espera máxima pelo cabeçalho da conversa aberta
+
+        Returns:
+            bool: True se a conversa foi aberta
+        """
+        rows = self.driver.find_elements(By.XPATH, xpaths.CHAT_LIST_TITLE.format(name=chat_name))
+        if not rows:
+            logger.info(f"'{chat_name}' fora da lista visível, usando pesquisa")
+            return self.search_group(chat_name)
+
+        try:
+            rows[0].click()
+            # O painel da conversa anterior ainda existe; esperar o da conversa clicada
+            chat = xpaths.OPEN_CHAT.format(name=chat_name)
+            WebDriverWait(self.driver, timeout, poll_frequency=0.05).until(
+                EC.presence_of_element_located((By.XPATH, chat))
+            )
+            self._set_chat(chat_name, chat)
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao abrir '{chat_name}': {e}")
+            self._set_chat(None)
+            return False
+
+    def fill_draft(self, text):
+        """
+        Escreve o texto na conversa aberta sem enviar (fica como rascunho)
+
+        Returns:
+            bool: True se o texto foi escrito
+        """
+        try:
+            message_box = self.wait_for_composer()
+            message_box.click()
+            self._type_lines(message_box, text)
+            return True
+        except ChatUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao escrever rascunho: {e}")
+            return False
+
+    def commit_draft(self, chat_name, timeout=1):
+        """
+        Envia o rascunho de uma conversa (Enter)
+
+        A conversa precisa ser a aberta (current_chat), e a caixa de mensagem
+        é procurada só no painel dela: o painel anterior, ainda na tela
+        durante a troca, pode ter o rascunho de outra conversa.
+
+        Args:
+            chat_name: Conversa que deve receber o rascunho
+            timeout: Espera máxima pelo WhatsApp restaurar o rascunho
+
+        Returns:
+            bool: False se a conversa não está aberta ou não tem rascunho
+        """
+        if self.current_chat != chat_name:
+            logger.error(f"'{chat_name}' não é a conversa aberta, rascunho não enviado")
+            return False
+
+        composer = xpaths.in_chat(xpaths.COMPOSER, self.chat_scope)
+        try:
+            message_box = WebDriverWait(self.driver, timeout, poll_frequency=0.05).until(
+                lambda driver: next(
+                    (box for box in driver.find_elements(By.XPATH, composer)
+                     if box.text.strip()),
+                    False
+                )
+            )
+            previous_id = self._last_outgoing_id()
+            message_box.send_keys(Keys.ENTER)
+            return self._settle(0, previous_id)
+        except TimeoutException:
+            logger.error(f"Rascunho não encontrado em '{chat_name}'")
+            return False
+        except UnconfirmedSendError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao enviar rascunho: {e}")
+            return False
+
+    def open_chat_by_phone(self, phone, link_timeout=10):
+        """
+        Abre a conversa com um número de telefone (não precisa ser contato salvo)
+
+        Com o WhatsApp já carregado, a conversa é aberta por um link dentro da
+        página, sem recarregar. A página só é carregada (/send?phone=) na
+        primeira vez ou se o link não abrir a conversa em link_timeout.
+
+        Args:
+            phone: Telefone com DDI e DDD (ex: 5511999999999)
+            link_timeout: Espera máxima pela conversa aberta pelo link
+
+        Returns:
+            bool: True se a conversa foi aberta
+
+        Raises:
+            ChatNotFoundError: Se o número não tem WhatsApp ou é inválido
+        """
+        digits = "".join(ch for ch in str(phone) if ch.isdigit())
+        logger.info(f"Abrindo conversa com: {digits}")
+        if self.current_chat == digits:
+            return True
+
+        in_page = self.is_logged_in() and self._dismiss_dialog(xpaths.INVALID_PHONE)
+        self._set_chat(None)
+
+        try:
+            if in_page:
+                try:
+                    self._open_phone(digits, link_timeout, in_page=True)
+                    return True
+                except TimeoutException:
+                    logger.warning(f"Conversa com {digits} não abriu pelo link, recarregando a página")
+            self._open_phone(digits, 30, in_page=False)
+            return True
+
+        except TimeoutException:
+            logger.error(f"Não foi possível abrir conversa com {digits}")
+            return False
+        except ChatUnavailableError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao abrir conversa: {e}")
+            return False
+
+    def _open_phone(self, digits, timeout, in_page):
+        """
+        Abre /send?phone= pelo link na página ou carregando a página
+
+        Raises:
+            ChatUnavailableError: Número inválido ou conversa bloqueada
+            TimeoutException: Se a conversa não abriu no prazo
+        """
+        url = f"{self.url}/send?phone={digits}"
+        scope = xpaths.ANY_OPEN_CHAT
+        if in_page:
+            previous = self.driver.execute_script(self.OPEN_CHAT_TITLE_SCRIPT)
+            if previous:
+                scope = xpaths.OTHER_OPEN_CHAT.format(name=previous)
+            self.driver.execute_script(self.OPEN_LINK_SCRIPT, url)
+        else:
+            self.driver.get(url)
+
+        failures = [(xpaths.INVALID_PHONE, ChatNotFoundError)] + [
+            (xpaths.in_chat(xpath, scope), error) for xpath, error in self.COMPOSER_FAILURES
+        ]
+        self._wait_for_outcome(xpaths.in_chat(xpaths.COMPOSER, scope), failures, timeout, chat=digits)
+
+        title = self.driver.execute_script(self.OPEN_CHAT_TITLE_SCRIPT)
+        self._set_chat(digits, xpaths.OPEN_CHAT.format(name=title) if title else xpaths.ANY_OPEN_CHAT)
+
+    def _dismiss_dialog(self, xpath, timeout=2):
+        """
+        Fecha com Esc um aviso que ficou aberto na tela
+
+        Returns:
+            bool: True se o aviso não está (mais) na tela
+        """
+        if not self.driver.find_elements(By.XPATH, xpath):
+            return True
+        ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.1).until_not(
+                EC.presence_of_element_located((By.XPATH, xpath))
+            )
+            return True
+        except TimeoutException:
+            return False
+
     def send_text_message(self, message):
         """
         Envia uma mensagem de texto
@@ -120,35 +474,250 @@ class WhatsAppBot:
 
         Returns:
             bool: True se a mensagem foi enviada com sucesso
+
+        Raises:
+            ComposerBlockedError, NotParticipantError: Se a conversa não aceita mensagens
         """
         logger.info("Enviando mensagem de texto...")
+        self._pace()
 
         try:
             # Encontrar a caixa de mensagem
-            message_box = self.wait.until(EC.presence_of_element_located(
-                (By.XPATH, '//div[@contenteditable="true"][@data-tab="10"]')
-            ))
+            message_box = self.wait_for_composer()
+
+            # Um rascunho deixado na conversa seria enviado junto com a mensagem
+            if message_box.text.strip():
+                logger.warning("Apagando rascunho da conversa antes de digitar")
+                message_box.send_keys(Keys.CONTROL, 'a')
+                message_box.send_keys(Keys.BACKSPACE)
 
-            # Dividir mensagem por linhas e enviar
-            lines = message.split('\n')
-            for i, line in enumerate(lines):
-                message_box.send_keys(line)
-                if i < len(lines) - 1:
-                    message_box.send_keys(Keys.SHIFT + Keys.ENTER)
+            # Digitar a mensagem (Shift+Enter entre as linhas)
+            self._type_lines(message_box, message)
 
             time.sleep(1)
 
             # Enviar mensagem
+            previous_id = self._last_outgoing_id()
             message_box.send_keys(Keys.ENTER)
-            time.sleep(2)
+            if not self._settle(2, previous_id):
+                return False
 
             logger.info("Mensagem de texto enviada com sucesso")
             return True
 
+        except (ChatUnavailableError, UnconfirmedSendError):
+            raise
         except Exception as e:
             logger.error(f"Erro ao enviar mensagem de texto: {e}")
             return False
 
+    def _pace(self):
+        """Aguarda a vez de enviar segundo o controlador de ritmo (não vale na rajada)"""
+        if self.pacer and self.burst is None:
+            waited = self.pacer.acquire()
+            if waited >= 1:
+                logger.info(f"Aguardou {waited:.1f}s pelo ritmo de envio")
+
+    def _last_outgoing_id(self):
+        """Id da última mensagem enviada na conversa aberta (antes de um novo envio)"""
+        if not self.pacer and self.burst is None:
+            return None
+        try:
+            last = self.driver.execute_script(self.LAST_OUTGOING_SCRIPT)
+        except Exception as e:
+            logger.warning(f"Não foi possível ler a última mensagem enviada: {e}")
+            return None
+        return last['id'] if last else None
+
+    def _settle(self, default_pause, previous_id=None):
+        """
+        Aguarda o envio ser concluído
+
+        Sem controlador de ritmo faz uma pausa fixa; com ele, mede o tempo até
+        o ack da nova mensagem e informa o controlador. Na rajada só registra
+        a conversa para collect_acks.
+
+        Args:
+            default_pause: Pausa sem controlador de ritmo
+            previous_id: Id da última mensagem enviada antes deste envio
+
+        Returns:
+            bool: True se a mensagem foi confirmada; False se o WhatsApp
+                marcou a mensagem com falha (não foi enviada)
+
+        Raises:
+            UnconfirmedSendError: Sem ack no prazo ou aviso de limite sem ack:
+                a mensagem pode ter sido entregue e não deve ser reenviada
+        """
+        if self.burst is not None:
+            # Em uma sequência vale o id de antes da primeira parte
+            if self.current_chat:
+                self.burst.setdefault(self.current_chat, previous_id)
+            return True
+        if not self.pacer:
+            time.sleep(default_pause)
+            return True
+
+        latency = self.wait_for_ack(previous_id, self.ACK_TIMEOUT)
+        throttled = self.detect_throttle_warning()
+        if throttled:
+            self.pacer.record_throttle()
+        if latency is False:
+            if not throttled:
+                self.pacer.record_error()
+            return False
+        if latency is None:
+            if not throttled:
+                # Sem ack no prazo: conta como ack lento, além de reduzir a taxa
+                self.pacer.record_error(self.ACK_TIMEOUT)
+            detail = "aviso de limite do WhatsApp" if throttled else f"sem ack em {self.ACK_TIMEOUT}s"
+            raise UnconfirmedSendError(detail)
+
+        if not throttled:
+            self.pacer.record_ack(latency)
+        return True
+
+    def begin_burst(self):
+        """
+        Inicia uma rajada de envios para conversas já preparadas
+
+        Até collect_acks, os envios não esperam a vez no controlador de ritmo
+        nem o ack de cada mensagem: todas as conversas recebem no horário e
+        os acks são conferidos juntos no final.
+        """
+        self.burst = {}
+
+    def collect_acks(self, timeout=None):
+        """
+        Encerra a rajada e confere o ack de cada conversa que recebeu
+
+        Reabre as conversas pela lista lateral (a aberta primeiro). O prazo
+        vale para a rajada inteira: as mensagens enviadas no começo já tiveram
+        tempo de receber o ack.
+
+        Args:
+            timeout: Prazo total (padrão: ACK_TIMEOUT)
+
+        Returns:
+            dict: Conversa → True (confirmada), False (WhatsApp indicou falha)
+                  ou None (sem confirmação no prazo)
+        """
+        burst, self.burst = self.burst or {}, None
+        deadline = time.monotonic() + (timeout or self.ACK_TIMEOUT)
+        results = {}
+
+        for chat in sorted(burst, key=lambda name: name != self.current_chat):
+            try:
+                opened = self.current_chat == chat or self.open_chat_fast(chat)
+            except ChatUnavailableError:
+                opened = False
+            if not opened:
+                logger.warning(f"Não foi possível reabrir '{chat}' para conferir o ack")
+                results[chat] = None
+                continue
+            latency = self.wait_for_ack(burst[chat], max(0.5, deadline - time.monotonic()))
+            results[chat] = None if latency is None else latency is not False
+
+        if self.pacer and burst and self.detect_throttle_warning():
+            self.pacer.record_throttle()
+        return results
+
+    def wait_for_ack(self, previous_id=None, timeout=20):
+        """
+        Mede o tempo até a mensagem enviada ser confirmada pelo servidor
+
+        Espera a mensagem nova aparecer (id diferente de previous_id) e então
+        o ack dela, para não medir o ack de uma mensagem anterior.
+
+        Args:
+            previous_id: Id da última mensagem enviada antes deste envio
+            timeout: Tempo máximo de espera em segundos
+
+        Returns:
+            float: Latência em segundos, ou None se não houve confirmação no prazo
+            False: Se o WhatsApp indicou falha no envio
+        """
+        def confirmed(driver):
+            last = driver.execute_script(self.LAST_OUTGOING_SCRIPT)
+            if not last or not last['id'] or last['id'] == previous_id:
+                return False
+            status = last['status']
+            return status if status and status != "msg-time" else False
+
+        started = time.monotonic()
+        try:
+            status = WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(confirmed)
+        except TimeoutException:
+            logger.warning(f"Mensagem sem confirmação após {timeout}s")
+            return None
+
+        if status == "alert-msg":
+            logger.error("WhatsApp indicou falha no envio da mensagem")
+            return False
+
+        latency = time.monotonic() - started
+        logger.info(f"Ack recebido em {latency:.2f}s ({status})")
+        return latency
+
+    def is_logged_in(self):
+        """
+        Verificação rápida (sem espera) de que a sessão está ativa
+
+        Returns:
+            bool: True se a lista de conversas está na tela
+        """
+        try:
+            return bool(self.driver.find_elements(By.XPATH, xpaths.SEARCH_BOX))
+        except Exception as e:
+            logger.warning(f"Navegador não respondeu à verificação: {e}")
+            return False
+
+    def detect_throttle_warning(self):
+        """Verifica se há um aviso de limitação de envio na tela"""
+        try:
+            return bool(self.driver.execute_script(self.THROTTLE_SCRIPT))
+        except Exception:
+            return False
+
+    def install_incoming_observer(self):
+        """
+        Injeta o observer de mensagens recebidas na página
+
+        Returns:
+            bool: True se o observer está ativo
+        """
+        try:
+            self.driver.execute_script(OBSERVER_SCRIPT)
+            logger.info("Observer de mensagens recebidas ativo")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao injetar observer: {e}")
+            return False
+
+    def drain_incoming_messages(self):
+        """
+        Retorna e remove as mensagens acumuladas pelo observer
+
+        Returns:
+            list: Mensagens com 'chat', 'sender', 'timestamp', 'text' e 'has_media'
+        """
+        try:
+            result = self.driver.execute_script(DRAIN_SCRIPT)
+        except Exception as e:
+            logger.error(f"Erro ao ler mensagens recebidas: {e}")
+            return []
+
+        # Página recarregada: o observer precisa ser injetado de novo
+        if result is None:
+            logger.warning("Observer não encontrado na página, reinstalando...")
+            self.install_incoming_observer()
+            return []
+
+        if result.get('dropped'):
+            logger.warning(f"{result['dropped']} mensagem(ns) descartada(s) (buffer cheio)")
+
+        return result.get('messages', [])
+
     def copy_image_to_clipboard(self, image_path):
         """
         Copia uma imagem para a área de transferência (Windows)
@@ -202,6 +771,7 @@ class WhatsAppBot:
             bool: True se a imagem foi enviada com sucesso
         """
         logger.info(f"Enviando imagem via clipboard: {image_path}")
+        self._pace()
 
         try:
             # Verificar se o arquivo existe
@@ -217,9 +787,7 @@ class WhatsAppBot:
 
             # Encontrar caixa de mensagem
             logger.info("Procurando caixa de mensagem...")
-            message_box = self.wait.until(EC.presence_of_element_located(
-                (By.XPATH, '//div[@contenteditable="true"][@data-tab="10"]')
-            ))
+            message_box = self.wait_for_composer()
 
             # Clicar na caixa de mensagem para focar
             message_box.click()
@@ -228,11 +796,7 @@ class WhatsAppBot:
             # Se houver legenda, escrever o texto primeiro (sem enviar)
             if caption:
                 logger.info("Escrevendo texto na caixa de mensagem...")
-                lines = caption.split('\n')
-                for i, line in enumerate(lines):
-                    message_box.send_keys(line)
-                    if i < len(lines) - 1:
-                        message_box.send_keys(Keys.SHIFT + Keys.ENTER)
+                self._type_lines(message_box, caption)
                 logger.info("Texto escrito, agora colando imagem...")
                 time.sleep(1)
 
@@ -248,57 +812,230 @@ class WhatsAppBot:
             # Enviar imagem sem legenda (legenda será enviada como mensagem separada depois)
             logger.info("Enviando imagem sem legenda...")
 
-            # Procurar e clicar no botão de enviar da preview
-            logger.info("Procurando botão de enviar da preview...")
-            send_button = None
-            send_selectors = [
-                '//span[@data-icon="send"]',
-                '//span[@data-testid="send"]',
-                '//button[@aria-label="Enviar"]',
-                '//div[@aria-label="Enviar"]',
-                '//span[@data-icon="send-light"]'
-            ]
-
-            for selector in send_selectors:
-                try:
-                    logger.info(f"Tentando seletor: {selector}")
-                    send_button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, selector))
-                    )
-                    if send_button:
-                        logger.info(f"Botão de enviar encontrado: {selector}")
-                        break
-                except:
-                    continue
-
-            if send_button:
-                try:
-                    # Tentar clicar com ActionChains
-                    logger.info("Clicando no botão de enviar com ActionChains")
-                    actions = ActionChains(self.driver)
-                    actions.move_to_element(send_button).click().perform()
-                    logger.info("Botão clicado via ActionChains")
-                    time.sleep(4)
-                except Exception as e:
-                    logger.warning(f"ActionChains falhou: {e}, tentando JavaScript")
-                    try:
-                        self.driver.execute_script("arguments[0].click();", send_button)
-                        logger.info("Botão clicado via JavaScript")
-                        time.sleep(4)
-                    except Exception as e2:
-                        logger.error(f"Falha ao clicar no botão: {e2}")
-                        return False
-            else:
-                logger.error("Botão de enviar não encontrado")
+            if not self.click_preview_send_button():
                 return False
 
             logger.info("Imagem enviada com sucesso")
             return True
 
+        except (ChatUnavailableError, UnconfirmedSendError):
+            raise
         except Exception as e:
             logger.error(f"Erro ao enviar imagem: {e}", exc_info=True)
             return False
 
+    def _find_clickable(self, selectors, timeout=3):
+        """
+        Retorna o primeiro elemento clicável entre os seletores informados
+
+        Args:
+            selectors: Lista de XPaths alternativos
+            timeout: Tempo máximo de espera por seletor
+
+        Returns:
+            WebElement ou None
+        """
+        for selector in selectors:
+            try:
+                logger.info(f"Tentando seletor: {selector}")
+                element = WebDriverWait(self.driver, timeout).until(
+                    EC.element_to_be_clickable((By.XPATH, selector))
+                )
+                if element:
+                    logger.info(f"Elemento encontrado: {selector}")
+                    return element
+            except:
+                continue
+        return None
+
+    def _click(self, element):
+        """Clica em um elemento com ActionChains, usando JavaScript como alternativa"""
+        try:
+            ActionChains(self.driver).move_to_element(element).click().perform()
+        except Exception as e:
+            logger.warning(f"ActionChains falhou: {e}, tentando JavaScript")
+            self.driver.execute_script("arguments[0].click();", element)
+
+    def click_preview_send_button(self):
+        """
+        Clica no botão de enviar da preview de mídia
+
+        Returns:
+            bool: True se o botão foi clicado
+        """
+        self._record("media_preview")
+        logger.info("Procurando botão de enviar da preview...")
+        send_button = self._find_clickable(xpaths.SEND_BUTTON)
+
+        if not send_button:
+            logger.error("Botão de enviar não encontrado")
+            return False
+
+        try:
+            previous_id = self._last_outgoing_id()
+            self._click(send_button)
+            logger.info("Botão de enviar clicado")
+            return self._settle(4, previous_id)
+        except UnconfirmedSendError:
+            raise
+        except Exception as e:
+            logger.error(f"Falha ao clicar no botão: {e}")
+            return False
+
+    def _type_lines(self, element, text):
+        """Digita texto multilinha usando Shift+Enter entre as linhas"""
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            element.send_keys(line)
+            if i < len(lines) - 1:
+                element.send_keys(Keys.SHIFT + Keys.ENTER)
+
+    def send_album(self, images):
+        """
+        Envia várias imagens como um álbum, com legenda por imagem
+
+        Todas as imagens são anexadas de uma vez em uma única preview.
+
+        Args:
+            images: Lista de tuplas (caminho da imagem, legenda)
+
+        Returns:
+            bool: True se o álbum foi enviado com sucesso
+        """
+        logger.info(f"Enviando álbum com {len(images)} imagem(ns)")
+        self._pace()
+
+        try:
+            paths = []
+            for image_path, _caption in images:
+                if not os.path.exists(image_path):
+                    logger.error(f"Arquivo não encontrado: {image_path}")
+                    return False
+                paths.append(str(Path(image_path).resolve()))
+
+            # Grupo bloqueado não tem botão de anexar; falhar sem esperar os seletores
+            self.wait_for_composer()
+
+            # Abrir menu de anexos para o input de mídia existir no DOM
+            attach_button = self._find_clickable(xpaths.ATTACH_BUTTON)
+            if not attach_button:
+                logger.error("Botão de anexar não encontrado")
+                return False
+            self._click(attach_button)
+            time.sleep(1)
+
+            # Selecionar todos os arquivos de uma vez (um por linha)
+            media_input = self.wait.until(EC.presence_of_element_located(
+                (By.XPATH, xpaths.MEDIA_INPUT)
+            ))
+            media_input.send_keys("\n".join(paths))
+
+            logger.info("Aguardando preview do álbum...")
+            time.sleep(3)
+
+            # Escrever a legenda de cada imagem
+            if any(caption for _path, caption in images):
+                thumbnails = []
+                for selector in xpaths.PREVIEW_THUMBNAIL:
+                    thumbnails = self.driver.find_elements(By.XPATH, selector)
+                    if len(thumbnails) >= len(images):
+                        break
+
+                for i, (_path, caption) in enumerate(images):
+                    if not caption:
+                        continue
+                    if len(images) > 1:
+                        if i >= len(thumbnails):
+                            logger.warning("Miniaturas da preview não encontradas, legendas ignoradas")
+                            break
+                        self._click(thumbnails[i])
+                        time.sleep(0.5)
+
+                    caption_box = self._find_clickable(xpaths.CAPTION_BOX)
+                    if not caption_box:
+                        logger.warning("Caixa de legenda não encontrada")
+                        break
+                    self._type_lines(caption_box, caption)
+
+            if not self.click_preview_send_button():
+                return False
+
+            logger.info("Álbum enviado com sucesso")
+            return True
+
+        except (ChatUnavailableError, UnconfirmedSendError):
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao enviar álbum: {e}", exc_info=True)
+            return False
+
+    def send_message_sequence(self, parts):
+        """
+        Envia uma sequência de partes na conversa já aberta
+
+        Imagens consecutivas são agrupadas em um único álbum; partes de
+        texto são enviadas como mensagens separadas, na ordem definida.
+
+        Args:
+            parts: Lista de dicionários com 'image' e 'caption' ou 'text'
+
+        Returns:
+            bool: True se todas as partes foram enviadas
+        """
+        album = []
+
+        for part in list(parts) + [None]:
+            if part and part.get('image'):
+                album.append((part['image'], part.get('caption') or ""))
+                continue
+
+            if album:
+                if not self.send_album(album):
+                    return False
+                album = []
+
+            if part and part.get('text'):
+                if not self.send_text_message(part['text']):
+                    return False
+
+        return True
+
+    def load_message_sequence(self, sequence_file, images_dir):
+        """
+        Lê um arquivo JSON de sequência de mensagens
+
+        Formato:
+            {"parts": [{"image": "a.jpg", "caption": "..."}, {"text": "..."}]}
+
+        Args:
+            sequence_file: Caminho do arquivo .json
+            images_dir: Diretório base para caminhos relativos de imagens
+
+        Returns:
+            list: Lista de partes com caminhos de imagem absolutos
+
+        Raises:
+            ValueError: Se o arquivo não tem nenhuma parte com imagem ou texto
+        """
+        with open(sequence_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        parts = []
+        for index, part in enumerate(data.get('parts') or []):
+            if part.get('image'):
+                image = Path(part['image'])
+                if not image.is_absolute():
+                    image = Path(images_dir) / image
+                parts.append({'image': str(image), 'caption': part.get('caption', '')})
+            elif part.get('text'):
+                parts.append({'text': part['text']})
+            else:
+                logger.warning(f"Parte {index + 1} de {Path(sequence_file).name} sem 'image' nem 'text', ignorada")
+
+        if not parts:
+            raise ValueError("a lista 'parts' está vazia (use 'image' e/ou 'text' em cada parte)")
+        return parts
+
     def get_message_for_today(self, messages_dir):
         """
         Obtém a mensagem programada para hoje baseada no dia da semana
@@ -327,9 +1064,21 @@ class WhatsAppBot:
 
         # Arquivo de mensagem do dia da semana
         message_file = Path(messages_dir) / f"{weekday_name}.txt"
+        sequence_file = Path(messages_dir) / f"{weekday_name}.json"
 
         logger.info(f"Procurando mensagem para: {weekday_name}")
 
+        # Sequência com várias partes (álbum + textos) tem prioridade
+        if sequence_file.exists():
+            try:
+                images_dir = Path(messages_dir).parent / "images"
+                parts = self.load_message_sequence(sequence_file, images_dir)
+                logger.info(f"Sequência encontrada: {weekday_name}.json ({len(parts)} partes)")
+                return {'text': None, 'image': None, 'caption': None, 'parts': parts}
+            except Exception as e:
+                logger.error(f"Erro ao ler sequência {sequence_file.name}: {e}")
+                return None
+
         # Se não existir arquivo específico, usar mensagem padrão
         if not message_file.exists():
             default_file = Path(messages_dir) / "default.txt"
@@ -363,6 +1112,26 @@ class WhatsAppBot:
             logger.error(f"Erro ao ler mensagem: {e}")
             return None
 
+    def send_message_data(self, message_data):
+        """
+        Envia na conversa aberta uma mensagem de get_message_for_today
+
+        Args:
+            message_data: Dicionário com 'parts', 'image'/'caption' ou 'text'
+
+        Returns:
+            bool: True se a mensagem foi enviada com sucesso
+        """
+        # Enviar sequência, imagem com legenda OU mensagem de texto
+        if message_data.get('parts'):
+            return self.send_message_sequence(message_data['parts'])
+        if message_data.get('image'):
+            return self.send_image_with_caption(
+                message_data['image'],
+                message_data.get('caption', '')
+            )
+        return self.send_text_message(message_data['text'])
+
     def send_daily_message(self, group_name, messages_dir):
         """
         Envia a mensagem diária programada
@@ -394,14 +1163,7 @@ class WhatsAppBot:
                 logger.error("Nenhuma mensagem configurada para hoje")
                 return False
 
-            # Enviar imagem com legenda OU mensagem de texto
-            if message_data.get('image'):
-                success = self.send_image_with_caption(
-                    message_data['image'],
-                    message_data.get('caption', '')
-                )
-            else:
-                success = self.send_text_message(message_data['text'])
+            success = self.send_message_data(message_data)
 
             if success:
                 logger.info("Mensagem diária enviada com sucesso!")
@@ -410,6 +1172,10 @@ class WhatsAppBot:
 
             return success
 
+        except UnconfirmedSendError as e:
+            # Já saiu: reenviar duplicaria a mensagem no grupo
+            logger.warning(f"Mensagem diária {e}, não será reenviada")
+            return True
         except Exception as e:
             logger.error(f"Erro ao enviar mensagem diária: {e}")
             return False
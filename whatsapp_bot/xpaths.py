@@ -0,0 +1,134 @@
+"""
+Seletores (XPath) da interface do WhatsApp Web
+
+Centralizados aqui para que o bot e o harness de replay (snapshots.py)
+usem exatamente os mesmos seletores. O nome evita conflito com o módulo
+selectors da biblioteca padrão.
+"""
+
+# Caixa de pesquisa da lista de conversas (indica que o login terminou)
+SEARCH_BOX = '//div[@contenteditable="true"][@data-tab="3"]'
+
+# Caixa de mensagem da conversa aberta
+COMPOSER = '//div[@contenteditable="true"][@data-tab="10"]'
+
+# Resultado da pesquisa com o nome exato da conversa (fora do cabeçalho da
+# conversa aberta, onde o clique abre os dados do grupo)
+CHAT_TITLE = '//span[@title="{name}"][not(ancestor::header)]'
+
+# Conversa na lista lateral (sem pesquisa)
+CHAT_LIST_TITLE = '//div[@id="pane-side"]//span[@title="{name}"]'
+
+# Nome no cabeçalho da conversa aberta
+OPEN_CHAT_HEADER = '//div[@id="main"]//header//span[@title="{name}"]'
+
+# Painel de qualquer conversa aberta / só da conversa com o nome no cabeçalho.
+# Ao trocar de conversa o painel anterior continua na tela por um instante,
+# então caixa de mensagem e avisos são procurados dentro do painel certo.
+ANY_OPEN_CHAT = '//div[@id="main"]'
+OPEN_CHAT = '//div[@id="main"][.//header//span[@title="{name}"]]'
+
+# Painel de uma conversa diferente da que estava aberta (abertura por telefone,
+# em que o nome do contato não é conhecido antes)
+OTHER_OPEN_CHAT = '//div[@id="main"][(.//header//span[@title])[1][not(@title="{name}")]]'
+
+# Botão de enviar da tela de preview de mídia
+SEND_BUTTON = [
+    '//span[@data-icon="send"]',
+    '//span[@data-testid="send"]',
+    '//button[@aria-label="Enviar"]',
+    '//div[@aria-label="Enviar"]',
+    '//span[@data-icon="send-light"]'
+]
+
+# Botão de anexar (clipe / "+") da conversa
+ATTACH_BUTTON = [
+    '//div[@title="Anexar"]',
+    '//button[@title="Anexar"]',
+    '//span[@data-icon="plus"]',
+    '//span[@data-icon="attach-menu-plus"]',
+    '//span[@data-icon="clip"]'
+]
+
+# Input de arquivo para fotos e vídeos
+MEDIA_INPUT = '//input[@type="file"][contains(@accept, "image")]'
+
+# Miniaturas das imagens na preview de álbum
+PREVIEW_THUMBNAIL = [
+    '//div[@role="listitem"]//div[@role="button"][.//img]',
+    '//div[@data-animate-media-preview-thumb]//img',
+]
+
+# Caixa de legenda da preview de mídia
+CAPTION_BOX = [
+    '//div[@aria-label="Adicionar legenda"][@contenteditable="true"]',
+    '//div[@contenteditable="true"][@data-lexical-editor="true"][not(@data-tab="10")]',
+]
+
+# Telas de erro que encerram a espera antes do timeout (ver errors.py)
+NO_CHATS_FOUND = (
+    '//*[text()[contains(., "Nenhuma conversa, contato ou mensagem encontrada")'
+    ' or contains(., "No chats, contacts or messages found")]]'
+)
+ADMINS_ONLY = (
+    '//div[@id="main"]//*[text()[contains(., "Somente administradores podem enviar")'
+    ' or contains(., "Only admins can send")]]'
+)
+NOT_PARTICIPANT = (
+    '//div[@id="main"]//*[text()[contains(., "não é mais participante")'
+    ' or contains(., "no longer a participant")]]'
+)
+INVALID_PHONE = (
+    '//*[text()[contains(., "compartilhado por URL é inválido")'
+    ' or contains(., "compartilhado por url é inválido")'
+    ' or contains(., "shared via url is invalid")]]'
+)
+
+
+def in_chat(xpath, chat=ANY_OPEN_CHAT):
+    """
+    Restringe um seletor ao painel de uma conversa
+
+    Args:
+        xpath: COMPOSER, ADMINS_ONLY, NOT_PARTICIPANT...
+        chat: XPath do painel (OPEN_CHAT formatado ou ANY_OPEN_CHAT)
+
+    Returns:
+        str: XPath dentro do painel
+    """
+    if xpath.startswith(ANY_OPEN_CHAT):
+        xpath = xpath[len(ANY_OPEN_CHAT):]
+    return chat + xpath
+
+
+# QR Code da tela de login
+QR_CODE = [
+    '//canvas[@aria-label]',
+    '//div[@data-ref]//canvas',
+]
+
+# O que precisa existir em cada tela gravada. Cada item é
+# (nome, seletor ou lista de alternativas).
+SCREEN_CHECKS = {
+    "chat_list": [
+        ("search_box", SEARCH_BOX),
+        # Os snapshots renomeiam as conversas para "Conversa N"
+        ("chat_title", CHAT_TITLE.format(name="Conversa 1")),
+    ],
+    "open_chat": [
+        ("search_box", SEARCH_BOX),
+        ("composer", COMPOSER),
+        ("attach_button", ATTACH_BUTTON),
+    ],
+    "media_preview": [
+        ("send_button", SEND_BUTTON),
+        ("caption_box", CAPTION_BOX),
+    ],
+    "qr": [
+        ("qr_code", QR_CODE),
+    ],
+}
+
+# Verificações de elementos em que o bot clica: no replay precisam estar
+# clicáveis, não só presentes
+CLICKED_CHECKS = {"chat_title", "attach_button", "send_button", "caption_box"}